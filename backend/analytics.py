@@ -0,0 +1,259 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from matrix_store import MatrixStore, CATEGORICAL_COLUMNS
+from models import BAND_ORDER, LEADERSHIP_COMPETENCY_TYPES
+
+logger = logging.getLogger(__name__)
+
+# HR analytics (/api/analytics/...). Each snapshot version gets one pandas
+# frame built straight from the matrix store's dictionary codes (categoricals,
+# no row decoding); every distinct query result is then computed once with
+# vectorized group-bys and kept until the version goes away.
+ANALYTICS_RESULTS_PER_VERSION = int(os.getenv("ANALYTICS_RESULTS_PER_VERSION", "256"))
+ANALYTICS_VERSIONS = int(os.getenv("ANALYTICS_VERSIONS", "2"))
+# Proficiency at or above this counts as high-proficiency demand
+HIGH_PROFICIENCY_LEVEL = int(os.getenv("ANALYTICS_HIGH_PROFICIENCY_LEVEL", "4"))
+
+# Columns analytics can group or filter by
+GROUP_COLUMNS = ("Group", "SBU", "BU", "Function", "Band", "L1_UJR", "Competency_Type")
+
+
+def band_rank(band: Any) -> int:
+    """Position of band in BAND_ORDER; unknown bands sort after the known ones."""
+    return BAND_ORDER.index(band) if band in BAND_ORDER else len(BAND_ORDER)
+
+
+def frame_from_store(store: MatrixStore) -> pd.DataFrame:
+    columns = {"id": store.ids}
+    for name in CATEGORICAL_COLUMNS:
+        col = store.columns[name]
+        if name == "Proficiency_Level":
+            values = np.array([v if v is not None else 0 for v in col.values], dtype=np.int64)
+            columns[name] = values[col.codes] if len(col.values) else np.zeros(store.size, dtype=np.int64)
+        else:
+            categories = ["Unassigned" if v is None else v for v in col.values]
+            if len(set(categories)) != len(categories):
+                # None and a literal "Unassigned" both present: decode instead
+                columns[name] = pd.Categorical(np.asarray(categories, dtype=object)[col.codes])
+            else:
+                columns[name] = pd.Categorical.from_codes(col.codes, categories=categories)
+    df = pd.DataFrame(columns)
+    df["Band_Rank"] = df["Band"].map(band_rank).astype(np.int64)
+    df["Leadership"] = df["Competency_Type"].isin(LEADERSHIP_COMPETENCY_TYPES).astype(bool)
+    return df
+
+
+def _ordered(groups: List[Any], by: str) -> List[Any]:
+    if by == "Band":
+        return sorted(groups, key=lambda band: (band_rank(band), str(band)))
+    return sorted(groups, key=str)
+
+
+class SnapshotAnalytics:
+    """Analytics for one snapshot version, each distinct query computed once."""
+
+    def __init__(self, version: int, store: MatrixStore):
+        self.version = version
+        self.df = frame_from_store(store)
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key: Tuple, compute) -> Dict[str, Any]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+            # Computed under the lock: concurrent identical requests wait for
+            # the first one instead of repeating the group-bys
+            result = compute()
+            self._results[key] = result
+            while len(self._results) > ANALYTICS_RESULTS_PER_VERSION:
+                self._results.popitem(last=False)
+            return result
+
+    def _scope(self, filters: Dict[str, List[Any]], min_band: Optional[str]) -> pd.DataFrame:
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+        for column, values in filters.items():
+            if values:
+                mask &= df[column].isin(values).to_numpy()
+        if min_band:
+            mask &= (df["Band_Rank"] >= band_rank(min_band)).to_numpy() & (df["Band_Rank"] < len(BAND_ORDER)).to_numpy()
+        return df[mask] if not mask.all() else df
+
+    @staticmethod
+    def _key(name: str, filters: Dict[str, List[Any]], *params) -> Tuple:
+        return (name, tuple(sorted((k, tuple(sorted(map(str, v)))) for k, v in filters.items() if v))) + params
+
+    def top_skills(self, n: int = 10, min_band: Optional[str] = None, sort: str = "frequency",
+                   filters: Optional[Dict[str, List[Any]]] = None) -> Dict[str, Any]:
+        """Skills ranked by how many distinct roles (UJRs) need them, or by
+        the share of those rows asking for high proficiency (sort="demand")."""
+        filters = filters or {}
+
+        def compute():
+            df = self._scope(filters, min_band)
+            total_roles = int(df["UJR_in_UJR_Master"].nunique())
+            if df.empty:
+                return {"total_roles": 0, "total_skills": 0, "skills": []}
+            grouped = df.assign(High=df["Proficiency_Level"] >= HIGH_PROFICIENCY_LEVEL).groupby("Skill_Name", observed=True)
+            stats = grouped.agg(
+                roles=("UJR_in_UJR_Master", "nunique"),
+                rows=("id", "size"),
+                high_share=("High", "mean"),
+                avg_proficiency=("Proficiency_Level", "mean"),
+                leadership=("Leadership", "any"),
+            )
+            # Most common competency type per skill
+            types = df.groupby(["Skill_Name", "Competency_Type"], observed=True).size()
+            types = types[types > 0].sort_values(ascending=False, kind="stable")
+            types = types[~types.index.get_level_values(0).duplicated()]
+            stats["competency_type"] = pd.Series(types.index.get_level_values(1), index=types.index.get_level_values(0))
+            order = ["roles", "high_share", "rows"] if sort == "frequency" else ["high_share", "roles", "rows"]
+            stats = stats.sort_values(order, ascending=False, kind="stable").head(n)
+            skills = [{
+                "skill": skill,
+                "competency_type": row.competency_type,
+                "leadership": bool(row.leadership),
+                "roles": int(row.roles),
+                "role_share": round(row.roles / total_roles, 4) if total_roles else 0.0,
+                "rows": int(row.rows),
+                "high_proficiency_share": round(float(row.high_share), 4),
+                "avg_proficiency": round(float(row.avg_proficiency), 2),
+            } for skill, row in stats.iterrows()]
+            return {"total_roles": total_roles, "total_skills": int(grouped.ngroups), "skills": skills}
+
+        return self._cached(self._key("top_skills", filters, n, min_band, sort), compute)
+
+    def proficiency(self, by: List[str], filters: Optional[Dict[str, List[Any]]] = None) -> Dict[str, Any]:
+        """Row counts per Proficiency_Level for each group of the by columns."""
+        filters = filters or {}
+
+        def compute():
+            df = self._scope(filters, None)
+            levels = sorted(int(level) for level in df["Proficiency_Level"].unique())
+            if df.empty:
+                return {"by": by, "levels": levels, "groups": []}
+            counts = pd.crosstab([df[column] for column in by], df["Proficiency_Level"])
+            means = df.groupby(by, observed=True)["Proficiency_Level"].mean()
+            groups = []
+            for key, row in counts.iterrows():
+                key = key if isinstance(key, tuple) else (key,)
+                total = int(row.sum())
+                if not total:
+                    continue
+                group = dict(zip(by, key))
+                group["counts"] = {str(level): int(row.get(level, 0)) for level in levels}
+                group["total"] = total
+                group["mean"] = round(float(means.loc[key if len(key) > 1 else key[0]]), 2)
+                groups.append(group)
+            groups.sort(key=lambda g: tuple((band_rank(g[c]), str(g[c])) if c == "Band" else (0, str(g[c])) for c in by))
+            return {"by": by, "levels": levels, "groups": groups}
+
+        return self._cached(self._key("proficiency", filters, tuple(by)), compute)
+
+    def competency_coverage(self, by: str = "Band", filters: Optional[Dict[str, List[Any]]] = None) -> Dict[str, Any]:
+        """Per group: how many of its roles have at least one skill of each
+        competency type, and how many distinct skills of that type it uses."""
+        filters = filters or {}
+
+        def compute():
+            df = self._scope(filters, None)
+            if df.empty:
+                return {"by": by, "competency_types": [], "groups": []}
+            roles = df.groupby(by, observed=True)["UJR_in_UJR_Master"].nunique()
+            per_type = df.groupby([by, "Competency_Type"], observed=True).agg(
+                roles=("UJR_in_UJR_Master", "nunique"),
+                skills=("Skill_Name", "nunique"),
+            )
+            types = sorted({str(t) for _, t in per_type.index})
+            groups = []
+            for group in _ordered(list(roles.index), by):
+                total = int(roles[group])
+                coverage = {}
+                for competency_type in types:
+                    if (group, competency_type) in per_type.index:
+                        row = per_type.loc[(group, competency_type)]
+                        covered, skills = int(row["roles"]), int(row["skills"])
+                    else:
+                        covered, skills = 0, 0
+                    coverage[competency_type] = {
+                        "roles": covered,
+                        "share": round(covered / total, 4) if total else 0.0,
+                        "skills": skills,
+                    }
+                groups.append({by: group, "roles": total, "coverage": coverage})
+            return {"by": by, "competency_types": types, "groups": groups}
+
+        return self._cached(self._key("coverage", filters, by), compute)
+
+    def role_requirements(self, by_band: bool = False) -> pd.DataFrame:
+        """Required proficiency per (UJR[, Band], Skill_Name), as plain
+        string columns ready to merge with uploaded data. A skill listed more
+        than once for a role keeps its highest level."""
+        keys = ["UJR_in_UJR_Master", "Band", "Skill_Name"] if by_band else ["UJR_in_UJR_Master", "Skill_Name"]
+
+        def compute():
+            df = self.df
+            grouped = df.groupby(keys, observed=True)
+            required = grouped.agg(
+                Required_Proficiency=("Proficiency_Level", "max"),
+                Competency_Type=("Competency_Type", "first"),
+                Leadership=("Leadership", "any"),
+            ).reset_index()
+            names = df.groupby("UJR_in_UJR_Master", observed=True)["Job_Role_Name_without_concat"].first()
+            required["Role_Name"] = required["UJR_in_UJR_Master"].map(names).astype(object)
+            for column in keys + ["Competency_Type"]:
+                required[column] = required[column].astype(str)
+            return required
+
+        return self._cached(("role_requirements", by_band), compute)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"version": self.version, "results": len(self._results), "hits": self.hits, "misses": self.misses}
+
+
+class AnalyticsCache:
+    """SnapshotAnalytics for the most recent snapshot versions."""
+
+    def __init__(self, versions: int = ANALYTICS_VERSIONS):
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._by_version: "OrderedDict[int, SnapshotAnalytics]" = OrderedDict()
+
+    def get(self, snapshot) -> SnapshotAnalytics:
+        with self._lock:
+            analytics = self._by_version.get(snapshot.version)
+            if analytics is not None:
+                self._by_version.move_to_end(snapshot.version)
+                return analytics
+        store = snapshot.store
+        with self._lock:
+            analytics = self._by_version.get(snapshot.version)
+            if analytics is None:
+                analytics = SnapshotAnalytics(snapshot.version, store)
+                self._by_version[snapshot.version] = analytics
+                while len(self._by_version) > self.versions:
+                    self._by_version.popitem(last=False)
+            return analytics
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"versions": [a.stats() for a in self._by_version.values()]}
+
+
+# Global instance
+analytics_cache = AnalyticsCache()
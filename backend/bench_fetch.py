@@ -0,0 +1,94 @@
+"""Benchmark: dict-per-row fetch path vs. Arrow columnar path.
+
+Runs offline against synthetic data shaped like the manpower table, so it
+measures client-side conversion cost only (no network / BigQuery time):
+
+  rows  : RowIterator-style bigquery.Row objects -> dict(row) per row
+          (what BigQueryClient.fetch_manpower_data does)
+  arrow : Arrow IPC stream (what the Storage Read API delivers) -> pyarrow.Table
+          (what BigQueryClient.fetch_manpower_arrow keeps in memory)
+
+plus the cost of producing a response body from each:
+
+  rows -> JSON, arrow -> Arrow IPC, arrow -> JSON (conversion at the edge)
+
+Usage:
+    python bench_fetch.py                 # 10k, 100k, 1M rows
+    python bench_fetch.py 10000 50000
+"""
+import json
+import random
+import sys
+import time
+
+import pyarrow as pa
+from google.cloud.bigquery.table import Row
+
+from db import MANPOWER_COLUMNS
+
+BANDS = ['Band 1A', 'Band 1B', 'Band 2A', 'Band 2B', 'Band 3', 'Band 4', 'Band 5']
+FUNCTIONS = ["HR", "Sales", "Finance", "Engineering", "Marketing", "Operations"]
+
+
+def make_rows(n):
+    rnd = random.Random(42)
+    rows = []
+    for i in range(1, n + 1):
+        func = rnd.choice(FUNCTIONS)
+        skill = rnd.randint(1, 500)
+        rows.append((
+            i, rnd.choice(["Raymond Group", "Raymond Lifestyle"]), rnd.choice(["Textile", "Apparel", "Realty"]),
+            f"BU {rnd.randint(1, 12)}", func, f"UJR{rnd.randint(1, 5000):05d}",
+            f"{func} {rnd.choice(['Manager', 'Executive', 'Analyst', 'Lead'])}",
+            rnd.choice(["Managerial", "Operational", "Strategic"]),
+            rnd.choice(["Functional", "Behavioral", "Raymond Leadership Competency"]),
+            f"Skill {skill}", f"Ability to apply skill {skill} consistently across assignments and teams.",
+            rnd.randint(1, 5), rnd.choice(BANDS),
+        ))
+    return rows
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def bench(n):
+    tuples = make_rows(n)
+    field_to_index = {name: i for i, name in enumerate(MANPOWER_COLUMNS)}
+    bq_rows = [Row(values, field_to_index) for values in tuples]
+
+    # Wire format for the Arrow path, built outside the timed section
+    columns = list(zip(*tuples))
+    source = pa.table({name: list(col) for name, col in zip(MANPOWER_COLUMNS, columns)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, source.schema) as writer:
+        writer.write_table(source)
+    wire = sink.getvalue()
+    del columns, source, tuples
+
+    records, t_rows = timed(lambda: [dict(row) for row in bq_rows])
+    _, t_rows_json = timed(lambda: json.dumps(records).encode("utf-8"))
+    del records, bq_rows
+
+    table, t_arrow = timed(lambda: pa.ipc.open_stream(wire).read_all())
+
+    def to_ipc():
+        out = pa.BufferOutputStream()
+        with pa.ipc.new_stream(out, table.schema) as w:
+            w.write_table(table)
+        return out.getvalue()
+
+    _, t_arrow_ipc = timed(to_ipc)
+    _, t_arrow_json = timed(lambda: json.dumps(table.to_pylist()).encode("utf-8"))
+
+    print(f"{n:>9,} rows | fetch: rows {t_rows * 1000:8.1f} ms  arrow {t_arrow * 1000:7.1f} ms "
+          f"({t_rows / max(t_arrow, 1e-9):6.1f}x) | body: rows->json {t_rows_json * 1000:8.1f} ms  "
+          f"arrow->ipc {t_arrow_ipc * 1000:6.1f} ms  arrow->json {t_arrow_json * 1000:8.1f} ms", flush=True)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        bench(size)
@@ -0,0 +1,115 @@
+"""Benchmark: bulk gap analysis (POST /api/gap-analysis) without the HTTP layer.
+
+Builds a synthetic skills matrix (roles x bands, 20 skills per role) and a
+self-assessment upload for N employees rating their role's skills, then
+times reading the upload (CSV and Parquet), the vectorized join in
+compute_gaps, streaming both report formats, and a per-row Python loop
+doing the same comparison for reference.
+
+Usage:
+    python bench_gap_analysis.py                 # 50k employees x 20 skills
+    python bench_gap_analysis.py 200000 20
+"""
+import io
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics import SnapshotAnalytics
+from gap_analysis import load_assessments, compute_gaps, iter_reports
+from matrix_store import MatrixStore
+from models import BAND_ORDER
+
+FUNCTIONS = ("HR", "Sales", "Finance", "Operations", "Marketing", "IT", "Supply Chain", "Design")
+COMPETENCY_TYPES = ("Functional", "Technical", "Behavioral", "Raymond Leadership Competency")
+
+
+def make_matrix(roles, skills_per_role, seed=7):
+    rng = random.Random(seed)
+    skills = [f"Skill {i}" for i in range(1500)]
+    rows = []
+    for r in range(roles):
+        function = rng.choice(FUNCTIONS)
+        for skill in rng.sample(skills, skills_per_role):
+            rows.append({
+                "id": len(rows) + 1, "Group": "Raymond", "SBU": "Textile", "BU": "BU1", "Function": function,
+                "UJR_in_UJR_Master": f"UJR{r:05d}", "Job_Role_Name_without_concat": f"{function} Role {r}",
+                "L1_UJR": "Managerial", "Competency_Type": rng.choice(COMPETENCY_TYPES), "Skill_Name": skill,
+                "Skill_Definition": f"Ability in {skill}", "Proficiency_Level": rng.randint(1, 5),
+                "Band": BAND_ORDER[r % len(BAND_ORDER)],
+            })
+    return rows
+
+
+def make_upload(requirements, employees, skills_per_employee, seed=11):
+    """Employees spread over the roles, each rating (most of) their role's skills."""
+    rng = np.random.default_rng(seed)
+    by_role = requirements.groupby("UJR_in_UJR_Master", sort=False)["Skill_Name"].agg(list)
+    roles = by_role.index.to_numpy()
+    assigned = roles[rng.integers(0, len(roles), employees)]
+    ids = np.repeat([f"E{i:07d}" for i in range(employees)], skills_per_employee)
+    ujrs = np.repeat(assigned, skills_per_employee)
+    skills = np.concatenate([by_role[ujr][:skills_per_employee] for ujr in assigned])
+    ratings = rng.integers(0, 6, len(ids)).astype(float)
+    ratings[rng.random(len(ids)) < 0.05] = np.nan  # a few skills left unrated
+    return pd.DataFrame({"Employee_ID": ids, "UJR_in_UJR_Master": ujrs, "Skill_Name": skills,
+                         "Current_Proficiency": ratings})
+
+
+def python_loop(upload, requirements):
+    required = {}
+    for ujr, skill, level in zip(requirements["UJR_in_UJR_Master"], requirements["Skill_Name"],
+                                 requirements["Required_Proficiency"]):
+        required.setdefault(ujr, {})[skill] = level
+    ratings, roles = {}, {}
+    for row in upload.to_dict("records"):
+        roles.setdefault(row["Employee_ID"], row["UJR_in_UJR_Master"])
+        if row["Current_Proficiency"] == row["Current_Proficiency"]:
+            ratings[(row["Employee_ID"], row["Skill_Name"])] = row["Current_Proficiency"]
+    gaps = 0
+    for employee, ujr in roles.items():
+        for skill, level in required.get(ujr, {}).items():
+            current = ratings.get((employee, skill), 0)
+            if level - current > 0:
+                gaps += 1
+    return gaps
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<28} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def run(employees, skills_per_employee):
+    roles = max(50, employees // 50)
+    print(f"{employees} employees x {skills_per_employee} skills, {roles} roles")
+    store = MatrixStore.from_records(make_matrix(roles, skills_per_employee))
+    analytics = SnapshotAnalytics(1, store)
+    requirements = timed("role requirements", analytics.role_requirements)
+    upload = make_upload(requirements, employees, skills_per_employee)
+
+    csv_bytes = upload.to_csv(index=False).encode("utf-8")
+    parquet = io.BytesIO()
+    upload.to_parquet(parquet)
+    print(f"  upload: {len(upload)} rows, csv {len(csv_bytes) / 1e6:.1f} MB, parquet {parquet.tell() / 1e6:.1f} MB")
+    timed("load csv", lambda: load_assessments(io.BytesIO(csv_bytes), "upload.csv"))
+    assessments = timed("load parquet", lambda: load_assessments(io.BytesIO(parquet.getvalue()), "upload.parquet"))
+
+    gaps, summary = timed("compute_gaps", lambda: compute_gaps(assessments, requirements))
+    print(f"  {summary['required_skills']} comparisons, {summary['gaps']} gaps, {summary['assessed']} assessed")
+    for format, only_gaps in (("ndjson", True), ("ndjson", False), ("csv", True)):
+        size = timed(f"stream {format}{'' if only_gaps else ' (all skills)'}",
+                     lambda: sum(len(chunk) for chunk in iter_reports(gaps, summary, format=format, only_gaps=only_gaps)))
+        print(f"  {'':<28} {size / 1e6:8.1f} MB")
+    loop_gaps = timed("per-row python loop", lambda: python_loop(upload, requirements))
+    assert loop_gaps == summary["gaps"], (loop_gaps, summary["gaps"])
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(args[0] if args else 50000, args[1] if len(args) > 1 else 20)
@@ -0,0 +1,71 @@
+"""Benchmark: single-row edit latency, whole-file JSON rewrite vs. SQLite store.
+
+The old local mode handled every PUT by parsing all of mock_db.json, scanning
+for the id and re-serializing the whole file; LocalStore does one indexed
+UPDATE. This times one edit at several table sizes for each.
+
+Usage:
+    python bench_local_store.py                 # 1k, 10k, 100k rows
+    python bench_local_store.py 5000 50000
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from local_store import LocalStore
+
+EDITS = 20
+
+
+def make_rows(n):
+    return [{
+        "id": i, "Group": "Raymond Group", "SBU": "Textile", "BU": f"BU {i % 12}", "Function": "HR",
+        "UJR_in_UJR_Master": f"UJR{i % 5000:05d}", "Job_Role_Name_without_concat": "HR Manager",
+        "L1_UJR": "Managerial", "Competency_Type": "Functional", "Skill_Name": f"Skill {i % 500}",
+        "Skill_Definition": "Ability to apply the skill consistently across assignments and teams.",
+        "Proficiency_Level": i % 5 + 1, "Band": "Band 2A",
+    } for i in range(1, n + 1)]
+
+
+def json_edit(path, record_id, record):
+    # What main.py used to do per PUT: load_db(), linear scan, save_db()
+    with open(path, "r", encoding="utf-8") as f:
+        db = json.load(f)
+    for i, row in enumerate(db):
+        if row["id"] == record_id:
+            db[i] = record
+            break
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(db, f, indent=4)
+
+
+def bench(n, workdir):
+    rows = make_rows(n)
+    json_path = os.path.join(workdir, f"bench_{n}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=4)
+    store = LocalStore(os.path.join(workdir, f"bench_{n}.sqlite3"), legacy_json=json_path)
+    store.count()  # triggers the one-time migration
+
+    targets = [rows[(k * 7919) % n] for k in range(EDITS)]
+
+    start = time.perf_counter()
+    for row in targets:
+        json_edit(json_path, row["id"], dict(row, Proficiency_Level=5))
+    t_json = (time.perf_counter() - start) / EDITS
+
+    start = time.perf_counter()
+    for row in targets:
+        store.update(row["id"], dict(row, Proficiency_Level=5))
+    t_sqlite = (time.perf_counter() - start) / EDITS
+
+    print(f"{n:>8,} rows | per edit: json rewrite {t_json * 1000:9.2f} ms   sqlite {t_sqlite * 1000:6.3f} ms", flush=True)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            bench(size, workdir)
@@ -0,0 +1,101 @@
+"""Benchmark: platypus vs. direct-canvas PDF engines.
+
+Renders synthetic skill rows shaped like the manpower table with both
+engines and reports wall time and pages per second. Runs offline (no
+server or BigQuery needed). With --parallel each engine is also run in
+fragments over PDF_WORKERS processes and merged, as "parallel": true does.
+
+Usage:
+    python bench_pdf.py                   # 1k, 5k, 20k, 50k rows
+    python bench_pdf.py 1000 10000
+    python bench_pdf.py --canvas-only 50000
+    PDF_WORKERS=8 python bench_pdf.py --parallel 20000
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+from pypdf import PdfReader
+
+from routers.pdf_export import (
+    PDF_ENGINES, PDF_WORKERS, get_band_order, plan_fragments, render_fragment_file, merge_pdf_fragments,
+    remove_files,
+)
+from pdf_cache import new_spool_path
+
+FUNCTIONS = ["HR", "Sales", "Finance", "Engineering", "Marketing", "Operations"]
+WORDS = ("ability to plan execute review and improve processes across teams with "
+         "clear communication stakeholder alignment data driven decisions").split()
+
+
+def make_rows(n):
+    rnd = random.Random(42)
+    rows = []
+    for i in range(1, n + 1):
+        func = rnd.choice(FUNCTIONS)
+        skill = rnd.randint(1, 500)
+        rows.append({
+            "id": i, "Group": "Raymond Group", "SBU": "Textile", "BU": f"BU {rnd.randint(1, 12)}",
+            "Function": func, "UJR_in_UJR_Master": f"UJR{rnd.randint(1, 5000):05d}",
+            "Job_Role_Name_without_concat": f"{func} {rnd.choice(['Manager', 'Executive', 'Analyst'])}",
+            "L1_UJR": rnd.choice(["Managerial", "Operational", "Strategic"]),
+            "Competency_Type": rnd.choice(["Functional", "Behavioral", "Raymond Leadership Competency"]),
+            "Skill_Name": f"Skill {skill}",
+            "Skill_Definition": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 40))),
+            "Proficiency_Level": rnd.randint(1, 5), "Band": rnd.choice(get_band_order()),
+        })
+    return rows
+
+
+def render_parallel(executor, rows, engine):
+    generated_at = datetime.now()
+    fragments = plan_fragments(rows)
+    paths = [new_spool_path() for _ in fragments]
+    try:
+        futures = [executor.submit(render_fragment_file, part, {}, engine, continued, generated_at, path)
+                   for (part, continued), path in zip(fragments, paths)]
+        for future in futures:
+            future.result()
+        out = BytesIO()
+        merge_pdf_fragments(paths, out)
+        return out
+    finally:
+        remove_files(paths)
+
+
+def bench(n, engines, executor=None):
+    rows = make_rows(n)
+    results = []
+    for engine in engines:
+        runs = [(engine, lambda: PDF_ENGINES[engine](rows, {}))]
+        if executor is not None:
+            runs.append((f"{engine}/parallel", lambda: render_parallel(executor, rows, engine)))
+        for label, render in runs:
+            start = time.perf_counter()
+            pdf = render()
+            elapsed = time.perf_counter() - start
+            pages = len(PdfReader(pdf).pages)
+            results.append(f"{label} {elapsed:7.2f} s {pages:6d} pages {pages / elapsed:7.1f} pages/s")
+    print(f"{n:>7,} rows | " + " | ".join(results), flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the platypus and canvas PDF engines.")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1_000, 5_000, 20_000, 50_000],
+                        help="row counts to render (default: 1000 5000 20000 50000)")
+    parser.add_argument("--canvas-only", action="store_true", help="benchmark only the canvas engine")
+    parser.add_argument("--parallel", action="store_true",
+                        help="also render in fragments over PDF_WORKERS processes and merge")
+    args = parser.parse_args()
+    engines = ["canvas"] if args.canvas_only else list(PDF_ENGINES)
+    executor = None
+    if args.parallel:
+        executor = ProcessPoolExecutor(max(PDF_WORKERS, 1), mp_context=multiprocessing.get_context("spawn"))
+    for size in args.sizes:
+        bench(size, engines, executor)
+    if executor is not None:
+        executor.shutdown()
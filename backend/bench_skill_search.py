@@ -0,0 +1,89 @@
+"""Benchmark: /api/skills/search index build, query and edit latency.
+
+Builds a synthetic skills matrix (roles x bands x skills with a realistic
+vocabulary), then times the SkillIndex build, typeahead queries with and
+without Band/Function filters, and single-row edits through
+MatrixStore.with_changes + SkillIndex.with_changes.
+
+Usage:
+    python bench_skill_search.py                 # 100k and 1M rows
+    python bench_skill_search.py 50000
+"""
+import random
+import statistics
+import sys
+import time
+
+from matrix_store import MatrixStore
+from skill_index import SkillIndex
+
+WORDS = ("data analysis negotiation leadership budgeting forecasting stakeholder management customer "
+         "service quality compliance safety planning recruitment payroll supply chain logistics "
+         "merchandising design textile production marketing digital communication coaching strategy "
+         "risk audit procurement inventory sales retail finance reporting excel modelling").split()
+FUNCTIONS = ("HR", "Sales", "Finance", "Operations", "Marketing", "IT", "Supply Chain", "Design")
+BANDS = ("Band 1A", "Band 1B", "Band 2A", "Band 2B", "Band 3", "Band 4", "Band 5")
+QUERIES = ("data", "supply ch", "stakeholder man", "neg", "risk audit", "lead", "q", "excel model")
+
+
+def make_rows(n, seed=7):
+    rng = random.Random(seed)
+    skills = []
+    for i in range(1500):
+        name = " ".join(rng.sample(WORDS, 2)).title() + f" {i}"
+        definition = "Ability to " + " ".join(rng.sample(WORDS, 8)) + "."
+        skills.append((name, definition))
+    roles = [f"{rng.choice(FUNCTIONS)} {' '.join(rng.sample(WORDS, 2)).title()} Lead {i}" for i in range(4000)]
+    rows = []
+    for i in range(1, n + 1):
+        role = roles[rng.randrange(len(roles))]
+        name, definition = skills[rng.randrange(len(skills))]
+        rows.append({
+            "id": i, "Group": "Raymond Group", "SBU": "Textile", "BU": f"BU {i % 12}",
+            "Function": role.split(" ")[0], "UJR_in_UJR_Master": f"UJR{i % 5000:05d}",
+            "Job_Role_Name_without_concat": role, "L1_UJR": "Managerial", "Competency_Type": "Functional",
+            "Skill_Name": name, "Skill_Definition": definition, "Proficiency_Level": i % 5 + 1,
+            "Band": BANDS[i % len(BANDS)],
+        })
+    return rows
+
+
+def timed(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def bench(n):
+    rows = make_rows(n)
+    store = MatrixStore.from_records(rows)
+    start = time.perf_counter()
+    index = SkillIndex(store)
+    print(f"{n:>9} rows: build {time.perf_counter() - start:6.2f} s  {index.stats()}")
+
+    for query in QUERIES:
+        med, worst = timed(lambda: index.search(query))
+        fmed, fworst = timed(lambda: index.search(query, bands=["Band 2A", "Band 3"], functions=["Sales"]))
+        print(f"    q={query!r:20} {med:6.2f} ms (max {worst:6.2f})   filtered {fmed:6.2f} ms (max {fworst:6.2f})")
+
+    def edit():
+        nonlocal store
+        row = rows[random.randrange(n)]
+        changed = dict(row, Skill_Name="Supply Chain Analytics", Job_Role_Name_without_concat="Logistics Planner")
+        store = store.with_changes({row["id"]: changed})
+        index.with_changes({row["id"]: changed}, store)
+    med, worst = timed(edit)
+    print(f"    edit {med:6.2f} ms (max {worst:6.2f})")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for n in sizes:
+        bench(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import os
+import threading
+import time
+import uuid
+import pyarrow as pa
 from google.cloud import bigquery
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterator, Optional
 import logging
 
 # Configure logging
@@ -13,8 +17,232 @@ PROJECT_ID = os.getenv("GCP_PROJECT_ID", "raymond-data-lake")
 DATASET_ID = os.getenv("BIGQUERY_DATASET_ID", "manpower_skills_matrix")
 TABLE_ID = os.getenv("BIGQUERY_TABLE_ID", "manpower_skills_matrix") # Assuming table name is 'manpower'
 
+# Table columns (mirrors EmployeeRecord in models.py). Column names can't be
+# query parameters, so anything user-supplied is checked against this list.
+MANPOWER_COLUMNS = (
+    "id", "Group", "SBU", "BU", "Function", "UJR_in_UJR_Master",
+    "Job_Role_Name_without_concat", "L1_UJR", "Competency_Type",
+    "Skill_Name", "Skill_Definition", "Proficiency_Level", "Band",
+)
+# Columns that can be filtered on with multi-value IN (...) filters
+FILTER_COLUMNS = ("Group", "SBU", "BU", "Function", "Band")
+# How the snapshot is fetched: "arrow" reads a columnar pyarrow.Table (through
+# the BigQuery Storage Read API when google-cloud-bigquery-storage is available),
+# "rows" iterates the REST RowIterator into one dict per row.
+FETCH_MODE = os.getenv("BIGQUERY_FETCH_MODE", "arrow")
+# Rows per result page when streaming
+STREAM_PAGE_SIZE = int(os.getenv("BIGQUERY_STREAM_PAGE_SIZE", "5000"))
+# Buffered writes: edits are collected and applied with one MERGE every
+# FLUSH_INTERVAL seconds, or as soon as BATCH_SIZE rows are pending.
+WRITE_FLUSH_INTERVAL = float(os.getenv("BIGQUERY_WRITE_FLUSH_INTERVAL", "30"))
+WRITE_BATCH_SIZE = int(os.getenv("BIGQUERY_WRITE_BATCH_SIZE", "500"))
+STAGING_TABLE_ID = os.getenv("BIGQUERY_STAGING_TABLE_ID", f"{TABLE_ID}_staging")
+
+class _Call:
+    """One in-flight fetch that other callers can wait on."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single execution.
+
+    The first caller (the leader) runs the function; everyone arriving while it
+    is in flight blocks until it finishes and gets the same result (or error).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.coalesced_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+                self.executions += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            started = time.monotonic()
+            call.done.wait()
+            waited = time.monotonic() - started
+            with self._lock:
+                self.coalesced_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "coalesced_wait_seconds": round(self.coalesced_wait_seconds, 3),
+                "avg_wait_seconds": round(self.coalesced_wait_seconds / self.coalesced, 3) if self.coalesced else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+            }
+
+
+class WriteBuffer:
+    """Collects row edits/deletes and applies them to BigQuery in batches.
+
+    Each flush loads the pending rows into a fresh staging table and applies
+    them with a single MERGE, so a bulk editing session costs one DML
+    statement per batch instead of one per row. Until a flush commits, the
+    edits are available through overlay() for read-your-writes.
+    """
+    def __init__(self, client: "BigQueryClient", interval: float = WRITE_FLUSH_INTERVAL,
+                 batch_size: int = WRITE_BATCH_SIZE):
+        self._bq = client
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # id -> full record, or None for a delete
+        self._pending: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._flushing: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._timer: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+        self.last_flush_seconds = None
+
+    def upsert(self, record_id: int, record: Dict[str, Any]):
+        self._add({record_id: record})
+
+    def delete(self, record_id: int):
+        self._add({record_id: None})
+
+    def add_many(self, changes: Dict[int, Optional[Dict[str, Any]]]):
+        self._add(changes)
+
+    def _add(self, changes: Dict[int, Optional[Dict[str, Any]]]):
+        with self._lock:
+            self._pending.update(changes)
+            full = len(self._pending) >= self.batch_size
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._run_timer, name="bq-write-flush", daemon=True)
+                self._timer.start()
+        if full:
+            threading.Thread(target=self.flush, name="bq-write-flush-batch", daemon=True).start()
+
+    def overlay(self) -> Dict[int, Optional[Dict[str, Any]]]:
+        """Edits not yet committed to BigQuery (id -> record, None = deleted)."""
+        with self._lock:
+            merged = dict(self._flushing)
+            merged.update(self._pending)
+            return merged
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._flushing)
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Scheduled write flush failed: {e}")
+
+    def flush(self) -> int:
+        """Apply everything pending with one MERGE. Returns the number of rows applied."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+                batch = self._flushing
+
+            started = time.monotonic()
+            try:
+                self._merge(batch)
+            except Exception:
+                with self._lock:
+                    self.flush_errors += 1
+                    # Put the batch back; anything edited since stays newer
+                    batch.update(self._pending)
+                    self._pending = batch
+                    self._flushing = {}
+                raise
+
+            with self._lock:
+                self._flushing = {}
+                self.flushes += 1
+                self.flushed_rows += len(batch)
+                self.last_flush_seconds = round(time.monotonic() - started, 3)
+            logger.info(f"Flushed {len(batch)} buffered writes to BigQuery with one MERGE")
+            return len(batch)
+
+    def _merge(self, batch: Dict[int, Optional[Dict[str, Any]]]):
+        client = self._bq.client
+        staging_ref = f"{PROJECT_ID}.{DATASET_ID}.{STAGING_TABLE_ID}_{uuid.uuid4().hex[:12]}"
+        schema = [bigquery.SchemaField("_key", "INT64"), bigquery.SchemaField("_op", "STRING")] + [
+            bigquery.SchemaField(c, "INT64" if c in ("id", "Proficiency_Level") else "STRING")
+            for c in MANPOWER_COLUMNS
+        ]
+        rows = []
+        for record_id, record in batch.items():
+            row = {c: (record or {}).get(c) for c in MANPOWER_COLUMNS}
+            row["_key"] = record_id
+            row["_op"] = "DELETE" if record is None else "UPDATE"
+            rows.append(row)
+
+        # Load jobs don't count against DML quotas
+        job_config = bigquery.LoadJobConfig(schema=schema, write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE)
+        client.load_table_from_json(rows, staging_ref, job_config=job_config).result()
+        try:
+            assignments = ", ".join(f"`{c}` = S.`{c}`" for c in MANPOWER_COLUMNS)
+            merge = (
+                f"MERGE `{self._bq.table_ref}` T USING `{staging_ref}` S ON T.id = S._key "
+                f"WHEN MATCHED AND S._op = 'DELETE' THEN DELETE "
+                f"WHEN MATCHED AND S._op = 'UPDATE' THEN UPDATE SET {assignments}"
+            )
+            client.query(merge).result()
+        finally:
+            client.delete_table(staging_ref, not_found_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flushing": len(self._flushing),
+                "flushes": self.flushes,
+                "flushed_rows": self.flushed_rows,
+                "flush_errors": self.flush_errors,
+                "last_flush_seconds": self.last_flush_seconds,
+                "interval_seconds": self.interval,
+                "batch_size": self.batch_size,
+            }
+
+
 class BigQueryClient:
     def __init__(self):
+        # Concurrent cold fetches share one query job instead of each starting their own
+        self._flight = SingleFlight()
+        self.write_buffer = WriteBuffer(self)
         try:
             self.client = bigquery.Client(project=PROJECT_ID)
             self.table_ref = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
@@ -24,41 +252,237 @@ class BigQueryClient:
             self.client = None
 
     def get_manpower_data(self) -> List[Dict[str, Any]]:
+        try:
+            return self.fetch_manpower_data()
+        except Exception as e:
+            logger.error(f"Error fetching data from BigQuery: {e}")
+            return []
+
+    def fetch_manpower_data(self) -> List[Dict[str, Any]]:
+        """Same as get_manpower_data, but lets query errors propagate so callers
+        (e.g. the snapshot cache) can tell an empty table from a failed fetch.
+
+        Callers that arrive while a fetch is already running share its result.
+        The list is shared too, so treat it as read-only."""
+        return self._flight.do("manpower:all", self._fetch_manpower_data)
+
+    def fetch_manpower_arrow(self) -> pa.Table:
+        """Fetch the whole table as a columnar pyarrow.Table.
+
+        Skips the per-row Row -> dict conversion entirely; rows are only
+        materialized if and when someone asks for JSON. Shares in-flight
+        fetches like fetch_manpower_data.
+        """
+        return self._flight.do("manpower:arrow", self._fetch_manpower_arrow)
+
+    def fetch_manpower_snapshot(self):
+        """Fetch the table for the snapshot cache in the configured FETCH_MODE.
+
+        Returns (result, overlay), where overlay is write_buffer.overlay() read
+        just before the query ran. An edit that a flush merges while the fetch
+        runs is then in the result or in the overlay (applying it again is
+        harmless). Callers that share an in-flight fetch get the overlay read
+        by the one that started it, not one read after the flush.
+        """
+        def run():
+            overlay = self.write_buffer.overlay()
+            fetch = self._fetch_manpower_arrow if FETCH_MODE == "arrow" else self._fetch_manpower_data
+            return fetch(), overlay
+
+        return self._flight.do(f"manpower:snapshot:{FETCH_MODE}", run)
+
+    def fetch_stats(self) -> Dict[str, Any]:
+        return self._flight.stats()
+
+    def _fetch_manpower_data(self) -> List[Dict[str, Any]]:
         if not self.client:
             logger.warning("BigQuery client not initialized. Returning empty list.")
             return []
 
         query = f"SELECT * FROM `{self.table_ref}`"
-        try:
-            query_job = self.client.query(query)
-            results = query_job.result()  # Waits for job to complete.
-            
-            data = []
-            for row in results:
-                # Convert Row to dict
-                record = dict(row)
-                data.append(record)
-            
-            logger.info(f"Fetched {len(data)} records from BigQuery")
-            return data
-        except Exception as e:
-            logger.error(f"Error fetching data from BigQuery: {e}")
+        query_job = self.client.query(query)
+        results = query_job.result()  # Waits for job to complete.
+
+        data = []
+        for row in results:
+            # Convert Row to dict
+            record = dict(row)
+            data.append(record)
+
+        logger.info(f"Fetched {len(data)} records from BigQuery")
+        return data
+
+    def _fetch_manpower_arrow(self) -> pa.Table:
+        if not self.client:
+            logger.warning("BigQuery client not initialized. Returning empty table.")
+            return pa.table({})
+
+        query = f"SELECT * FROM `{self.table_ref}`"
+        query_job = self.client.query(query)
+        # Falls back to the REST API (with a warning) if the Storage API client is missing
+        table = query_job.to_arrow(create_bqstorage_client=True)
+        logger.info(f"Fetched {table.num_rows} records from BigQuery as Arrow")
+        return table
+
+    def build_manpower_query(self, filters: Dict[str, List[str]] = None, fields: List[str] = None,
+                             limit: int = None, after_id: int = None, exclude_ids: List[int] = None):
+        """Translate filters/projection/pagination into a parameterized query.
+
+        Returns (sql, query_parameters). Filter values and the cursor are always
+        bound as parameters; column names are only ever taken from MANPOWER_COLUMNS.
+        Rows with ids in exclude_ids are left out.
+        """
+        filters = filters or {}
+        for column in filters:
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter on column '{column}'")
+        if fields:
+            unknown = [f for f in fields if f not in MANPOWER_COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            # Keep table order and always include id, the pagination key
+            columns = [c for c in MANPOWER_COLUMNS if c == "id" or c in fields]
+            select = ", ".join(f"`{c}`" for c in columns)
+        else:
+            select = "*"
+
+        where = []
+        params = []
+        for i, column in enumerate(FILTER_COLUMNS):
+            values = filters.get(column)
+            if values:
+                where.append(f"`{column}` IN UNNEST(@f{i})")
+                params.append(bigquery.ArrayQueryParameter(f"f{i}", "STRING", list(values)))
+        if after_id is not None:
+            where.append("id > @after_id")
+            params.append(bigquery.ScalarQueryParameter("after_id", "INT64", after_id))
+        if exclude_ids:
+            where.append("id NOT IN UNNEST(@exclude_ids)")
+            params.append(bigquery.ArrayQueryParameter("exclude_ids", "INT64", sorted(exclude_ids)))
+
+        sql = f"SELECT {select} FROM `{self.table_ref}`"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if limit is not None or after_id is not None:
+            sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT @limit"
+            params.append(bigquery.ScalarQueryParameter("limit", "INT64", limit))
+        return sql, params
+
+    def pending_slice(self, filters: Dict[str, List[str]] = None, fields: List[str] = None,
+                      after_id: int = None):
+        """Buffered edits to fold into a pushed-down query.
+
+        Returns (ids, rows): the ids with an edit not yet merged into the table,
+        which the query must leave out, and the edited rows among them that
+        match the filters and cursor, projected and sorted by id.
+        """
+        overlay = self.write_buffer.overlay()
+        filters = filters or {}
+        columns = [c for c in MANPOWER_COLUMNS if c == "id" or c in fields] if fields else None
+        rows = []
+        for record_id in sorted(overlay):
+            record = overlay[record_id]
+            if record is None or (after_id is not None and record_id <= after_id):
+                continue
+            if any(values and record.get(column) not in values for column, values in filters.items()):
+                continue
+            rows.append({c: record.get(c) for c in columns} if columns else dict(record, id=record_id))
+        return list(overlay), rows
+
+    def query_manpower_data(self, filters: Dict[str, List[str]] = None, fields: List[str] = None,
+                            limit: int = None, after_id: int = None) -> List[Dict[str, Any]]:
+        """Fetch a filtered / projected / paginated slice of the table.
+
+        Only the selected columns and rows are scanned and returned. Edits
+        still in the write buffer are applied on top. Raises ValueError for
+        unknown columns; query errors propagate.
+        """
+        if not self.client:
+            logger.warning("BigQuery client not initialized. Returning empty list.")
             return []
 
+        pending_ids, pending_rows = self.pending_slice(filters, fields, after_id)
+        sql, params = self.build_manpower_query(filters, fields, limit, after_id, pending_ids)
+        key = sql + "|" + repr([(p.name, getattr(p, "values", None), getattr(p, "value", None)) for p in params])
+
+        def run():
+            job_config = bigquery.QueryJobConfig(query_parameters=params)
+            results = self.client.query(sql, job_config=job_config).result()
+            data = [dict(row) for row in results]
+            logger.info(f"Fetched {len(data)} filtered records from BigQuery")
+            return data
+
+        data = self._flight.do(key, run)
+        if not pending_rows:
+            return data
+        # Pending rows sort into the (id-ordered) page; whatever falls past
+        # the limit comes back on a later page since the cursor is an id
+        if limit is not None or after_id is not None:
+            return sorted(data + pending_rows, key=lambda row: row["id"])[:limit]
+        return data + pending_rows
+
+    def stream_manpower_pages(self, filters: Dict[str, List[str]] = None, fields: List[str] = None,
+                              limit: int = None, after_id: int = None,
+                              page_size: int = STREAM_PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Run the query and return an iterator over result pages.
+
+        The query job runs (and fails) before this returns, so callers can still
+        report errors properly; rows are then pulled one page at a time as the
+        iterator is consumed, keeping at most one page in memory. Edits still
+        in the write buffer are applied on top.
+        """
+        if not self.client:
+            logger.warning("BigQuery client not initialized. Returning no pages.")
+            return iter(())
+
+        pending_ids, pending_rows = self.pending_slice(filters, fields, after_id)
+        sql, params = self.build_manpower_query(filters, fields, limit, after_id, pending_ids)
+        job_config = bigquery.QueryJobConfig(query_parameters=params)
+        results = self.client.query(sql, job_config=job_config).result(page_size=page_size)
+        ordered = limit is not None or after_id is not None
+
+        def pages():
+            count = 0
+            pending = pending_rows
+            for page in results.pages:
+                rows = [dict(row) for row in page]
+                if ordered and pending and rows:
+                    # Merge in the pending rows that sort before the end of this page
+                    last_id = rows[-1]["id"]
+                    take = sum(1 for row in pending if row["id"] < last_id)
+                    rows = sorted(rows + pending[:take], key=lambda row: row["id"])
+                    pending = pending[take:]
+                if limit is not None:
+                    rows = rows[:limit - count]
+                count += len(rows)
+                yield rows
+                if limit is not None and count >= limit:
+                    break
+            if pending and (limit is None or count < limit):
+                rows = pending if limit is None else pending[:limit - count]
+                count += len(rows)
+                yield rows
+            logger.info(f"Streamed {count} records from BigQuery")
+
+        return pages()
+
     # Note: BigQuery is not optimized for single-record updates/deletes.
-    # DML operations have quotas and latency.
-    # For this implementation, we will log warnings for write operations.
-    
+    # DML operations have quotas and latency, so writes go through the
+    # write buffer and are applied in batches with one MERGE per flush.
+
     def update_record(self, record_id: int, updated_data: Dict[str, Any]) -> bool:
-        # Placeholder for update logic
-        # Implementation depends on table schema and partitioning
-        logger.warning(f"Update requested for id {record_id}. BigQuery updates are expensive and not implemented in this demo.")
-        return False
+        if not self.client:
+            return False
+        self.write_buffer.upsert(record_id, updated_data)
+        return True
 
     def delete_record(self, record_id: int) -> bool:
-         # Placeholder for delete logic
-        logger.warning(f"Delete requested for id {record_id}. BigQuery deletes are expensive and not implemented in this demo.")
-        return False
+        if not self.client:
+            return False
+        self.write_buffer.delete(record_id)
+        return True
 
 # Global instance
 bq_client = BigQueryClient()
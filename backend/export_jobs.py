@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional, Callable, Awaitable, Union, BinaryIO
+
+logger = logging.getLogger(__name__)
+
+# Long exports run as background jobs: the client gets a job id at once and
+# polls for progress, then downloads the finished file. Artifacts are kept
+# on disk for EXPORT_JOB_TTL_SECONDS after they finish. Runners return the
+# artifact as bytes or as an open file, which is copied over in chunks.
+EXPORT_JOB_DIR = os.getenv("EXPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "skills_matrix_export_jobs"))
+EXPORT_JOB_TTL_SECONDS = int(os.getenv("EXPORT_JOB_TTL_SECONDS", "3600"))
+EXPORT_JOB_SWEEP_SECONDS = int(os.getenv("EXPORT_JOB_SWEEP_SECONDS", "60"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ExportJob:
+    def __init__(self, key: str, suffix: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.suffix = suffix
+        self.status = QUEUED
+        # Filled in by the runner (a plain dict, or a proxy a worker writes to)
+        self.progress: Dict[str, Any] = {}
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.expires_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.size: Optional[int] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(EXPORT_JOB_DIR, f"{self.id}{self.suffix}")
+
+    def mark_running(self):
+        self.status = RUNNING
+        self.started_at = time.time()
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return self.expires_at is not None and (now or time.time()) >= self.expires_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        try:
+            progress = dict(self.progress)
+        except Exception:
+            # The worker's progress proxy goes away once the render is done
+            progress = {}
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at,
+            "size": self.size,
+            "error": self.error,
+        }
+
+
+class ExportJobManager:
+    """Runs export jobs as asyncio tasks, deduplicated by content key.
+
+    Submitting a key that already has a queued, running or finished (and not
+    yet expired) job returns that job instead of starting another one.
+    """
+
+    def __init__(self, ttl_seconds: int = EXPORT_JOB_TTL_SECONDS, sweep_seconds: int = EXPORT_JOB_SWEEP_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_seconds = sweep_seconds
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ExportJob] = {}
+        self._by_key: Dict[str, str] = {}  # content key -> job id
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.expired = 0
+
+    def submit(self, key: str, runner: Callable[[ExportJob], Awaitable[Union[bytes, BinaryIO]]], suffix: str = ".pdf"):
+        """Start runner(job) for key unless an equivalent job exists. Returns (job, created)."""
+        self._start_janitor()
+        with self._lock:
+            job_id = self._by_key.get(key)
+            job = self._jobs.get(job_id) if job_id else None
+            if job is not None and job.status != FAILED and not job.expired():
+                return job, False
+            job = ExportJob(key, suffix)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._tasks[job.id] = asyncio.ensure_future(self._run(job, runner))
+        return job, True
+
+    def complete(self, key: str, data: Union[bytes, BinaryIO], suffix: str = ".pdf") -> ExportJob:
+        """Register an already-available artifact (e.g. a render cache hit) as a
+        finished job. If an equivalent job already exists it is returned
+        instead and an open file passed as data is closed."""
+        async def runner(job):
+            return data
+        job, created = self.submit(key, runner, suffix)
+        if not created and hasattr(data, "close"):
+            data.close()
+        return job
+
+    async def _run(self, job: ExportJob, runner):
+        try:
+            # The runner calls job.mark_running() once it actually starts work
+            data = await runner(job)
+            job.size = await asyncio.to_thread(self._write, job, data)
+            # Snapshot the progress so the status survives the worker's proxy
+            job.progress = job.to_dict()["progress"]
+            job.finished_at = time.time()
+            job.expires_at = job.finished_at + self.ttl_seconds
+            job.status = DONE
+        except Exception as e:
+            logger.error(f"Export job {job.id} failed: {e}", exc_info=True)
+            job.error = str(e)
+            job.finished_at = time.time()
+            job.expires_at = job.finished_at + self.ttl_seconds
+            job.status = FAILED
+        finally:
+            self._tasks.pop(job.id, None)
+
+    @staticmethod
+    def _write(job: ExportJob, data: Union[bytes, BinaryIO]) -> int:
+        os.makedirs(EXPORT_JOB_DIR, exist_ok=True)
+        tmp = f"{job.path}.tmp"
+        with open(tmp, "wb") as f:
+            if isinstance(data, bytes):
+                f.write(data)
+            else:
+                with data:
+                    shutil.copyfileobj(data, f, 1024 * 1024)
+            size = f.tell()
+        os.replace(tmp, job.path)
+        return size
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.expired():
+            return None
+        return job
+
+    def sweep(self) -> int:
+        """Forget expired jobs and delete their files."""
+        now = time.time()
+        with self._lock:
+            stale = [job for job in self._jobs.values() if job.expired(now)]
+            for job in stale:
+                del self._jobs[job.id]
+                if self._by_key.get(job.key) == job.id:
+                    del self._by_key[job.key]
+            self.expired += len(stale)
+        for job in stale:
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+        if stale:
+            logger.info(f"Expired {len(stale)} export jobs")
+        return len(stale)
+
+    def _start_janitor(self):
+        if self._janitor is not None:
+            return
+        with self._lock:
+            if self._janitor is None:
+                self._janitor = threading.Thread(target=self._janitor_loop, name="export-job-janitor", daemon=True)
+                self._janitor.start()
+
+    def _janitor_loop(self):
+        while not self._stop.wait(self.sweep_seconds):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Export job sweep failed: {e}")
+
+    def shutdown(self):
+        self._stop.set()
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"jobs": counts, "expired": self.expired, "ttl_seconds": self.ttl_seconds}
+
+
+# Global instance
+export_jobs = ExportJobManager()
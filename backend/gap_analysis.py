@@ -0,0 +1,271 @@
+import csv
+import json
+import logging
+import os
+from typing import List, Dict, Any, Iterator, Tuple, BinaryIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Bulk gap analysis (POST /api/gap-analysis). Employees self-rate the skills
+# of their role; every required skill of the role is compared with the
+# employee's rating (Gap = Required_Proficiency - Current_Proficiency, an
+# unrated skill counting as 0) with integer codes, np.repeat and
+# searchsorted over the whole upload, no per-row Python; the per-employee
+# reports are then streamed out in chunks.
+GAP_MAX_ROWS = int(os.getenv("GAP_MAX_ROWS", "5000000"))
+# Employees per streamed chunk
+GAP_CHUNK_EMPLOYEES = int(os.getenv("GAP_CHUNK_EMPLOYEES", "2000"))
+# Unknown-role employee ids listed in the summary
+GAP_UNKNOWN_SAMPLE = 20
+
+ASSESSMENT_COLUMNS = ("Employee_ID", "UJR_in_UJR_Master", "Skill_Name", "Current_Proficiency")
+OPTIONAL_COLUMNS = ("Employee_Name", "Band")
+REPORT_FORMATS = ("ndjson", "csv")
+
+# Accepted header spellings (compared lower-cased, spaces as underscores)
+_ALIASES = {
+    "employee_id": "Employee_ID",
+    "emp_id": "Employee_ID",
+    "employee_code": "Employee_ID",
+    "employee_name": "Employee_Name",
+    "name": "Employee_Name",
+    "ujr": "UJR_in_UJR_Master",
+    "ujr_in_ujr_master": "UJR_in_UJR_Master",
+    "skill": "Skill_Name",
+    "skill_name": "Skill_Name",
+    "current_proficiency": "Current_Proficiency",
+    "self_rating": "Current_Proficiency",
+    "rating": "Current_Proficiency",
+    "band": "Band",
+}
+
+
+def load_assessments(data: BinaryIO, filename: str) -> pd.DataFrame:
+    """Read a CSV or Parquet self-assessment upload into a clean frame.
+
+    One row per (employee, skill) rating; a row with an empty Skill_Name just
+    places an employee in a role. Ids and names are kept as strings and
+    ratings that aren't whole numbers >= 0 become NaN (not assessed).
+    Raises ValueError if the file can't be read or columns are missing.
+    """
+    try:
+        if filename.lower().endswith((".parquet", ".pq")):
+            df = pq.read_table(data).to_pandas()
+        else:
+            # Every column as text, so ids like "00123" keep their zeros
+            names = next(csv.reader([data.readline().decode("utf-8-sig")]))
+            data.seek(0)
+            options = pa_csv.ConvertOptions(column_types={name: pa.string() for name in names}, strings_can_be_null=True)
+            df = pa_csv.read_csv(data, convert_options=options).to_pandas()
+    except Exception as e:
+        raise ValueError(f"Could not read {filename}: {e}")
+
+    rename = {}
+    for column in df.columns:
+        canonical = _ALIASES.get(str(column).strip().lower().replace(" ", "_"))
+        if canonical and canonical not in rename.values():
+            rename[column] = canonical
+    df = df.rename(columns=rename)
+    missing = [c for c in ASSESSMENT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    if len(df) > GAP_MAX_ROWS:
+        raise ValueError(f"Too many rows ({len(df)}); the limit is {GAP_MAX_ROWS}")
+
+    columns = {}
+    for column in ASSESSMENT_COLUMNS[:3] + tuple(c for c in OPTIONAL_COLUMNS if c in df.columns):
+        values = df[column]
+        columns[column] = values.where(values.notna(), "").astype(str).str.strip()
+    raw = df["Current_Proficiency"]
+    levels = pd.to_numeric(raw, errors="coerce")
+    valid = (levels % 1 == 0) & (levels >= 0)
+    columns["Current_Proficiency"] = levels.where(valid)
+    result = pd.DataFrame(columns)
+    result = result[result["Employee_ID"] != ""]
+    blank = raw.isna()
+    if not pd.api.types.is_numeric_dtype(raw):
+        blank |= raw.astype(str).str.strip() == ""
+    result.attrs["invalid_ratings"] = int((~valid & ~blank).sum())
+    return result
+
+
+def _keys_index(frame: pd.DataFrame, keys: List[str]) -> pd.Index:
+    return pd.MultiIndex.from_frame(frame[keys]) if len(keys) > 1 else pd.Index(frame[keys[0]])
+
+
+def compute_gaps(assessments: pd.DataFrame, requirements: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Join assessments against role requirements.
+
+    requirements comes from SnapshotAnalytics.role_requirements(), per
+    (UJR, Band, Skill) when the upload has a Band column and per (UJR, Skill)
+    otherwise. Returns one row per (employee, required skill), employees in
+    upload order and their largest gaps first, and a summary of the upload.
+    """
+    keys = ["UJR_in_UJR_Master", "Band"] if "Band" in requirements.columns else ["UJR_in_UJR_Master"]
+    # Requirements grouped by role: role r owns rows starts[r]:starts[r] + sizes[r]
+    role_codes, roles = pd.factorize(_keys_index(requirements, keys))
+    order = np.argsort(role_codes, kind="stable")
+    requirements = requirements.take(order).reset_index(drop=True)
+    sizes = np.bincount(role_codes, minlength=len(roles))
+    starts = np.cumsum(sizes) - sizes
+    skills = pd.Index(requirements["Skill_Name"].unique())
+    required_skill = skills.get_indexer(requirements["Skill_Name"])
+    skill_rank = np.argsort(np.argsort(skills.to_numpy(dtype=object)))
+
+    # An employee belongs to the role of their first row
+    employee_codes, _ = pd.factorize(assessments["Employee_ID"])
+    people = assessments.take(np.unique(employee_codes, return_index=True)[1])
+    role = roles.get_indexer(_keys_index(people, keys))
+    person = np.flatnonzero(role >= 0)
+    unknown = people["Employee_ID"].take(np.flatnonzero(role < 0))
+
+    # Expand every known employee into their role's requirement rows
+    counts = sizes[role[person]]
+    employee = np.repeat(person, counts)
+    rows = np.repeat(starts[role[person]], counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # Highest rating per (employee, skill), as sorted int64 keys
+    levels = assessments["Current_Proficiency"].to_numpy(dtype=np.float64)
+    rated_skill = skills.get_indexer(assessments["Skill_Name"])
+    usable = (rated_skill >= 0) & ~np.isnan(levels)
+    rating_keys = employee_codes[usable].astype(np.int64) * len(skills) + rated_skill[usable]
+    order = np.argsort(rating_keys)
+    rating_keys, rating_levels = rating_keys[order], levels[usable][order]
+    first = np.flatnonzero(np.concatenate(([True], rating_keys[1:] != rating_keys[:-1]))) if len(rating_keys) else order
+    rating_keys, rating_levels = rating_keys[first], np.maximum.reduceat(rating_levels, first) if len(first) else rating_levels
+
+    wanted = employee.astype(np.int64) * len(skills) + required_skill[rows]
+    found = np.minimum(np.searchsorted(rating_keys, wanted), max(len(rating_keys) - 1, 0))
+    assessed = rating_keys[found] == wanted if len(rating_keys) else np.zeros(len(wanted), dtype=bool)
+    current = np.where(assessed, rating_levels[found] if len(rating_levels) else 0, 0).astype(np.int64)
+    required = requirements["Required_Proficiency"].to_numpy(dtype=np.int64)[rows]
+    gap = required - current
+
+    # Per employee, largest gap first, then by skill name (one int64 sort key)
+    span = int(gap.max() - gap.min()) + 1 if len(gap) else 1
+    order = np.argsort((employee.astype(np.int64) * span + (gap.max(initial=0) - gap)) * len(skills)
+                       + skill_rank[required_skill[rows]])
+    employee, rows = employee[order], rows[order]
+    gaps = requirements.take(rows).reset_index(drop=True)
+    for column in reversed([c for c in ("Employee_ID", "Employee_Name") if c in people.columns]):
+        gaps.insert(0, column, people[column].take(employee).to_numpy())
+    gaps["Current_Proficiency"] = current[order]
+    gaps["Assessed"] = assessed[order]
+    gaps["Gap"] = gap[order]
+
+    summary = {
+        "employees": int(len(people)),
+        "matched_employees": int(len(person)),
+        "unknown_role_employees": int(len(unknown)),
+        "unknown_role_sample": unknown.head(GAP_UNKNOWN_SAMPLE).tolist(),
+        "required_skills": int(len(gaps)),
+        "assessed": int(assessed.sum()),
+        "gaps": int((gap > 0).sum()),
+        "total_gap": int(np.clip(gap, 0, None).sum()),
+        # Ratings for skills the employee's role doesn't require
+        "extra_ratings": int(len(rating_keys) - assessed.sum()
+                             + ((rated_skill < 0) & ~np.isnan(levels) & (assessments["Skill_Name"] != "").to_numpy()).sum()),
+        "invalid_ratings": int(assessments.attrs.get("invalid_ratings", 0)),
+        "joined_on": keys + ["Skill_Name"],
+    }
+    return gaps, summary
+
+
+def suggested_goal(skill: str, current: int, required: int, assessed: bool) -> str:
+    """Development goal for a skill below its required level."""
+    if assessed:
+        return f"Improve {skill} from Level {current} to Level {required}"
+    return f"Develop {skill} to Level {required}"
+
+
+def _employee_bounds(gaps: pd.DataFrame) -> np.ndarray:
+    """Row offsets where each employee's block starts, plus the end."""
+    ids = gaps["Employee_ID"]
+    starts = np.flatnonzero(ids.ne(ids.shift()).fillna(True).to_numpy(dtype=bool))
+    return np.append(starts, len(ids))
+
+
+def iter_reports(gaps: pd.DataFrame, summary: Dict[str, Any], format: str = "ndjson",
+                 only_gaps: bool = True, chunk_employees: int = GAP_CHUNK_EMPLOYEES) -> Iterator[bytes]:
+    """Stream the reports GAP_CHUNK_EMPLOYEES employees at a time.
+
+    ndjson: a summary line, then one line per employee with their skill gaps
+    and suggested goals. csv: one row per (employee, skill) with its goal,
+    ready to import into the PMS. only_gaps leaves out met skills.
+    """
+    bounds = _employee_bounds(gaps)
+    if format == "csv":
+        columns = [c for c in ("Employee_ID", "Employee_Name", "UJR_in_UJR_Master", "Role_Name", "Band",
+                               "Skill_Name", "Competency_Type", "Required_Proficiency", "Current_Proficiency",
+                               "Gap", "Assessed") if c in gaps.columns] + ["Suggested_Goal"]
+        yield (",".join(columns) + "\n").encode("utf-8")
+    else:
+        yield (json.dumps({"type": "summary", **summary}) + "\n").encode("utf-8")
+
+    for first in range(0, len(bounds) - 1, chunk_employees):
+        start, end = bounds[first], bounds[min(first + chunk_employees, len(bounds) - 1)]
+        chunk = gaps.iloc[start:end]
+        if format == "csv":
+            if only_gaps:
+                chunk = chunk[chunk["Gap"] > 0]
+            goals = [suggested_goal(*row) if gap > 0 else "" for gap, row in zip(
+                chunk["Gap"].tolist(), zip(*(chunk[c].tolist() for c in
+                                             ("Skill_Name", "Current_Proficiency", "Required_Proficiency", "Assessed"))))]
+            table = pa.Table.from_pandas(chunk[columns[:-1]], preserve_index=False).append_column("Suggested_Goal", pa.array(goals, pa.string()))
+            sink = pa.BufferOutputStream()
+            pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=False))
+            yield sink.getvalue().to_pybytes()
+        else:
+            yield _ndjson_chunk(chunk, bounds[first:first + chunk_employees + 1] - start, only_gaps)
+
+
+def _ndjson_chunk(chunk: pd.DataFrame, bounds: np.ndarray, only_gaps: bool) -> bytes:
+    gap = chunk["Gap"].to_numpy()
+    met = np.add.reduceat(gap <= 0, bounds[:-1]).tolist()
+    assessed = np.add.reduceat(chunk["Assessed"].to_numpy(), bounds[:-1]).tolist()
+    total_gap = np.add.reduceat(np.clip(gap, 0, None), bounds[:-1]).tolist()
+    columns = {c: chunk[c].tolist() for c in ("Employee_ID", "Employee_Name", "UJR_in_UJR_Master", "Role_Name",
+                                               "Band", "Skill_Name", "Competency_Type", "Leadership",
+                                               "Required_Proficiency", "Current_Proficiency", "Gap", "Assessed")
+               if c in chunk.columns}
+    skills, required, current, gaps = (columns[c] for c in ("Skill_Name", "Required_Proficiency", "Current_Proficiency", "Gap"))
+    types, leadership, rated = (columns[c] for c in ("Competency_Type", "Leadership", "Assessed"))
+    lines = []
+    for e, (start, end) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist())):
+        count = end - start
+        report = {"type": "employee", "employee_id": columns["Employee_ID"][start]}
+        if "Employee_Name" in columns:
+            report["employee_name"] = columns["Employee_Name"][start]
+        report["ujr"] = columns["UJR_in_UJR_Master"][start]
+        report["role_name"] = columns["Role_Name"][start]
+        if "Band" in columns:
+            report["band"] = columns["Band"][start]
+        report.update({
+            "required_skills": count,
+            "assessed": assessed[e],
+            "met": met[e],
+            "readiness": round(met[e] / count, 4),
+            "total_gap": total_gap[e],
+        })
+        # Rows are sorted by gap, largest first, so gaps lead each block
+        stop = start + (count - met[e]) if only_gaps else end
+        report["skills"] = [{
+            "skill": skills[i],
+            "competency_type": types[i],
+            "leadership": leadership[i],
+            "required": required[i],
+            "current": current[i],
+            "gap": gaps[i],
+            "assessed": rated[i],
+        } for i in range(start, stop)]
+        report["goals"] = [suggested_goal(skills[i], current[i], required[i], rated[i])
+                           for i in range(start, start + count - met[e])]
+        lines.append(json.dumps(report))
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
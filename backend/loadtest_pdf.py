@@ -0,0 +1,71 @@
+"""Load test: /api/manpower latency while PDF exports are running.
+
+Measures GET /api/manpower latency on an idle server, then again while
+EXPORTS concurrent /api/export-pdf requests run. With rendering in the
+process pool the two should be about the same; with rendering on the event
+loop the second set stalls behind every export. Also reports how many
+exports were turned away with 429.
+
+Start the backend first (python main.py), then:
+    python loadtest_pdf.py [BASE_URL] [EXPORTS] [ROWS]
+"""
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+BASE_URL = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8001"
+EXPORTS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+ROWS = int(sys.argv[3]) if len(sys.argv) > 3 else 3000
+PROBES = 40
+
+
+def probe_latencies(count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        requests.get(f"{BASE_URL}/api/manpower", headers={"If-None-Match": "*"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)
+    return latencies
+
+
+def summary(latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"median {statistics.median(ordered):7.1f} ms   p95 {p95:7.1f} ms   max {ordered[-1]:7.1f} ms"
+
+
+def main():
+    data = requests.get(f"{BASE_URL}/api/manpower").json()
+    if not data:
+        print("No data returned by /api/manpower; nothing to export.")
+        return
+    payload = {"data": (data * (ROWS // len(data) + 1))[:ROWS], "filters": {}}
+
+    print(f"Idle:            {summary(probe_latencies(PROBES))}")
+
+    statuses = []
+
+    def export():
+        response = requests.post(f"{BASE_URL}/api/export-pdf", json=payload, timeout=600)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=export) for _ in range(EXPORTS)]
+    for t in threads:
+        t.start()
+    time.sleep(0.5)  # let the exports get going
+    busy = probe_latencies(PROBES)
+    for t in threads:
+        t.join()
+
+    print(f"During exports:  {summary(busy)}")
+    print(f"Exports: {EXPORTS} x {ROWS} rows -> "
+          f"{statuses.count(200)} ok, {statuses.count(429)} rejected (429), "
+          f"{len(statuses) - statuses.count(200) - statuses.count(429)} failed")
+
+
+if __name__ == "__main__":
+    main()
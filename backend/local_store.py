@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+
+from db import MANPOWER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Local (non-BigQuery) storage. Rows live in SQLite in WAL mode so a single
+# edit is an indexed UPDATE instead of rewriting the whole JSON file, and
+# overlapping requests don't clobber each other.
+LOCAL_DB_FILE = os.getenv("LOCAL_DB_FILE", "mock_db.sqlite3")
+# Legacy whole-file store, imported once on first start
+LEGACY_JSON_FILE = os.getenv("LEGACY_JSON_FILE", "mock_db.json")
+
+_COLUMNS_SQL = ", ".join(f'"{c}"' for c in MANPOWER_COLUMNS)
+_PLACEHOLDERS = ", ".join("?" for _ in MANPOWER_COLUMNS)
+_ASSIGNMENTS = ", ".join(f'"{c}" = ?' for c in MANPOWER_COLUMNS)
+
+
+class LocalStore:
+    def __init__(self, path: str = LOCAL_DB_FILE, legacy_json: str = LEGACY_JSON_FILE):
+        self.path = path
+        self.legacy_json = legacy_json
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # One connection per thread; WAL lets readers run alongside the writer
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._initialized:
+            self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn: sqlite3.Connection):
+        with self._init_lock:
+            if self._initialized:
+                return
+            columns = ", ".join(
+                '"id" INTEGER PRIMARY KEY' if c == "id" else f'"{c}" INTEGER' if c == "Proficiency_Level" else f'"{c}" TEXT'
+                for c in MANPOWER_COLUMNS
+            )
+            with conn:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS manpower ({columns})")
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._migrate_legacy_json(conn)
+            self._initialized = True
+
+    def _migrate_legacy_json(self, conn: sqlite3.Connection):
+        """One-time import of the old mock_db.json (the file itself is left untouched)."""
+        done = conn.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+        if done or not os.path.exists(self.legacy_json):
+            return
+        with open(self.legacy_json, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with conn:
+            self._replace_rows(conn, data)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)", (self.legacy_json,))
+        logger.info(f"Migrated {len(data)} records from {self.legacy_json} into {self.path}")
+
+    @staticmethod
+    def _values(record: Dict[str, Any]) -> List[Any]:
+        return [record.get(c) for c in MANPOWER_COLUMNS]
+
+    def all(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(f"SELECT {_COLUMNS_SQL} FROM manpower ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(f"SELECT {_COLUMNS_SQL} FROM manpower WHERE id = ?", (record_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update(self, record_id: int, record: Dict[str, Any]) -> bool:
+        """Replace the row with the given id. Returns False if it doesn't exist."""
+        with self._conn() as conn:
+            cur = conn.execute(f"UPDATE manpower SET {_ASSIGNMENTS} WHERE id = ?", self._values(record) + [record_id])
+        return cur.rowcount > 0
+
+    def delete(self, record_id: int) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute("DELETE FROM manpower WHERE id = ?", (record_id,))
+        return cur.rowcount > 0
+
+    def apply_batch(self, updates: Dict[int, Dict[str, Any]], deletes: List[int]):
+        """Apply many updates and deletes in a single transaction."""
+        with self._conn() as conn:
+            conn.executemany(
+                f"UPDATE manpower SET {_ASSIGNMENTS} WHERE id = ?",
+                [self._values(record) + [record_id] for record_id, record in updates.items()],
+            )
+            conn.executemany("DELETE FROM manpower WHERE id = ?", [(record_id,) for record_id in deletes])
+
+    def replace_all(self, records: List[Dict[str, Any]]):
+        """Swap the whole table in one transaction (bulk loads)."""
+        with self._conn() as conn:
+            self._replace_rows(conn, records)
+
+    def _replace_rows(self, conn: sqlite3.Connection, records: List[Dict[str, Any]]):
+        # Caller owns the transaction; the legacy import runs this during initialization
+        conn.execute("DELETE FROM manpower")
+        conn.executemany(
+            f"INSERT OR REPLACE INTO manpower ({_COLUMNS_SQL}) VALUES ({_PLACEHOLDERS})",
+            [self._values(r) for r in records],
+        )
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM manpower").fetchone()[0]
+
+
+# Global instance
+local_store = LocalStore()
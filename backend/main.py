@@ -1,15 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
+import importlib.machinery
 import json
 import os
-from routers import pdf_export
-from db import bq_client
+import threading
+from routers import pdf_export, skills, analytics, roles, gap_analysis
+from db import bq_client, FILTER_COLUMNS, MANPOWER_COLUMNS, STREAM_PAGE_SIZE
+from models import EmployeeRecord
+from matrix_store import CATEGORICAL_COLUMNS, FACET_COLUMNS
+from snapshot import snapshot_cache, etag_matches, available_encodings, negotiate_encoding
+from local_store import local_store
 
 app = FastAPI()
 
 app.include_router(pdf_export.router, prefix="/api", tags=["export"])
+app.include_router(skills.router, prefix="/api", tags=["skills"])
+app.include_router(analytics.router, prefix="/api", tags=["analytics"])
+app.include_router(roles.router, prefix="/api", tags=["roles"])
+app.include_router(gap_analysis.router, prefix="/api", tags=["gap-analysis"])
+
+# Build the search and role indexes off the request path once a new version
+# loads (edits carry the previous version's indexes over, so this is then a no-op)
+snapshot_cache.add_listener(lambda snapshot: threading.Thread(
+    target=snapshot.build_indexes, name="snapshot-index-build", daemon=True).start())
 
 # Configure CORS
 app.add_middleware(
@@ -18,6 +35,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Snapshot-Version", "X-Next-Cursor", "X-Sync", "Content-Encoding", "X-Gap-Employees", "X-Gap-Unknown-Roles"],
 )
 
 # Pydantic models
@@ -33,51 +51,62 @@ class TokenResponse(BaseModel):
     access_token: str
     token_type: str
 
-class EmployeeRecord(BaseModel):
+class RecordPatch(BaseModel):
+    """Partial update for one row: id plus only the fields that change."""
     id: int
-    Group: str
-    SBU: str
-    BU: str
-    Function: str
-    UJR_in_UJR_Master: str
-    Job_Role_Name_without_concat: str
-    L1_UJR: str
-    Competency_Type: str
-    Skill_Name: str
-    Skill_Definition: str
-    Proficiency_Level: int
-    Band: str
- 
-# Helper to load/save DB
-DB_FILE = "mock_db.json"
-
-def load_db():
-    if not os.path.exists(DB_FILE):
-        return []
-    with open(DB_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_db(data):
-    with open(DB_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    Group: Optional[str] = None
+    SBU: Optional[str] = None
+    BU: Optional[str] = None
+    Function: Optional[str] = None
+    UJR_in_UJR_Master: Optional[str] = None
+    Job_Role_Name_without_concat: Optional[str] = None
+    L1_UJR: Optional[str] = None
+    Competency_Type: Optional[str] = None
+    Skill_Name: Optional[str] = None
+    Skill_Definition: Optional[str] = None
+    Proficiency_Level: Optional[int] = None
+    Band: Optional[str] = None
 
+class BulkEditRequest(BaseModel):
+    updates: List[RecordPatch] = []
+    deletes: List[int] = []
+ 
 @app.get("/")
 def read_root():
     return {"message": "Manpower & Skills Matrix API is running (JSON Mode)"}
 
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
+
+# Upper bound for one page of /api/manpower?limit=
+MAX_PAGE_SIZE = int(os.getenv("MANPOWER_MAX_PAGE_SIZE", "10000"))
+
 @app.get("/api/manpower", response_model=List[EmployeeRecord])
-def get_manpower_data():
+def get_manpower_data(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated list of columns to return"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    stream: bool = Query(False, description="Stream rows as NDJSON (same as Accept: application/x-ndjson)"),
+    format: Optional[str] = Query(None, description="'arrow' for an Arrow IPC stream (same as Accept: application/vnd.apache.arrow.stream), "
+                                                    "'normalized' for lookup tables plus integer row references"),
+    since: Optional[int] = Query(None, description="X-Snapshot-Version the client already has; only rows changed since then are sent"),
+):
+    # Multi-value filters: ?Band=Band 1A&Band=Band 2A&Function=HR
+    filters = {col: request.query_params.getlist(col) for col in FILTER_COLUMNS if request.query_params.getlist(col)}
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    if stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        snapshot = loaded_snapshot()
+        if snapshot is not None:
+            return stream_snapshot_ndjson(snapshot, filters, field_list, limit, cursor)
+        return stream_manpower_ndjson(filters, field_list, limit, cursor)
+    if filters or field_list or limit is not None or cursor is not None:
+        snapshot = loaded_snapshot()
+        if snapshot is not None:
+            return filter_snapshot_slice(snapshot, filters, field_list, limit, cursor)
+        return query_manpower_slice(filters, field_list, limit, cursor)
+
     try:
-        print("Fetching data from BigQuery...", flush=True)
-        data = bq_client.get_manpower_data()
-        
-        if not data:
-             # Just log, but don't fallback. Return empty list if BQ is empty.
-             print("BigQuery returned no data.", flush=True)
-             return []
-
-        print(f"Fetched {len(data)} records from BigQuery.", flush=True)
-        return data
+        snapshot = snapshot_cache.get()
     except Exception as e:
         print(f"ERROR in get_manpower_data: {e}", flush=True)
         import traceback
@@ -85,6 +114,212 @@ def get_manpower_data():
         # Raise 500 explicitly so user knows BQ failed
         raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
 
+    headers = {
+        "ETag": snapshot.etag,
+        "X-Snapshot-Version": str(snapshot.version),
+        # Always revalidate; unchanged data comes back as a body-less 304
+        "Cache-Control": "no-cache",
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if since is not None:
+        delta = snapshot_cache.changes_since(since)
+        if delta is not None:
+            return manpower_delta(since, *delta)
+        # The change log doesn't reach back that far: send everything
+        headers["X-Sync"] = "full"
+    elif etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    if format == "arrow" or ARROW_STREAM_TYPE in request.headers.get("accept", ""):
+        # Columnar clients get the snapshot as-is, no per-row JSON conversion
+        return Response(content=snapshot.arrow_bytes, media_type=ARROW_STREAM_TYPE, headers=headers)
+
+    if not snapshot.num_rows:
+        # Just log, but don't fallback. Return empty list if BQ is empty.
+        print("BigQuery returned no data.", flush=True)
+    # The body is serialized (and compressed) once per snapshot version;
+    # rows were validated against EmployeeRecord when the snapshot loaded.
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), available_encodings())
+    try:
+        body = snapshot.body(encoding, "normalized" if format == "normalized" else "json")
+    except ValidationError as e:
+        print(f"ERROR: snapshot rows don't match EmployeeRecord: {e}", flush=True)
+        raise HTTPException(status_code=500, detail="Stored data failed validation")
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/manpower/facets")
+def get_manpower_facets(
+    request: Request,
+    facets: Optional[str] = Query(None, description="Comma-separated columns to count (default: Group, SBU, BU, Function, Band, L1_UJR, Competency_Type)"),
+):
+    """Distinct values and row counts for each facet, given the current selection.
+
+    The selection uses the same multi-value parameters as /api/manpower
+    (?Band=Band 1A&Band=Band 2A&Function=HR) on any categorical column. Each
+    facet is counted under the selection on the other columns only.
+    """
+    facet_list = [f.strip() for f in facets.split(",") if f.strip()] if facets else list(FACET_COLUMNS)
+    unknown = [f for f in facet_list if f not in CATEGORICAL_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown facets: {', '.join(unknown)}")
+    selection = {col: request.query_params.getlist(col) for col in CATEGORICAL_COLUMNS if request.query_params.getlist(col)}
+    if "Proficiency_Level" in selection:
+        try:
+            selection["Proficiency_Level"] = [int(v) for v in selection["Proficiency_Level"]]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Proficiency_Level must be an integer")
+
+    try:
+        snapshot = snapshot_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+    headers = {"ETag": snapshot.etag, "X-Snapshot-Version": str(snapshot.version), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    store = snapshot.store
+    counts = store.facet_counts(selection, facet_list)
+    content = {
+        "version": snapshot.version,
+        "total": store.count(store.mask(selection)),
+        "facets": {
+            facet: [{"value": value, "count": n} for value, n in sorted(values.items(), key=lambda item: str(item[0]))]
+            for facet, values in counts.items()
+        },
+    }
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
+
+def manpower_delta(since, version, changes):
+    """Rows upserted and ids deleted between two snapshot versions."""
+    upserts = [changes[record_id] for record_id in sorted(changes) if changes[record_id] is not None]
+    deletes = sorted(record_id for record_id, record in changes.items() if record is None)
+    headers = {"X-Snapshot-Version": str(version), "X-Sync": "delta", "Cache-Control": "no-store"}
+    content = {"since": since, "version": version, "upserts": upserts, "deletes": deletes}
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
+
+def loaded_snapshot():
+    """Snapshot to answer a slice or stream from, or None to push it down to BigQuery.
+
+    With BigQuery, only an already-loaded snapshot is used (a cold filtered
+    request is cheaper as a query). Without it there is nothing to push down
+    to, so the snapshot is loaded from the local store.
+    """
+    if bq_client.client is None:
+        try:
+            return snapshot_cache.get()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to load manpower data: {str(e)}")
+    return snapshot_cache.peek()
+
+def snapshot_slice_indices(snapshot, filters, fields, limit, cursor):
+    """Row positions in the snapshot matching the filters, in page order."""
+    if fields:
+        unknown = [f for f in fields if f not in MANPOWER_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    store = snapshot.store
+    indices = store.indices(store.mask(filters))
+    # Same ordering / keyset semantics as the BigQuery path: ORDER BY id, id > cursor
+    if limit is not None or cursor is not None:
+        indices = indices[store.ids[indices].argsort(kind="stable")]
+        if cursor is not None:
+            indices = indices[store.ids[indices] > cursor]
+        if limit is not None:
+            indices = indices[:limit]
+    return indices
+
+def filter_snapshot_slice(snapshot, filters, fields, limit, cursor):
+    """Answer a filtered / projected / paginated request from the cached snapshot's bitmap indexes."""
+    indices = snapshot_slice_indices(snapshot, filters, fields, limit, cursor)
+    data = snapshot.store.rows(indices, fields)
+    headers = {"ETag": snapshot.etag, "X-Snapshot-Version": str(snapshot.version)}
+    if limit is not None and len(data) == limit:
+        headers["X-Next-Cursor"] = str(data[-1]["id"])
+    return JSONResponse(content=jsonable_encoder(data), headers=headers)
+
+def query_manpower_slice(filters, fields, limit, cursor):
+    """Push filters / projection / pagination down to BigQuery."""
+    try:
+        data = bq_client.query_manpower_data(filters=filters, fields=fields, limit=limit, after_id=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"ERROR in query_manpower_slice: {e}", flush=True)
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+
+    headers = {}
+    if limit is not None and len(data) == limit:
+        headers["X-Next-Cursor"] = str(data[-1]["id"])
+    # Projected rows don't match EmployeeRecord, so skip response_model validation
+    return JSONResponse(content=jsonable_encoder(data), headers=headers)
+
+def stream_snapshot_ndjson(snapshot, filters, fields, limit, cursor):
+    """Stream rows as newline-delimited JSON from the snapshot, a page of rows at a time."""
+    indices = snapshot_slice_indices(snapshot, filters, fields, limit, cursor)
+
+    def body():
+        for start in range(0, len(indices), STREAM_PAGE_SIZE):
+            rows = snapshot.store.rows(indices[start:start + STREAM_PAGE_SIZE], fields)
+            yield "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+
+    return StreamingResponse(body(), media_type="application/x-ndjson",
+                             headers={"X-Snapshot-Version": str(snapshot.version)})
+
+def stream_manpower_ndjson(filters, fields, limit, cursor):
+    """Stream rows as newline-delimited JSON straight from BigQuery result pages."""
+    try:
+        pages = bq_client.stream_manpower_pages(filters=filters, fields=fields, limit=limit, after_id=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"ERROR in stream_manpower_ndjson: {e}", flush=True)
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+
+    def body():
+        try:
+            for rows in pages:
+                yield "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+        except Exception as e:
+            # Headers are already sent; all we can do is stop and log
+            print(f"ERROR while streaming manpower data: {e}", flush=True)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.post("/api/admin/refresh-cache")
+def refresh_cache():
+    try:
+        snapshot = snapshot_cache.refresh()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to refresh data from BigQuery: {str(e)}")
+    return {"version": snapshot.version, "records": len(snapshot.records)}
+
+@app.get("/api/admin/cache-stats")
+def cache_stats():
+    stats = snapshot_cache.stats()
+    stats["bigquery_fetch"] = bq_client.fetch_stats()
+    stats["write_buffer"] = bq_client.write_buffer.stats()
+    return stats
+
+@app.post("/api/admin/flush-writes")
+def flush_writes():
+    try:
+        flushed = bq_client.write_buffer.flush()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to flush writes to BigQuery: {str(e)}")
+    return {"flushed": flushed}
+
+@app.on_event("shutdown")
+def flush_pending_writes():
+    # Don't lose buffered edits on a clean shutdown
+    if bq_client.write_buffer.pending_count():
+        try:
+            bq_client.write_buffer.flush()
+        except Exception as e:
+            print(f"ERROR flushing buffered writes on shutdown: {e}", flush=True)
+
 @app.post("/api/login")
 def login(request: LoginRequest):
     print(f"Login attempt: {request.email} / {request.password}") # Debug log
@@ -111,43 +346,120 @@ def verify_otp(request: VerifyOtpRequest):
 
 @app.post("/api/reset-data")
 def reset_data():
-    # Data reset is disabled to preserve manual changes in mock_db.json
+    # Data reset is disabled to preserve manual changes in the local store
     return {"message": "Data reset is disabled to preserve manual changes."}
 
+def require_record(record_id: int):
+    """404 unless the current snapshot has a row with this id."""
+    try:
+        snapshot = snapshot_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+    if not snapshot.find([record_id]):
+        raise HTTPException(status_code=404, detail="Record not found")
+
 @app.put("/api/manpower/{record_id}")
 def update_record(record_id: int, updated_record: EmployeeRecord):
     # Try BigQuery Update (Mock implementation for now)
-    success = bq_client.update_record(record_id, updated_record.dict())
+    # Buffered in BigQuery (applied with the next MERGE flush); the cached
+    # snapshot is updated right away so readers see the edit.
+    record = updated_record.model_dump()
+    if bq_client.client is not None:
+        # The MERGE only touches existing rows, so check the id up front
+        require_record(record_id)
+    success = bq_client.update_record(record_id, record)
     if success:
+         snapshot_cache.apply_changes({record_id: record})
          return updated_record
-    
-    # Fallback to local mock DB for editing
-    print("Updating local mock DB as BigQuery update is not fully implemented.", flush=True)
-    db = load_db()
-    for i, record in enumerate(db):
-        if record["id"] == record_id:
-            db[i] = updated_record.dict()
-            save_db(db)
-            return db[i]
+
+    # Fallback to local store when BigQuery isn't configured
+    print("Updating local store as BigQuery is not configured.", flush=True)
+    if local_store.update(record_id, record):
+        snapshot_cache.apply_changes({record_id: record})
+        return record
     raise HTTPException(status_code=404, detail="Record not found")
 
+@app.patch("/api/manpower")
+def bulk_edit(request: BulkEditRequest):
+    """Apply many partial updates and deletes as one write.
+
+    All rows are validated first; if any fails, nothing is written and the
+    per-row results say why (422). Otherwise the batch is applied in one
+    transaction (local store) or one buffered MERGE (BigQuery), and the
+    cached snapshot moves to a single new version.
+    """
+    results = []
+    seen = set()
+    for record_id in [p.id for p in request.updates] + request.deletes:
+        if record_id in seen:
+            raise HTTPException(status_code=400, detail=f"Record {record_id} appears more than once in the batch")
+        seen.add(record_id)
+
+    try:
+        snapshot = snapshot_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+    current = snapshot.find(list(seen))
+
+    changes = {}
+    for patch in request.updates:
+        existing = current.get(patch.id)
+        if existing is None:
+            results.append({"id": patch.id, "op": "update", "status": "not_found"})
+            continue
+        merged = dict(existing)
+        merged.update(patch.model_dump(exclude_unset=True))
+        try:
+            changes[patch.id] = EmployeeRecord(**merged).model_dump()
+            results.append({"id": patch.id, "op": "update", "status": "ok"})
+        except ValidationError as e:
+            results.append({"id": patch.id, "op": "update", "status": "invalid", "detail": e.errors()})
+    for record_id in request.deletes:
+        if record_id in current:
+            changes[record_id] = None
+            results.append({"id": record_id, "op": "delete", "status": "ok"})
+        else:
+            results.append({"id": record_id, "op": "delete", "status": "not_found"})
+
+    if any(r["status"] != "ok" for r in results):
+        return JSONResponse(status_code=422, content=jsonable_encoder({"version": snapshot.version, "results": results}))
+    if not changes:
+        return {"version": snapshot.version, "results": results}
+
+    if bq_client.client is not None:
+        bq_client.write_buffer.add_many(changes)
+    else:
+        local_store.apply_batch(
+            {k: v for k, v in changes.items() if v is not None},
+            [k for k, v in changes.items() if v is None],
+        )
+    updated = snapshot_cache.apply_changes(changes)
+    return {"version": updated.version if updated else snapshot.version, "results": results}
+
 @app.delete("/api/manpower/{record_id}")
 def delete_record(record_id: int):
     # Try BigQuery Delete
+    if bq_client.client is not None:
+        require_record(record_id)
     success = bq_client.delete_record(record_id)
     if success:
+        snapshot_cache.apply_changes({record_id: None})
         return {"message": "Record deleted from BigQuery"}
 
-    # Fallback to local mock DB
-    print("Deleting from local mock DB as BigQuery delete is not fully implemented.", flush=True)
-    db = load_db()
-    for i, record in enumerate(db):
-        if record["id"] == record_id:
-            del db[i]
-            save_db(db)
-            return {"message": "Record deleted"}
+    # Fallback to local store when BigQuery isn't configured
+    print("Deleting from local store as BigQuery is not configured.", flush=True)
+    if local_store.delete(record_id):
+        snapshot_cache.apply_changes({record_id: None})
+        return {"message": "Record deleted"}
     raise HTTPException(status_code=404, detail="Record not found")
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
+    # PDF render workers are spawned processes, and spawn re-runs the script
+    # that started the parent (as __mp_main__) unless __main__ names a module.
+    # The workers only need routers.pdf_export, so name this one "__main__",
+    # which multiprocessing leaves alone, instead of having every worker set up
+    # the BigQuery client, snapshot cache and listeners again.
+    sys.modules["__main__"].__spec__ = importlib.machinery.ModuleSpec("__main__", None)
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,297 @@
+import numpy as np
+import pyarrow as pa
+from typing import List, Dict, Any, Optional, Iterable
+
+# Every column except id is stored dictionary-encoded: one shared table of
+# distinct values per column plus an int32 code per row.
+CATEGORICAL_COLUMNS = (
+    "Group", "SBU", "BU", "Function", "UJR_in_UJR_Master",
+    "Job_Role_Name_without_concat", "L1_UJR", "Competency_Type",
+    "Skill_Name", "Skill_Definition", "Proficiency_Level", "Band",
+)
+# Low-cardinality columns that also get one bitmap per distinct value, so
+# multi-facet filters are bitmap ORs/ANDs instead of row scans. The rest
+# (roles, skills, definitions) are filtered by comparing codes.
+INDEXED_COLUMNS = (
+    "Group", "SBU", "BU", "Function", "Band", "L1_UJR", "Competency_Type", "Proficiency_Level",
+)
+COLUMN_ORDER = ("id",) + CATEGORICAL_COLUMNS
+# Columns /api/manpower/facets reports counts for by default
+FACET_COLUMNS = ("Group", "SBU", "BU", "Function", "Band", "L1_UJR", "Competency_Type")
+
+
+def _pack(bools: np.ndarray) -> np.ndarray:
+    return np.packbits(bools, bitorder="little")
+
+
+class CategoricalColumn:
+    """A dictionary-encoded column: values[codes[row]] is the row's value."""
+
+    def __init__(self, values: List[Any], codes: np.ndarray):
+        self.values = values
+        self.lookup = {v: i for i, v in enumerate(values)}
+        self.codes = codes
+
+    @classmethod
+    def from_values(cls, column_values: Iterable[Any]) -> "CategoricalColumn":
+        lookup: Dict[Any, int] = {}
+        codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in column_values), dtype=np.int32)
+        return cls(list(lookup), codes)
+
+    @classmethod
+    def from_arrow(cls, array) -> "CategoricalColumn":
+        encoded = array.combine_chunks().dictionary_encode() if isinstance(array, pa.ChunkedArray) else array.dictionary_encode()
+        values = encoded.dictionary.to_pylist()
+        indices = encoded.indices
+        if indices.null_count:
+            # Nulls become their own dictionary entry
+            values.append(None)
+            indices = indices.fill_null(len(values) - 1)
+        return cls(values, indices.to_numpy(zero_copy_only=False).astype(np.int32))
+
+    def codes_for(self, wanted: Iterable[Any]) -> List[int]:
+        return [self.lookup[v] for v in wanted if v in self.lookup]
+
+    def with_codes(self, slots: np.ndarray, new_values: List[Any]) -> "CategoricalColumn":
+        """Copy of the column with the given slots set to new_values (new
+        distinct values are appended to the dictionary), or the column
+        itself if nothing changes."""
+        values, lookup = self.values, self.lookup
+        codes = np.empty(len(slots), dtype=np.int32)
+        for i, value in enumerate(new_values):
+            code = lookup.get(value)
+            if code is None:
+                if values is self.values:
+                    values, lookup = list(values), dict(lookup)
+                code = len(values)
+                values.append(value)
+                lookup[value] = code
+            codes[i] = code
+        if values is self.values and np.array_equal(self.codes[slots], codes):
+            return self
+        column = CategoricalColumn.__new__(CategoricalColumn)
+        column.values, column.lookup = values, lookup
+        column.codes = self.codes.copy()
+        column.codes[slots] = codes
+        return column
+
+
+class MatrixStore:
+    """Compact columnar copy of the skills matrix with bitmap indexes.
+
+    Rows live in slots 0..n-1 (input order). Bitmaps are little-endian packed
+    numpy uint8 arrays with one bit per slot; filters combine them with
+    bitwise AND/OR and only decode the rows that survive.
+    """
+
+    def __init__(self, ids: np.ndarray, columns: Dict[str, CategoricalColumn],
+                 bitmaps: Optional[Dict[str, List[np.ndarray]]] = None):
+        self.ids = ids
+        self.columns = columns
+        self.size = len(ids)
+        if bitmaps is None:
+            bitmaps = {}
+            for name in INDEXED_COLUMNS:
+                if name in columns:
+                    codes = columns[name].codes
+                    bitmaps[name] = [_pack(codes == code) for code in range(len(columns[name].values))]
+        self.bitmaps = bitmaps
+        self._order: Optional[np.ndarray] = None  # slots sorted by id, built on first slots() call
+        self._sorted_ids: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "MatrixStore":
+        ids = np.fromiter((r.get("id", 0) for r in records), dtype=np.int64, count=len(records))
+        columns = {name: CategoricalColumn.from_values(r.get(name) for r in records) for name in CATEGORICAL_COLUMNS}
+        return cls(ids, columns)
+
+    @classmethod
+    def from_table(cls, table: pa.Table) -> "MatrixStore":
+        names = set(table.column_names)
+        ids = table.column("id").to_numpy().astype(np.int64) if "id" in names else np.zeros(table.num_rows, dtype=np.int64)
+        columns = {}
+        for name in CATEGORICAL_COLUMNS:
+            if name in names:
+                columns[name] = CategoricalColumn.from_arrow(table.column(name))
+            else:
+                columns[name] = CategoricalColumn([None], np.zeros(table.num_rows, dtype=np.int32))
+        return cls(ids, columns)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def slots(self, ids: Iterable[int]) -> np.ndarray:
+        """Slots (ascending) holding the given ids; ids not in the store are skipped."""
+        if self._order is None:
+            order = np.argsort(self.ids, kind="stable")
+            self._sorted_ids = self.ids[order]
+            self._order = order
+        sorted_ids = self._sorted_ids
+        wanted = np.unique(np.fromiter(ids, dtype=np.int64))
+        pos = np.searchsorted(sorted_ids, wanted)
+        valid = pos < self.size
+        pos, wanted = pos[valid], wanted[valid]
+        return np.sort(self._order[pos[sorted_ids[pos] == wanted]])
+
+    def with_changes(self, changes: Dict[int, Optional[Dict[str, Any]]]) -> "MatrixStore":
+        """A new store with edits applied (id -> replacement record, None = deleted).
+
+        Slots stay in the same order and deleted rows are dropped, matching
+        snapshot.apply_overlay; ids not in the store are ignored. Updates only
+        touch the changed slots' codes and bits. Deletes shift slots, so the
+        bitmaps are then rebuilt from the codes (numpy only, no row decoding).
+        """
+        slots = self.slots(changes)
+        if not len(slots):
+            return self
+        slot_ids = self.ids[slots].tolist()
+        updated = np.array([s for s, i in zip(slots, slot_ids) if changes[i] is not None], dtype=np.int64)
+        records = [changes[i] for i in slot_ids if changes[i] is not None]
+        deleted = np.array([s for s, i in zip(slots, slot_ids) if changes[i] is None], dtype=np.int64)
+
+        columns = dict(self.columns)
+        bitmaps = {name: list(maps) for name, maps in self.bitmaps.items()}
+        if len(updated):
+            for name in CATEGORICAL_COLUMNS:
+                old = self.columns[name]
+                new = old.with_codes(updated, [r.get(name) for r in records])
+                columns[name] = new
+                if new is old or name not in bitmaps or len(deleted):
+                    continue
+                maps = bitmaps[name]
+                maps.extend(np.zeros((self.size + 7) // 8, dtype=np.uint8) for _ in range(len(new.values) - len(maps)))
+                copied = set()
+                for slot, before, after in zip(updated, old.codes[updated], new.codes[updated]):
+                    if before == after:
+                        continue
+                    for code in (before, after):
+                        if code not in copied:
+                            maps[code] = maps[code].copy()
+                            copied.add(code)
+                    maps[before][slot >> 3] &= np.uint8(~(1 << (slot & 7)) & 0xFF)
+                    maps[after][slot >> 3] |= np.uint8(1 << (slot & 7))
+        if not len(deleted):
+            store = MatrixStore(self.ids, columns, bitmaps)
+            # Same ids in the same slots, so the id lookup carries over
+            store._order, store._sorted_ids = self._order, self._sorted_ids
+            return store
+
+        keep = np.ones(self.size, dtype=bool)
+        keep[deleted] = False
+        for name, col in columns.items():
+            trimmed = CategoricalColumn.__new__(CategoricalColumn)
+            trimmed.values, trimmed.lookup, trimmed.codes = col.values, col.lookup, col.codes[keep]
+            columns[name] = trimmed
+        return MatrixStore(self.ids[keep], columns)
+
+    def diff(self, other: "MatrixStore") -> Dict[int, Optional[Dict[str, Any]]]:
+        """Row changes that turn this store into other, keyed by id (None = deleted).
+
+        Rows are matched by id and compared code by code, with this store's
+        dictionaries mapped onto other's first, so only changed and added
+        rows are decoded.
+        """
+        _, mine, theirs = np.intersect1d(self.ids, other.ids, return_indices=True)
+        changed = np.zeros(len(mine), dtype=bool)
+        for name in CATEGORICAL_COLUMNS:
+            old, new = self.columns[name], other.columns[name]
+            remap = np.fromiter((new.lookup.get(v, -1) for v in old.values), dtype=np.int64, count=len(old.values))
+            changed |= remap[old.codes[mine]] != new.codes[theirs]
+        added = np.ones(other.size, dtype=bool)
+        added[theirs] = False
+        slots = np.sort(np.concatenate([theirs[changed], np.flatnonzero(added)]))
+
+        changes: Dict[int, Optional[Dict[str, Any]]] = {
+            record_id: None for record_id in self.ids[~np.isin(self.ids, other.ids)].tolist()
+        }
+        for row in other.rows(slots):
+            changes[row["id"]] = row
+        return changes
+
+    # --- Bitmaps ---
+
+    def all_mask(self) -> np.ndarray:
+        return _pack(np.ones(self.size, dtype=bool))
+
+    def value_mask(self, column: str, values: Iterable[Any]) -> np.ndarray:
+        """Rows whose column is any of values (OR of the per-value bitmaps)."""
+        col = self.columns[column]
+        codes = col.codes_for(values)
+        if column in self.bitmaps:
+            mask = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+            for code in codes:
+                np.bitwise_or(mask, self.bitmaps[column][code], out=mask)
+            return mask
+        return _pack(np.isin(col.codes, codes))
+
+    def mask(self, filters: Optional[Dict[str, List[Any]]] = None) -> np.ndarray:
+        """AND of the per-column value masks; empty / missing filters match everything."""
+        mask = self.all_mask()
+        for column, values in (filters or {}).items():
+            if values:
+                np.bitwise_and(mask, self.value_mask(column, values), out=mask)
+        return mask
+
+    def indices(self, mask: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(mask, bitorder="little", count=self.size))
+
+    def count(self, mask: np.ndarray) -> int:
+        return int(np.unpackbits(mask, bitorder="little", count=self.size).sum())
+
+    # --- Queries ---
+
+    def value_counts(self, column: str, mask: Optional[np.ndarray] = None) -> Dict[Any, int]:
+        """Distinct values of column (within mask) and how many rows have each."""
+        col = self.columns[column]
+        codes = col.codes if mask is None else col.codes[self.indices(mask)]
+        counts = np.bincount(codes, minlength=len(col.values))
+        return {col.values[code]: int(n) for code, n in enumerate(counts) if n}
+
+    def facet_counts(self, selection: Optional[Dict[str, List[Any]]] = None,
+                     facets: Iterable[str] = FACET_COLUMNS) -> Dict[str, Dict[Any, int]]:
+        """Distinct values and row counts per facet, given the selection.
+
+        Each facet is counted under the selection on all *other* columns, so
+        a dropdown still lists the alternatives to its own choice.
+        """
+        masks = {column: self.value_mask(column, values) for column, values in (selection or {}).items() if values}
+        result = {}
+        for facet in facets:
+            others = [mask for column, mask in masks.items() if column != facet]
+            if not others:
+                result[facet] = self.value_counts(facet)
+                continue
+            mask = others[0].copy()
+            for other in others[1:]:
+                np.bitwise_and(mask, other, out=mask)
+            result[facet] = self.value_counts(facet, mask)
+        return result
+
+    def group_by(self, column: str, indices: Optional[np.ndarray] = None) -> Dict[Any, np.ndarray]:
+        """Split slots (all, or the given ones) by value of column, keeping slot order."""
+        if indices is None:
+            indices = np.arange(self.size)
+        col = self.columns[column]
+        codes = col.codes[indices]
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+        groups = {}
+        for chunk in np.split(order, bounds):
+            if len(chunk):
+                groups[col.values[codes[chunk[0]]]] = indices[chunk]
+        return groups
+
+    def rows(self, indices: np.ndarray, fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Decode the given slots back into row dicts (optionally only some columns)."""
+        names = [c for c in COLUMN_ORDER if fields is None or c == "id" or c in fields]
+        decoded = []
+        for name in names:
+            if name == "id":
+                decoded.append(self.ids[indices].tolist())
+            else:
+                col = self.columns[name]
+                table = np.empty(len(col.values), dtype=object)
+                table[:] = col.values
+                decoded.append(table[col.codes[indices]].tolist())
+        return [dict(zip(names, values)) for values in zip(*decoded)]
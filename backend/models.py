@@ -0,0 +1,62 @@
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Dict, Any
+
+import pyarrow as pa
+
+
+class EmployeeRecord(BaseModel):
+    id: int
+    Group: str
+    SBU: str
+    BU: str
+    Function: str
+    UJR_in_UJR_Master: str
+    Job_Role_Name_without_concat: str
+    L1_UJR: str
+    Competency_Type: str
+    Skill_Name: str
+    Skill_Definition: str
+    Proficiency_Level: int
+    Band: str
+
+
+EMPLOYEE_FIELDS = tuple(EmployeeRecord.model_fields)
+
+# Bands from junior to senior, as the matrix and PDF lay them out
+BAND_ORDER = ("Band 1A", "Band 1B", "Band 2A", "Band 2B", "Band 3", "Band 4", "Band 5")
+# Competency types shown as Leadership; everything else is Functional
+LEADERSHIP_COMPETENCY_TYPES = ("Behavioral", "Raymond Leadership Competency")
+
+# Arrow equivalent of EmployeeRecord, used to check columnar snapshots
+EMPLOYEE_SCHEMA = pa.schema([
+    pa.field(name, pa.int64() if name in ("id", "Proficiency_Level") else pa.string(), nullable=False)
+    for name in EMPLOYEE_FIELDS
+])
+
+_employee_records = TypeAdapter(List[EmployeeRecord])
+
+
+def validate_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Validate row dicts against EmployeeRecord and return them coerced
+    (and trimmed to its fields), exactly as the API would serialize them.
+
+    Raises pydantic.ValidationError on the first bad batch.
+    """
+    return _employee_records.dump_python(_employee_records.validate_python(records))
+
+
+def validate_table(table: pa.Table) -> pa.Table:
+    """Columnar counterpart of validate_records: project and cast the table
+    to EMPLOYEE_SCHEMA. Raises ValueError if a column is missing, has nulls
+    or can't be cast."""
+    missing = [name for name in EMPLOYEE_FIELDS if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    table = table.select(list(EMPLOYEE_FIELDS))
+    nulls = [name for name in EMPLOYEE_FIELDS if table.column(name).null_count]
+    if nulls:
+        raise ValueError(f"Null values in: {', '.join(nulls)}")
+    try:
+        return table.cast(EMPLOYEE_SCHEMA)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise ValueError(str(e))
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import List, Dict, Any, Optional, BinaryIO
+
+logger = logging.getLogger(__name__)
+
+# Rendered PDFs are cached by content: the same rows + filters + layout give
+# the same document, so repeat exports are a byte copy. Bump LAYOUT_VERSION
+# whenever the rendering changes so old entries stop matching.
+LAYOUT_VERSION = "1"
+PDF_CACHE_MEMORY_BYTES = int(os.getenv("PDF_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+PDF_CACHE_DISK_BYTES = int(os.getenv("PDF_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "skills_matrix_pdf_cache"))
+# Renders are written here first and then moved into the cache, so keep it
+# on the same filesystem as PDF_CACHE_DIR
+PDF_SPOOL_DIR = os.getenv("PDF_SPOOL_DIR", os.path.join(PDF_CACHE_DIR, "spool"))
+
+
+def new_spool_path(suffix: str = ".pdf") -> str:
+    """A fresh file path for a render to write into."""
+    os.makedirs(PDF_SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=PDF_SPOOL_DIR)
+    os.close(fd)
+    return path
+
+
+def make_key(data: List[Dict[str, Any]], filters: Dict[str, Any], engine: str = "platypus") -> str:
+    """Content address for a render: hash of the rows (in order), filters and layout.
+
+    The header's "Generated:" time is deliberately not part of the key; a
+    cached copy keeps the time it was actually rendered.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"layout={LAYOUT_VERSION};engine={engine};".encode("utf-8"))
+    digest.update(json.dumps(filters or {}, sort_keys=True, default=str).encode("utf-8"))
+    for row in data:
+        digest.update(json.dumps(row, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class PdfRenderCache:
+    """Two-tier (memory, then disk) size-bounded LRU of rendered PDFs.
+
+    Keys are content addresses (make_key), so an entry stays valid for as
+    long as it is kept; edits just produce new keys and unused entries age
+    out of the LRU. Large documents are handed out as open files (open /
+    put_file) so they never have to be read into memory.
+    """
+
+    def __init__(self, memory_bytes: int = PDF_CACHE_MEMORY_BYTES, disk_bytes: int = PDF_CACHE_DISK_BYTES,
+                 directory: str = PDF_CACHE_DIR):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # key -> size
+        self._disk_used = 0
+        self._index_loaded = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _ensure_index(self):
+        # Scanned on first use rather than at import (render workers import this too)
+        if self._index_loaded:
+            return
+        with self._lock:
+            if not self._index_loaded:
+                self._load_disk_index()
+                self._index_loaded = True
+
+    def _load_disk_index(self):
+        if not self.disk_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pdf"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+        self._evict_disk()
+
+    def open(self, key: str, count: bool = True) -> Optional[BinaryIO]:
+        """The cached document as a readable file, or None.
+
+        Small documents come from (or are promoted to) the memory tier as a
+        BytesIO; larger ones are opened from disk. An open file stays
+        readable even if the entry is evicted meanwhile.
+        """
+        self._ensure_index()
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if count:
+                    self.memory_hits += 1
+                return BytesIO(data)
+            size = self._disk.get(key)
+        if size is not None:
+            try:
+                if size <= self.memory_bytes // 4:
+                    with open(self._path(key), "rb") as f:
+                        data = f.read()
+                    handle = BytesIO(data)
+                else:
+                    data, handle = None, open(self._path(key), "rb")
+            except OSError:
+                handle = None
+            if handle is not None:
+                with self._lock:
+                    if count:
+                        self.disk_hits += 1
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    if data is not None:
+                        self._put_memory(key, data)
+                return handle
+        if count:
+            with self._lock:
+                self.misses += 1
+        return None
+
+    def put_file(self, key: str, path: str):
+        """Move a rendered file (e.g. from new_spool_path) into the disk tier.
+
+        The newest entry is always kept, even past the disk budget, so it
+        can be opened and sent; it is evicted by the next put.
+        """
+        self._ensure_index()
+        size = os.path.getsize(path)
+        os.makedirs(self.directory, exist_ok=True)
+        os.replace(path, self._path(key))
+        with self._lock:
+            previous = self._disk.pop(key, None)
+            if previous is not None:
+                self._disk_used -= previous
+            self._disk[key] = size
+            self._disk_used += size
+            self._evict_disk()
+
+    def _put_memory(self, key: str, data: bytes):
+        # Large documents only go to disk so one export can't flush the memory tier
+        if len(data) > self.memory_bytes // 4 or key in self._memory:
+            return
+        self._memory[key] = data
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def _evict_disk(self):
+        while self._disk_used > self.disk_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+# Global instance
+pdf_cache = PdfRenderCache()
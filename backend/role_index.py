@@ -0,0 +1,172 @@
+import bisect
+import hashlib
+import json
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from matrix_store import MatrixStore
+from models import BAND_ORDER, LEADERSHIP_COMPETENCY_TYPES
+
+# Role profiles (/api/roles). A role is one UJR_in_UJR_Master value; the
+# index keeps the ids of its rows so a profile is a slot lookup plus a few
+# row decodes, and caches each assembled profile with its own ETag until an
+# edit touches that role.
+
+
+def _band_key(band: Any) -> Tuple[int, str]:
+    return (BAND_ORDER.index(band) if band in BAND_ORDER else len(BAND_ORDER), str(band))
+
+
+class RoleIndex:
+    """UJR -> row ids, with per-role profiles assembled on demand and cached.
+
+    Like SkillIndex it is never changed once built: with_changes() derives
+    a new one for the next snapshot that keeps every cached profile except
+    those of the roles an edit touches.
+    """
+
+    def __init__(self, store: MatrixStore):
+        self._lock = threading.Lock()
+        self.store = store
+        self._members: Dict[Any, np.ndarray] = {}  # ujr -> sorted ids
+        self._profiles: Dict[Any, Tuple[str, Dict[str, Any]]] = {}  # ujr -> (etag, profile)
+        for ujr, slots in store.group_by("UJR_in_UJR_Master").items():
+            self._members[ujr] = np.sort(store.ids[slots])
+        self._order: List[Any] = sorted(self._members, key=str)  # for keyset pagination
+        self._keys: List[str] = [str(ujr) for ujr in self._order]
+
+    def with_changes(self, changes: Dict[int, Optional[Dict[str, Any]]], store: MatrixStore) -> "RoleIndex":
+        """A new index with edits applied (id -> record, None = deleted), given
+        the store after them; this one is left as it was."""
+        with self._lock:
+            old = self.store
+            slots = old.slots(changes)
+            ujr_values = old.columns["UJR_in_UJR_Master"].values
+            previous = dict(zip(old.ids[slots].tolist(), (ujr_values[c] for c in old.columns["UJR_in_UJR_Master"].codes[slots])))
+            removed: Dict[Any, List[int]] = {}
+            added: Dict[Any, List[int]] = {}
+            touched = set()
+            for record_id, before in previous.items():
+                record = changes[record_id]
+                after = record.get("UJR_in_UJR_Master") if record is not None else None
+                touched.add(before)
+                if record is None or after != before:
+                    removed.setdefault(before, []).append(record_id)
+                if record is not None:
+                    touched.add(after)
+                    if after != before:
+                        added.setdefault(after, []).append(record_id)
+            index = RoleIndex.__new__(RoleIndex)
+            index._lock = threading.Lock()
+            index.store = store
+            index._members = dict(self._members)
+            index._profiles = dict(self._profiles)
+            index._order = list(self._order)
+            index._keys = list(self._keys)
+        for ujr in touched:
+            ids = index._members.get(ujr, np.empty(0, dtype=np.int64))
+            if ujr in removed:
+                ids = ids[~np.isin(ids, removed[ujr])]
+            if ujr in added:
+                ids = np.union1d(ids, np.asarray(added[ujr], dtype=np.int64))
+            index._profiles.pop(ujr, None)
+            if len(ids):
+                if ujr not in index._members:
+                    i = bisect.bisect_left(index._keys, str(ujr))
+                    index._order.insert(i, ujr)
+                    index._keys.insert(i, str(ujr))
+                index._members[ujr] = ids
+            elif ujr in index._members:
+                del index._members[ujr]
+                i = bisect.bisect_left(index._keys, str(ujr))
+                del index._order[i]
+                del index._keys[i]
+        return index
+
+    def _profile(self, ujr: Any) -> Optional[Tuple[str, Dict[str, Any]]]:
+        # Caller holds self._lock
+        cached = self._profiles.get(ujr)
+        if cached is not None:
+            return cached
+        ids = self._members.get(ujr)
+        if ids is None:
+            return None
+        rows = self.store.rows(self.store.slots(ids))
+        functional, leadership = [], []
+        for row in sorted(rows, key=lambda r: (_band_key(r["Band"]), str(r["Skill_Name"]))):
+            skill = {
+                "id": row["id"],
+                "skill": row["Skill_Name"],
+                "definition": row["Skill_Definition"],
+                "competency_type": row["Competency_Type"],
+                "target_proficiency": row["Proficiency_Level"],
+                "band": row["Band"],
+            }
+            (leadership if row["Competency_Type"] in LEADERSHIP_COMPETENCY_TYPES else functional).append(skill)
+        names = Counter(r["Job_Role_Name_without_concat"] for r in rows)
+        profile = {
+            "ujr": ujr,
+            "role_name": names.most_common(1)[0][0],
+            "role_names": sorted(names, key=str),
+            "bands": sorted({r["Band"] for r in rows}, key=_band_key),
+            "functions": sorted({r["Function"] for r in rows}, key=str),
+            "sbus": sorted({r["SBU"] for r in rows}, key=str),
+            "bus": sorted({r["BU"] for r in rows}, key=str),
+            "groups": sorted({r["Group"] for r in rows}, key=str),
+            "l1_ujr": sorted({r["L1_UJR"] for r in rows}, key=str),
+            "functional": functional,
+            "leadership": leadership,
+        }
+        digest = hashlib.sha1(json.dumps(profile, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        cached = self._profiles[ujr] = (f'"r{digest[:20]}"', profile)
+        return cached
+
+    def get(self, ujr: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(etag, profile) for a role, or None if no rows have that UJR."""
+        with self._lock:
+            return self._profile(ujr)
+
+    def page(self, cursor: Optional[str] = None, limit: int = 50,
+             filters: Optional[Dict[str, List[Any]]] = None) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+        """A page of role summaries in UJR order after cursor.
+
+        Returns (summaries, total roles matching the filters, next cursor or
+        None on the last page). Filters select roles with at least one row
+        matching all of them.
+        """
+        with self._lock:
+            if filters:
+                store = self.store
+                allowed = set(store.value_counts("UJR_in_UJR_Master", store.mask(filters)))
+                total = len(allowed)
+            else:
+                allowed = None
+                total = len(self._order)
+            start = bisect.bisect_right(self._keys, cursor) if cursor is not None else 0
+            summaries = []
+            last = None
+            for ujr in self._order[start:]:
+                if allowed is not None and ujr not in allowed:
+                    continue
+                if len(summaries) == limit:
+                    return summaries, total, last
+                etag, profile = self._profile(ujr)
+                summaries.append({
+                    "ujr": ujr,
+                    "role_name": profile["role_name"],
+                    "bands": profile["bands"],
+                    "functions": profile["functions"],
+                    "sbus": profile["sbus"],
+                    "functional_count": len(profile["functional"]),
+                    "leadership_count": len(profile["leadership"]),
+                    "etag": etag,
+                })
+                last = str(ujr)
+            return summaries, total, None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"roles": len(self._members), "cached_profiles": len(self._profiles)}
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from typing import Optional
+import logging
+from analytics import analytics_cache, GROUP_COLUMNS
+from models import BAND_ORDER
+from snapshot import snapshot_cache, etag_matches
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def analytics_filters(request: Request):
+    # Same multi-value parameters as /api/manpower: ?Function=HR&Function=Sales
+    return {col: request.query_params.getlist(col) for col in GROUP_COLUMNS if request.query_params.getlist(col)}
+
+
+def respond(request: Request, compute):
+    """Run compute(analytics) against the current snapshot, with ETag / 304."""
+    try:
+        snapshot = snapshot_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+    headers = {"ETag": snapshot.etag, "X-Snapshot-Version": str(snapshot.version), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    result = dict(compute(analytics_cache.get(snapshot)), version=snapshot.version)
+    return JSONResponse(content=jsonable_encoder(result), headers=headers)
+
+
+def check_group_column(by: str):
+    if by not in GROUP_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Can't group by {by}; use one of {', '.join(GROUP_COLUMNS)}")
+
+
+@router.get("/analytics/top-skills")
+def top_skills(
+    request: Request,
+    n: int = Query(10, ge=1, le=500),
+    min_band: Optional[str] = Query(None, description="Only this band and above, e.g. 'Band 2A'"),
+    sort: str = Query("frequency", description="'frequency' (distinct roles needing the skill) or 'demand' (share at high proficiency)"),
+):
+    """Most critical skills by frequency across unique roles or by high-proficiency demand."""
+    if sort not in ("frequency", "demand"):
+        raise HTTPException(status_code=400, detail="sort must be 'frequency' or 'demand'")
+    if min_band is not None and min_band not in BAND_ORDER:
+        raise HTTPException(status_code=400, detail=f"Unknown band: {min_band}")
+    filters = analytics_filters(request)
+    return respond(request, lambda a: a.top_skills(n=n, min_band=min_band, sort=sort, filters=filters))
+
+
+@router.get("/analytics/proficiency")
+def proficiency_histogram(
+    request: Request,
+    by: str = Query("Band", description="Comma-separated columns to group by, e.g. 'Band,Function'"),
+):
+    """Proficiency level histogram per band, function, or any combination of the grouping columns."""
+    # Repeated columns (by=Band,Band) group the same as naming them once
+    columns = list(dict.fromkeys(c.strip() for c in by.split(",") if c.strip()))
+    if not columns:
+        raise HTTPException(status_code=400, detail="by must name at least one column")
+    for column in columns:
+        check_group_column(column)
+    filters = analytics_filters(request)
+    return respond(request, lambda a: a.proficiency(columns, filters=filters))
+
+
+@router.get("/analytics/competency-coverage")
+def competency_coverage(request: Request, by: str = Query("Band")):
+    """Share of roles per group that have at least one skill of each competency type."""
+    check_group_column(by)
+    filters = analytics_filters(request)
+    return respond(request, lambda a: a.competency_coverage(by=by, filters=filters))
+
+
+@router.get("/analytics/stats")
+def analytics_stats():
+    return analytics_cache.stats()
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+import logging
+from analytics import analytics_cache
+from gap_analysis import load_assessments, compute_gaps, iter_reports, REPORT_FORMATS
+from snapshot import snapshot_cache
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.post("/gap-analysis")
+def gap_analysis(
+    file: UploadFile = File(..., description="CSV or Parquet with Employee_ID, UJR_in_UJR_Master, Skill_Name, "
+                                             "Current_Proficiency and optionally Employee_Name, Band"),
+    format: str = Query("ndjson", description="'ndjson' (one report per employee) or 'csv' (one row per skill, for the PMS)"),
+    only_gaps: bool = Query(True, description="Leave out skills already at the required level"),
+):
+    """Compare bulk self-assessments with each role's required proficiency and
+    stream per-employee gap reports with suggested development goals."""
+    if format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(REPORT_FORMATS)}")
+    try:
+        assessments = load_assessments(file.file, file.filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        snapshot = snapshot_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+
+    requirements = analytics_cache.get(snapshot).role_requirements(by_band="Band" in assessments.columns)
+    gaps, summary = compute_gaps(assessments, requirements)
+    summary["version"] = snapshot.version
+    logger.info(f"Gap analysis: {summary['employees']} employees, {summary['gaps']} gaps "
+                f"(snapshot v{snapshot.version})")
+
+    headers = {
+        "X-Snapshot-Version": str(snapshot.version),
+        "X-Gap-Employees": str(summary["matched_employees"]),
+        "X-Gap-Unknown-Roles": str(summary["unknown_role_employees"]),
+        "Content-Disposition": f'attachment; filename="gap_report_v{snapshot.version}.{format}"',
+    }
+    return StreamingResponse(iter_reports(gaps, summary, format=format, only_gaps=only_gaps),
+                             media_type=MEDIA_TYPES[format], headers=headers)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -9,14 +9,65 @@ from reportlab.platypus import (
     Spacer, Flowable, KeepTogether, PageBreak
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas as canvas_module
+from reportlab import rl_config
 from io import BytesIO
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Deque
+from xml.sax.saxutils import escape
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, IndirectObject, NameObject, NumberObject
+import asyncio
 import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import zipfile
+import numpy as np
+from matrix_store import MatrixStore, CATEGORICAL_COLUMNS
+from models import BAND_ORDER, LEADERSHIP_COMPETENCY_TYPES
+from pdf_cache import pdf_cache, make_key, new_spool_path
+from export_jobs import export_jobs, DONE
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# --- Render pool ---
+# PDF layout is CPU-bound, so it runs in worker processes instead of on the
+# event loop. At most PDF_WORKERS renders run at once and PDF_MAX_QUEUE more
+# may wait; beyond that requests are turned away with 429 + Retry-After.
+# PDF_WORKERS=0 renders in a thread of this process instead.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_MAX_QUEUE = int(os.getenv("PDF_MAX_QUEUE", "8"))
+PDF_RETRY_AFTER_SECONDS = int(os.getenv("PDF_RETRY_AFTER_SECONDS", "15"))
+# Default rendering engine: "platypus" (flowable table) or "canvas" (direct drawing, faster)
+PDF_ENGINE = os.getenv("PDF_ENGINE", "platypus")
+# Parallel mode: table rows per fragment rendered by one worker, and how
+# many of one export's fragments may be in the pool at once (the rest of
+# the workers stay free for other exports)
+PDF_PARALLEL_CHUNK_ROWS = int(os.getenv("PDF_PARALLEL_CHUNK_ROWS", "1500"))
+PDF_PARALLEL_MAX_FRAGMENTS = int(os.getenv("PDF_PARALLEL_MAX_FRAGMENTS", str(max(PDF_WORKERS // 2, 1))))
+# Batch (ZIP) export: columns it can split by, and slices rendered at once
+# (the batch takes one pool slot, so like parallel mode it leaves workers free)
+BATCH_PARTITIONS = ('BU', 'Function', 'SBU', 'Group')
+PDF_BATCH_CONCURRENCY = int(os.getenv("PDF_BATCH_CONCURRENCY", str(max(PDF_WORKERS // 2, 1))))
+# Output: renders go to files, never whole into this process's memory.
+# Documents over PDF_BATCH_ROWS table rows are laid out in batches (each
+# starting on a new page), each spooled in memory up to PDF_SPOOL_MAX_MEMORY
+# bytes and then appended to the output file.
+# Responses are sent in PDF_STREAM_CHUNK_BYTES chunks.
+PDF_BATCH_ROWS = int(os.getenv("PDF_BATCH_ROWS", "5000"))
+PDF_SPOOL_MAX_MEMORY = int(os.getenv("PDF_SPOOL_MAX_MEMORY", str(8 * 1024 * 1024)))
+PDF_STREAM_CHUNK_BYTES = int(os.getenv("PDF_STREAM_CHUNK_BYTES", str(256 * 1024)))
+
+# Dashboard filter keys that aren't column names
+FILTER_ALIASES = {'Role': 'Job_Role_Name_without_concat'}
+
 # --- Constants & Colors (Matching Frontend Tailwind) ---
 COLOR_BAND_BG = colors.HexColor('#eff6ff')      # bg-blue-50
 COLOR_BAND_TEXT = colors.HexColor('#1e40af')    # text-blue-800
@@ -73,8 +124,50 @@ class ProficiencyDots(Flowable):
         self.canv.restoreState()
 
 
+
+
+class ProgressMarker(Flowable):
+    """Zero-size flowable that reports when the layout reaches it."""
+    def __init__(self, callback, event, value):
+        Flowable.__init__(self)
+        self.callback = callback
+        self.event = event
+        self.value = value
+
+    def wrap(self, availWidth, availHeight):
+        return (0, 0)
+
+    def draw(self):
+        self.callback(self.event, self.value)
+
+
 def get_band_order():
-    return ['Band 1A', 'Band 1B', 'Band 2A', 'Band 2B', 'Band 3', 'Band 4', 'Band 5']
+    return list(BAND_ORDER)
+
+
+def group_by_band(data: List[Dict]):
+    """Split rows into band -> {'functional': [...], 'leadership': [...]}.
+
+    Returns (bands in display order, groups). Uses the bitmap-indexed store.
+    """
+    grouped = {}
+    band_order = get_band_order()
+
+    store = MatrixStore.from_records(data)
+    is_leadership = np.unpackbits(
+        store.value_mask('Competency_Type', LEADERSHIP_COMPETENCY_TYPES), bitorder='little', count=len(store)
+    ).astype(bool)
+
+    for band, indices in store.group_by('Band').items():
+        band = band if band is not None else 'Unassigned'
+        lead = is_leadership[indices]
+        grouped[band] = {
+            'functional': [data[i] for i in indices[~lead]],
+            'leadership': [data[i] for i in indices[lead]],
+        }
+
+    sorted_bands = sorted(grouped.keys(), key=lambda x: band_order.index(x) if x in band_order else 999)
+    return sorted_bands, grouped
 
 
 def create_header_footer(canvas, doc):
@@ -91,17 +184,30 @@ def create_header_footer(canvas, doc):
     canvas.drawString(15*mm, height - 10*mm, "Manpower & Skills Matrix Report")
     
     canvas.setFont('Helvetica', 9)
+    generated_at = getattr(doc, 'generated_at', None) or datetime.now()
     canvas.drawRightString(width - 15*mm, height - 10*mm, 
-                          f"Generated: {datetime.now().strftime('%d %b %Y, %H:%M')}")
+                          f"Generated: {generated_at.strftime('%d %b %Y, %H:%M')}")
     
-    # Footer
-    canvas.setFillColor(colors.black)
-    canvas.setFont('Helvetica', 8)
-    canvas.drawCentredString(width/2, 10*mm, f"Page {doc.page}")
+    # Footer (left off fragments rendered in parallel; merge_pdf_fragments stamps it)
+    if getattr(doc, 'page_numbers', True):
+        draw_page_number(canvas, doc.page)
     
     canvas.restoreState()
 
 
+def draw_page_number(canvas, page):
+    width, height = A4
+    canvas.setFillColor(colors.black)
+    canvas.setFont('Helvetica', 8)
+    canvas.drawCentredString(width/2, 10*mm, f"Page {page}")
+
+
+def plain_text(value: Any) -> str:
+    """A data value escaped for Paragraph, which otherwise reads it as markup
+    (the canvas engine draws text as is, so both print "<b>" and "&" literally)."""
+    return escape(str(value if value is not None else ''))
+
+
 def create_skill_cell_content(skill, is_leadership, width):
     """Create a mini-table for a single skill cell"""
     if not skill:
@@ -112,8 +218,8 @@ def create_skill_cell_content(skill, is_leadership, width):
     style_name = ParagraphStyle('SName', fontName='Helvetica-Bold', fontSize=9, leading=11, spaceAfter=2)
     style_def = ParagraphStyle('SDef', fontName='Helvetica', fontSize=8, textColor=colors.HexColor('#4b5563'), leading=10)
     
-    name = Paragraph(skill.get('Skill_Name', ''), style_name)
-    defn = Paragraph(skill.get('Skill_Definition', ''), style_def)
+    name = Paragraph(plain_text(skill.get('Skill_Name')), style_name)
+    defn = Paragraph(plain_text(skill.get('Skill_Definition')), style_def)
     
     # Optimization: Just stack them vertically
     # [Dots]
@@ -129,8 +235,18 @@ def create_skill_cell_content(skill, is_leadership, width):
     ]
 
 
-def create_skills_matrix_pdf(data: List[Dict], filters: Dict) -> BytesIO:
-    buffer = BytesIO()
+def create_skills_matrix_pdf(data: List[Dict], filters: Dict, generated_at: datetime = None,
+                             progress=None, continued_bands=(), page_numbers: bool = True,
+                             output: BinaryIO = None) -> BinaryIO:
+    """Lay out the band / functional / leadership matrix as a landscape PDF.
+
+    progress, if given, is called as progress(key, value) with 'bands_total',
+    'bands_done' and 'pages' while the document is built. Bands listed in
+    continued_bands carry on from a previous fragment, so they get no band
+    label or separator; page_numbers=False leaves the page footer off.
+    The document is written to output (a new BytesIO if not given).
+    """
+    buffer = output if output is not None else BytesIO()
     
     # Page setup
     doc = SimpleDocTemplate(
@@ -141,6 +257,9 @@ def create_skills_matrix_pdf(data: List[Dict], filters: Dict) -> BytesIO:
         topMargin=20*mm,
         bottomMargin=15*mm
     )
+    # One timestamp for every page header
+    doc.generated_at = generated_at or datetime.now()
+    doc.page_numbers = page_numbers
     
     elements = []
     
@@ -163,7 +282,7 @@ def create_skills_matrix_pdf(data: List[Dict], filters: Dict) -> BytesIO:
         for k, v in filters.items():
             if v:
                 val = ", ".join(v) if isinstance(v, list) else str(v)
-                filter_text.append(f"<b>{k}:</b> {val}")
+                filter_text.append(f"<b>{plain_text(k)}:</b> {plain_text(val)}")
         
         if filter_text:
             elements.append(Paragraph(" | ".join(filter_text), ParagraphStyle('Filters', fontSize=8, textColor=colors.gray)))
@@ -180,22 +299,7 @@ def create_skills_matrix_pdf(data: List[Dict], filters: Dict) -> BytesIO:
     ]
     table_data.append(header_row)
     
-    # Group Data
-    grouped = {}
-    band_order = get_band_order()
-    
-    for item in data:
-        band = item.get('Band', 'Unassigned')
-        if band not in grouped:
-            grouped[band] = {'functional': [], 'leadership': []}
-            
-        ctype = item.get('Competency_Type', '')
-        if ctype == 'Behavioral' or ctype == 'Raymond Leadership Competency':
-            grouped[band]['leadership'].append(item)
-        else:
-            grouped[band]['functional'].append(item)
-
-    sorted_bands = sorted(grouped.keys(), key=lambda x: band_order.index(x) if x in band_order else 999)
+    sorted_bands, grouped = group_by_band(data)
 
     # Styles list for the main table
     # Row 0 is Header -> Red Background
@@ -212,7 +316,10 @@ def create_skills_matrix_pdf(data: List[Dict], filters: Dict) -> BytesIO:
 
     current_row_idx = 1 # Start after header
 
-    for band in sorted_bands:
+    if progress:
+        progress('bands_total', len(sorted_bands))
+
+    for band_idx, band in enumerate(sorted_bands):
         content = grouped[band]
         func_list = content['functional']
         lead_list = content['leadership']
@@ -226,12 +333,15 @@ def create_skills_matrix_pdf(data: List[Dict], filters: Dict) -> BytesIO:
             row_content = []
             
             # Column 1: Band Label
-            if i == 0:
+            if i == 0 and band not in continued_bands:
                 band_cell = [
                     Spacer(1, 10),
-                    Paragraph(band, style_band_title),
+                    Paragraph(plain_text(band), style_band_title),
                     # Removed redundant "BAND" label as requested
                 ]
+                if progress:
+                    # Drawing this band's first row means the previous bands are done
+                    band_cell.append(ProgressMarker(progress, 'bands_done', band_idx))
             else:
                 band_cell = "" 
                 
@@ -274,7 +384,8 @@ def create_skills_matrix_pdf(data: List[Dict], filters: Dict) -> BytesIO:
 
         # Border separator
         start_row = current_row_idx - num_rows
-        table_styles.append(('LINEABOVE', (0, start_row), (-1, start_row), 1.5, colors.HexColor('#1e40af')))
+        if band not in continued_bands:
+            table_styles.append(('LINEABOVE', (0, start_row), (-1, start_row), 1.5, colors.HexColor('#1e40af')))
 
     # Create the Main Table
     main_table = Table(
@@ -286,35 +397,1130 @@ def create_skills_matrix_pdf(data: List[Dict], filters: Dict) -> BytesIO:
     
     elements.append(main_table)
 
+    if progress:
+        doc.setProgressCallBack(lambda typ, value: progress('pages', value) if typ == 'PAGE' else None)
+
     try:
         doc.build(elements, onFirstPage=create_header_footer, onLaterPages=create_header_footer)
     except Exception as e:
         logger.error(f"Error building PDF: {e}")
         doc.build(elements)
+
+    if progress:
+        progress('bands_done', len(sorted_bands))
     
     buffer.seek(0)
     return buffer
 
 
-@router.post("/export-pdf")
-async def export_skills_matrix_pdf(request_data: Dict[str, Any]):
+# --- Direct-canvas engine ---
+# Draws the same grid as create_skills_matrix_pdf straight onto the canvas:
+# row heights are computed up front from cached word widths, pages are cut
+# by hand and the header row is redrawn on each one. Geometry mirrors what
+# platypus produces for the table above (6pt frame padding, 4pt cell
+# padding, Paragraph leading and greedy line breaking).
+
+CELL_PADDING = 4
+EMPTY_CELL_HEIGHT = 12  # Table's height for a "" cell: one line of 10pt * 1.2
+DOT_SIZE, DOT_SPACE = 6, 2
+
+
+class TextMetrics:
+    """Greedy line breaking that matches Paragraph, with cached widths and breaks."""
+
+    def __init__(self, font_name: str, font_size: float):
+        self.font_name = font_name
+        self.font_size = font_size
+        self.space = stringWidth(' ', font_name, font_size)
+        self.shrink = rl_config.spaceShrinkage * self.space
+        self._widths: Dict[str, float] = {}
+        self._lines: Dict[tuple, List[tuple]] = {}
+
+    def width(self, word: str) -> float:
+        w = self._widths.get(word)
+        if w is None:
+            w = self._widths[word] = stringWidth(word, self.font_name, self.font_size)
+        return w
+
+    def wrap(self, text, max_width: float) -> List[tuple]:
+        """Lines of (text, width) for text wrapped at max_width."""
+        key = (text, max_width)
+        lines = self._lines.get(key)
+        if lines is not None:
+            return lines
+        lines = []
+        words, line_width = [], -self.space
+        for word in str(text or '').split():
+            w = self.width(word)
+            # Paragraph lets each space on the line shrink a little
+            if words and line_width + self.space + w > max_width + self.shrink * len(words):
+                lines.append((' '.join(words), line_width))
+                words, line_width = [], -self.space
+            words.append(word)
+            line_width += self.space + w
+        if words:
+            lines.append((' '.join(words), line_width))
+        self._lines[key] = lines
+        return lines
+
+
+class _PageInfo:
+    """Stands in for the doc template in create_header_footer."""
+    def __init__(self, generated_at: datetime):
+        self.generated_at = generated_at
+        self.page = 0
+        self.page_numbers = True
+
+
+def create_skills_matrix_pdf_canvas(data: List[Dict], filters: Dict, generated_at: datetime = None,
+                                    progress=None, continued_bands=(), page_numbers: bool = True,
+                                    output: BinaryIO = None) -> BinaryIO:
+    """Same document as create_skills_matrix_pdf, laid out directly on the canvas."""
+    buffer = output if output is not None else BytesIO()
+    page_width, page_height = landscape(A4)
+    left, top_margin, bottom_margin, frame_padding = 10*mm, 20*mm, 15*mm, 6
+    content_top = page_height - top_margin - frame_padding
+    content_bottom = bottom_margin + frame_padding
+
+    col_widths = [25*mm, 126*mm, 126*mm]
+    col_x = [left, left + col_widths[0], left + col_widths[0] + col_widths[1]]
+    table_width = sum(col_widths)
+    inner = [w - 2 * CELL_PADDING for w in col_widths]
+
+    band_font = TextMetrics('Helvetica-Bold', 14)
+    header_font = TextMetrics('Helvetica-Bold', 9)
+    name_font = TextMetrics('Helvetica-Bold', 9)
+    def_font = TextMetrics('Helvetica', 8)
+    BAND_LEADING, HEADER_LEADING, NAME_LEADING, DEF_LEADING = 12, 12, 11, 10
+
+    def skill_layout(skill):
+        name = name_font.wrap(skill.get('Skill_Name', ''), inner[1])
+        defn = def_font.wrap(skill.get('Skill_Definition', ''), inner[1])
+        # dots, 2pt spacer, name (+2pt spaceAfter), 2pt spacer, definition
+        height = DOT_SIZE + 4 + 2 + len(name) * NAME_LEADING + 2 + 2 + len(defn) * DEF_LEADING
+        return name, defn, height
+
+    sorted_bands, grouped = group_by_band(data)
+    if progress:
+        progress('bands_total', len(sorted_bands))
+
+    # Lay out every row first: (band_idx, band lines, functional, leadership, height)
+    rows = []
+    for band_idx, band in enumerate(sorted_bands):
+        func_list = grouped[band]['functional']
+        lead_list = grouped[band]['leadership']
+        for i in range(max(len(func_list), len(lead_list))):
+            band_lines = band_font.wrap(band, inner[0]) if i == 0 and band not in continued_bands else None
+            func = skill_layout(func_list[i]) if i < len(func_list) else None
+            lead = skill_layout(lead_list[i]) if i < len(lead_list) else None
+            height = max(
+                10 + len(band_lines) * BAND_LEADING if band_lines is not None else EMPTY_CELL_HEIGHT,
+                func[2] if func else EMPTY_CELL_HEIGHT,
+                lead[2] if lead else EMPTY_CELL_HEIGHT,
+            ) + 2 * CELL_PADDING
+            rows.append((band_idx, band_lines,
+                         (func_list[i], func) if func else None,
+                         (lead_list[i], lead) if lead else None, height))
+
+    header_labels = ["BAND", "FUNCTIONAL SKILLS", "LEADERSHIP SKILLS"]
+    header_height = HEADER_LEADING + 2 * CELL_PADDING
+
+    # Filter summary above the table on the first page
+    filter_para = None
+    if any(filters.values()):
+        filter_text = []
+        for k, v in filters.items():
+            if v:
+                val = ", ".join(v) if isinstance(v, list) else str(v)
+                filter_text.append(f"<b>{plain_text(k)}:</b> {plain_text(val)}")
+        if filter_text:
+            filter_para = Paragraph(" | ".join(filter_text), ParagraphStyle('Filters', fontSize=8, textColor=colors.gray))
+
+    c = canvas_module.Canvas(buffer, pagesize=(page_width, page_height))
+    page_info = _PageInfo(generated_at or datetime.now())
+    page_info.page_numbers = page_numbers
+
+    # The dot strip is one of 12 variants; each is drawn once as a form and reused
+    def dots_form(level, is_leadership):
+        return f"dots{level}{'L' if is_leadership else 'F'}"
+
+    radius = DOT_SIZE / 2
+    for is_leadership in (False, True):
+        dot_on = COLOR_LEAD_DOT_ON if is_leadership else COLOR_FUNC_DOT_ON
+        for level in range(6):
+            c.beginForm(dots_form(level, is_leadership))
+            for i in range(1, 6):
+                c.setFillColor(dot_on if i <= level else COLOR_LEAD_DOT_OFF)
+                c.circle((i - 1) * (DOT_SIZE + DOT_SPACE) + radius, 2 + radius, radius, fill=1, stroke=0)
+            c.endForm()
+
+    def draw_dots(x, y, level, is_leadership):
+        try:
+            level = min(max(int(level), 0), 5)
+        except (TypeError, ValueError):
+            level = 0
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(dots_form(level, is_leadership))
+        c.restoreState()
+
+    def draw_skill(x, top, skill, layout, is_leadership):
+        name, defn, _ = layout
+        y = top - (DOT_SIZE + 4)
+        draw_dots(x, y, skill.get('Proficiency_Level', 0), is_leadership)
+        y -= 2
+        c.setFillColor(colors.black)
+        c.setFont(name_font.font_name, name_font.font_size)
+        for n, (line, _w) in enumerate(name):
+            c.drawString(x, y - name_font.font_size - n * NAME_LEADING, line)
+        y -= len(name) * NAME_LEADING + 2 + 2
+        c.setFillColor(colors.HexColor('#4b5563'))
+        c.setFont(def_font.font_name, def_font.font_size)
+        for n, (line, _w) in enumerate(defn):
+            c.drawString(x, y - def_font.font_size - n * DEF_LEADING, line)
+
+    def draw_page(page_rows, table_top):
+        heights = [header_height] + [r[4] for r in page_rows]
+        tops = [table_top]
+        for h in heights:
+            tops.append(tops[-1] - h)
+        table_bottom = tops[-1]
+
+        # Backgrounds
+        c.setFillColor(HEADER_RED)
+        c.rect(left, tops[1], table_width, header_height, stroke=0, fill=1)
+        for n, (_, _, func, lead, height) in enumerate(page_rows, start=1):
+            y = tops[n + 1]
+            if func:
+                c.setFillColor(COLOR_FUNC_BG)
+                c.rect(col_x[1], y, col_widths[1], height, stroke=0, fill=1)
+            if lead:
+                c.setFillColor(COLOR_LEAD_BG)
+                c.rect(col_x[2], y, col_widths[2], height, stroke=0, fill=1)
+            c.setFillColor(COLOR_BAND_BG)
+            c.rect(col_x[0], y, col_widths[0], height, stroke=0, fill=1)
+
+        # Header labels
+        c.setFillColor(colors.white)
+        c.setFont(header_font.font_name, header_font.font_size)
+        for label, x, w in zip(header_labels, col_x, inner):
+            c.drawCentredString(x + CELL_PADDING + w / 2, table_top - CELL_PADDING - header_font.font_size, label)
+
+        # Cells
+        for n, (band_idx, band_lines, func, lead, _) in enumerate(page_rows, start=1):
+            top = tops[n] - CELL_PADDING
+            if band_lines is not None:
+                if progress:
+                    progress('bands_done', band_idx)
+                c.setFillColor(COLOR_BAND_TEXT)
+                c.setFont(band_font.font_name, band_font.font_size)
+                for k, (line, w) in enumerate(band_lines):
+                    c.drawString(col_x[0] + CELL_PADDING + (inner[0] - w) / 2,
+                                 top - 10 - band_font.font_size - k * BAND_LEADING, line)
+            if func:
+                draw_skill(col_x[1] + CELL_PADDING, top, func[0], func[1], False)
+            if lead:
+                draw_skill(col_x[2] + CELL_PADDING, top, lead[0], lead[1], True)
+
+        # Lines: grid, then cell boxes, then band separators (the order platypus uses)
+        c.saveState()
+        c.setLineCap(1)
+        c.setLineJoin(1)
+        c.setLineWidth(0.5)
+        c.setStrokeColor(colors.HexColor('#e5e7eb'))
+        grid = [(left, y, left + table_width, y) for y in tops]
+        grid += [(x, table_top, x, table_bottom) for x in col_x + [left + table_width]]
+        c.lines(grid)
+        for col, color in ((1, COLOR_FUNC_BORDER), (2, COLOR_LEAD_BORDER)):
+            boxes = []
+            x0, x1 = col_x[col], col_x[col] + col_widths[col]
+            for n, row in enumerate(page_rows, start=1):
+                if row[col + 1]:
+                    y0, y1 = tops[n + 1], tops[n]
+                    boxes += [(x0, y1, x1, y1), (x0, y0, x1, y0), (x0, y0, x0, y1), (x1, y0, x1, y1)]
+            if boxes:
+                c.setStrokeColor(color)
+                c.lines(boxes)
+        separators = [(left, tops[n], left + table_width, tops[n])
+                      for n, row in enumerate(page_rows, start=1) if row[1] is not None]
+        if separators:
+            c.setLineWidth(1.5)
+            c.setStrokeColor(colors.HexColor('#1e40af'))
+            c.lines(separators)
+        c.restoreState()
+
+    def start_page():
+        page_info.page += 1
+        create_header_footer(c, page_info)
+
+    # Paginate: as many whole rows as fit under the repeated header
+    start_page()
+    table_top = content_top
+    if filter_para is not None:
+        _, h = filter_para.wrapOn(c, page_width - 2 * left - 2 * frame_padding, content_top - content_bottom)
+        filter_para.drawOn(c, left + frame_padding, content_top - h)
+        table_top -= h + 5
+    start = 0
+    while True:
+        available = table_top - content_bottom - header_height
+        end = start
+        while end < len(rows) and (rows[end][4] <= available or end == start and table_top == content_top):
+            available -= rows[end][4]
+            end += 1
+        if end > start or not rows:
+            draw_page(rows[start:end], table_top)
+        start = end
+        if progress:
+            progress('pages', page_info.page)
+        if start >= len(rows):
+            break
+        c.showPage()
+        start_page()
+        table_top = content_top
+
+    c.showPage()
+    c.save()
+    if progress:
+        progress('bands_done', len(sorted_bands))
+
+    buffer.seek(0)
+    return buffer
+
+
+# Rendering engines, selected per request with "engine"
+PDF_ENGINES = {
+    'platypus': create_skills_matrix_pdf,
+    'canvas': create_skills_matrix_pdf_canvas,
+}
+
+
+def render_pdf_file(data: List[Dict], filters: Dict, path: str, progress_dict=None, engine: str = 'platypus') -> int:
+    """Process-pool entry point: render into the file at path and return its size.
+
+    progress_dict (a plain dict, or a multiprocessing manager dict when the
+    render runs in a worker process) receives the progress counters.
+    Documents over PDF_BATCH_ROWS table rows are built batch by batch (see
+    plan_fragments). Each batch is rendered into a spooled temporary file and
+    appended to the output right away (IncrementalPdfWriter), so neither the
+    flowable list nor the merge ever holds the whole document. Like parallel
+    fragments, every batch starts on a new page, so a band split across
+    batches has a page break there that an unbatched render would not.
+    """
+    progress = progress_dict.__setitem__ if progress_dict is not None else None
+    batches = plan_fragments(data, PDF_BATCH_ROWS) if len(data) > PDF_BATCH_ROWS else []
+    if len(batches) <= 1:
+        with open(path, 'wb') as out:
+            PDF_ENGINES[engine](data, filters, progress=progress, output=out)
+        return os.path.getsize(path)
+
+    if progress:
+        progress('bands_total', len({row.get('Band') for row in data}))
+    generated_at = datetime.now()
+    bands_before, pages_before = set(), 0
+    with open(path, 'wb') as out:
+        writer = IncrementalPdfWriter(out)
+        for i, (rows, continued) in enumerate(batches):
+            # Batch-local band / page counters, shifted to document-wide ones
+            band_offset = len(bands_before) - (1 if continued else 0)
+            page_offset = pages_before
+            counters = {}
+
+            def batch_progress(key, value):
+                counters[key] = value
+                if progress and key == 'bands_done':
+                    progress('bands_done', band_offset + value)
+                elif progress and key == 'pages':
+                    progress('pages', page_offset + value)
+
+            with tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_MEMORY, dir=os.path.dirname(path)) as spool:
+                PDF_ENGINES[engine](rows, filters if i == 0 else {}, generated_at=generated_at,
+                                    progress=batch_progress, continued_bands=continued, page_numbers=False,
+                                    output=spool)
+                spool.seek(0)
+                writer.append(spool)
+            bands_before |= {row.get('Band') for row in rows}
+            pages_before += counters.get('pages', 0)
+        writer.close()
+    return os.path.getsize(path)
+
+
+# --- Parallel rendering ---
+# Bands are independent blocks, so a large export can be cut into fragments
+# (whole bands, packed together, or chunks of a big band), rendered in
+# separate workers and concatenated. Each fragment starts on a new page and
+# the page footers are stamped after the merge so numbering stays global.
+
+def plan_fragments(data: List[Dict], chunk_rows: int = None):
+    """Split rows into fragments of about chunk_rows table rows each.
+
+    Returns a list of (rows, continued_bands) in document order, where
+    continued_bands are the bands the fragment picks up part way through.
+    """
+    chunk_rows = max(chunk_rows or PDF_PARALLEL_CHUNK_ROWS, 1)
+    sorted_bands, grouped = group_by_band(data)
+    fragments = []
+    rows, continued, size = [], [], 0
+    for band in sorted_bands:
+        func_list = grouped[band]['functional']
+        lead_list = grouped[band]['leadership']
+        band_rows = max(len(func_list), len(lead_list))
+        start = 0
+        while start < band_rows:
+            end = min(band_rows, start + chunk_rows - size)
+            rows += func_list[start:end] + lead_list[start:end]
+            if start > 0:
+                continued.append(band)
+            size += end - start
+            start = end
+            if size >= chunk_rows:
+                fragments.append((rows, continued))
+                rows, continued, size = [], [], 0
+    if rows or not fragments:
+        fragments.append((rows, continued))
+    return fragments
+
+
+def render_fragment_file(data: List[Dict], filters: Dict, engine: str, continued_bands: List[str],
+                         generated_at: datetime, path: str) -> int:
+    """Process-pool entry point for one fragment: write it (without page numbers) to path, return its page count."""
+    counters = {}
+    with open(path, 'wb') as out:
+        PDF_ENGINES[engine](data, filters, generated_at=generated_at, progress=counters.__setitem__,
+                            continued_bands=continued_bands, page_numbers=False, output=out)
+    return counters.get('pages', 0)
+
+
+def page_number_stream(page: int) -> bytes:
+    """Content stream drawing the footer of draw_page_number, using font /FPageNo."""
+    text = f"Page {page}"
+    x = A4[0] / 2 - stringWidth(text, 'Helvetica', 8) / 2
+    return f"q 0 g BT /FPageNo 8 Tf {x:.2f} {10*mm:.2f} Td ({text}) Tj ET Q".encode('latin-1')
+
+
+class IncrementalPdfWriter:
+    """Concatenates PDFs into an output file one fragment at a time.
+
+    pypdf's PdfWriter keeps every page of the result in memory until it
+    writes. Here each fragment's pages (and everything they reference) are
+    renumbered and written out as soon as that fragment is appended, so only
+    one fragment is ever loaded; the page tree, catalog and xref table go at
+    the end. Each page is also stamped with its final page number, as one
+    small extra content stream (rather than merging an overlay page).
+    """
+
+    def __init__(self, output: BinaryIO):
+        self.output = output
+        self.offsets: List[int] = []  # byte offset of object n at [n - 1]
+        self.page_refs: List[IndirectObject] = []
+        output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.pages_ref = self._reserve()
+        self.font_ref = self._reserve()
+        self._write(self.font_ref, DictionaryObject({
+            NameObject('/Type'): NameObject('/Font'),
+            NameObject('/Subtype'): NameObject('/Type1'),
+            NameObject('/BaseFont'): NameObject('/Helvetica'),
+            NameObject('/Encoding'): NameObject('/WinAnsiEncoding'),
+        }))
+
+    def _reserve(self) -> IndirectObject:
+        self.offsets.append(0)
+        return IndirectObject(len(self.offsets), 0, None)
+
+    def _write(self, ref: IndirectObject, obj) -> None:
+        self.offsets[ref.idnum - 1] = self.output.tell()
+        self.output.write(f"{ref.idnum} 0 obj\n".encode())
+        obj.write_to_stream(self.output)
+        self.output.write(b"\nendobj\n")
+
+    def append(self, fragment) -> None:
+        """Write all pages of fragment (a path or an open file)."""
+        reader = PdfReader(fragment)
+        renumbered: Dict[tuple, IndirectObject] = {}
+        queue: List[IndirectObject] = []
+
+        def renumber(obj):
+            # In place: the reader (and its object cache) is dropped after this fragment
+            if isinstance(obj, IndirectObject):
+                if obj.pdf is not reader:
+                    return obj
+                key = (obj.idnum, obj.generation)
+                if key not in renumbered:
+                    renumbered[key] = self._reserve()
+                    queue.append(obj)
+                return renumbered[key]
+            if isinstance(obj, DictionaryObject):
+                for name, value in list(obj.items()):
+                    obj[name] = renumber(value)
+            elif isinstance(obj, ArrayObject):
+                for i, value in enumerate(obj):
+                    obj[i] = renumber(value)
+            return obj
+
+        for page in reader.pages:
+            page_ref = renumber(page.indirect_reference)
+            page[NameObject('/Parent')] = self.pages_ref
+            resources = page[NameObject('/Resources')].get_object()
+            if '/Font' not in resources:
+                resources[NameObject('/Font')] = DictionaryObject()
+            resources['/Font'].get_object()[NameObject('/FPageNo')] = self.font_ref
+
+            stamp = DecodedStreamObject()
+            stamp.set_data(page_number_stream(len(self.page_refs) + 1))
+            stamp_ref = self._reserve()
+            self._write(stamp_ref, stamp)
+            contents = page.raw_get('/Contents')  # the reference, not the resolved stream
+            streams = contents.get_object() if isinstance(contents.get_object(), ArrayObject) else [contents]
+            page[NameObject('/Contents')] = ArrayObject(list(streams) + [stamp_ref])
+
+            self._write(page_ref, renumber(page))
+            self.page_refs.append(page_ref)
+            while queue:
+                ref = queue.pop()
+                obj = ref.get_object()
+                if isinstance(obj, DictionaryObject) and obj.get('/Type') == '/Page':
+                    continue  # written by this loop, with its /Parent and number stamp
+                self._write(renumbered[(ref.idnum, ref.generation)], renumber(obj))
+
+    def close(self) -> None:
+        """Write the page tree, catalog, xref table and trailer."""
+        self._write(self.pages_ref, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(self.page_refs),
+            NameObject('/Count'): NumberObject(len(self.page_refs)),
+        }))
+        catalog_ref = self._reserve()
+        self._write(catalog_ref, DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): self.pages_ref,
+        }))
+        xref = self.output.tell()
+        self.output.write(f"xref\n0 {len(self.offsets) + 1}\n0000000000 65535 f \n".encode())
+        self.output.write("".join(f"{offset:010d} 00000 n \n" for offset in self.offsets).encode())
+        self.output.write(f"trailer\n<< /Size {len(self.offsets) + 1} /Root {catalog_ref.idnum} 0 R >>\n"
+                          f"startxref\n{xref}\n%%EOF\n".encode())
+
+
+def merge_pdf_fragments(fragments: List[Any], output) -> None:
+    """Concatenate fragment PDFs (paths or open files) into output (a path or
+    writable file) and stamp each page with its final page number."""
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'wb') as out:
+            return merge_pdf_fragments(fragments, out)
+    writer = IncrementalPdfWriter(output)
+    for fragment in fragments:
+        writer.append(fragment)
+    writer.close()
+
+
+class RenderPoolSaturated(Exception):
+    pass
+
+
+class RenderAdmission:
+    """A slot reserved in the render pool; release() it when the export is done."""
+
+    def __init__(self, pool: "RenderPool"):
+        self._pool = pool
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._pool._release()
+
+    def __del__(self):
+        # Backstop for a holder that never ran (e.g. a response that was never streamed)
+        self.release()
+
+
+class RenderPool:
+    """Bounded process pool with admission control for PDF renders.
+
+    Admission is per export: a render, a parallel export (all its fragments
+    and the merge) or a batch ZIP holds one of workers + max_queue slots
+    while it runs. Exports that wait for a slot are served first come, first
+    served.
+    """
+
+    def __init__(self, workers: int = PDF_WORKERS, max_queue: int = PDF_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._manager = None
+        self._lock = threading.Lock()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.active = 0
+        self.rejected = 0
+        self.completed = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_queue
+
+    def _get_executor(self):
+        if self._executor is None and self.workers > 0:
+            # spawn: don't fork the server process (and its BigQuery threads)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def progress_dict(self):
+        """A dict render workers can write progress into (shared through a manager process)."""
+        if self.workers <= 0:
+            return {}
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            return self._manager.dict()
+
+    async def admit(self, wait: bool = False) -> RenderAdmission:
+        """Reserve a slot for one export.
+
+        When the pool is full this raises RenderPoolSaturated, or with
+        wait=True (background jobs) waits for a slot to be handed over.
+        """
+        with self._lock:
+            if self.active < self.capacity and not self._waiters:
+                self.active += 1
+                return RenderAdmission(self)
+            if not wait:
+                self.rejected += 1
+                raise RenderPoolSaturated()
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled: pass it on
+                self._free_slot()
+            raise
+        return RenderAdmission(self)
+
+    def _release(self):
+        with self._lock:
+            self.completed += 1
+        self._free_slot()
+
+    def _free_slot(self):
+        """Hand a slot to the first live waiter, or return it to the pool."""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if waiter.done():
+                    continue
+                try:
+                    # The count stays reserved; the slot moves to the waiter
+                    waiter.get_loop().call_soon_threadsafe(self._hand_over, waiter)
+                    return
+                except RuntimeError:
+                    # Its event loop has closed
+                    continue
+            self.active -= 1
+
+    def _hand_over(self, waiter: asyncio.Future):
+        if waiter.done():
+            # Cancelled after it was picked
+            self._free_slot()
+        else:
+            waiter.set_result(None)
+
+    async def execute(self, fn, *args):
+        """Run fn(*args) in the pool for an export that already holds a slot."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    async def run(self, fn, *args, wait: bool = False):
+        """Admit one export (see admit) and run fn(*args) in the pool for it."""
+        admission = await self.admit(wait)
+        try:
+            return await self.execute(fn, *args)
+        finally:
+            admission.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "waiting": len(self._waiters),
+                "rejected": self.rejected,
+                "completed": self.completed,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+render_pool = RenderPool()
+
+# Identical exports already rendering: key -> shared task
+_inflight_exports: Dict[str, asyncio.Future] = {}
+
+
+def normalize_filters(filters: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Map dashboard filters onto store columns, dropping empty ones and sorting values."""
+    normalized = {}
+    for key, values in (filters or {}).items():
+        column = FILTER_ALIASES.get(key, key)
+        if column not in CATEGORICAL_COLUMNS:
+            raise ValueError(f"Cannot filter on '{key}'")
+        if not values:
+            continue
+        values = values if isinstance(values, list) else [values]
+        normalized[column] = sorted(set(values), key=str)
+    return normalized
+
+
+def resolve_snapshot(snapshot_version=None):
+    """The snapshot to export from: the pinned version if given, else the current one."""
+    # Imported here so render worker processes (which import this module)
+    # don't initialize the BigQuery client
+    from snapshot import snapshot_cache
+
+    if snapshot_version is None:
+        return snapshot_cache.get()
+    try:
+        snapshot_version = int(snapshot_version)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="snapshot_version must be an integer")
+    snapshot = snapshot_cache.get_version(snapshot_version)
+    if snapshot is None:
+        current = snapshot_cache.get()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Snapshot version {snapshot_version} is no longer available; current version is {current.version}",
+            headers={"X-Snapshot-Version": str(current.version)},
+        )
+    return snapshot
+
+
+def select_rows(snapshot, filters: Dict[str, List[Any]]) -> List[Dict]:
+    store = snapshot.store
+    return store.rows(store.indices(store.mask(filters)))
+
+
+def partition_rows(snapshot, filters: Dict[str, List[Any]], column: str) -> List[tuple]:
+    """Filtered rows split by value of column: [(value, rows)] sorted by value."""
+    store = snapshot.store
+    groups = store.group_by(column, store.indices(store.mask(filters)))
+    return sorted(
+        ((value if value is not None else 'Unassigned', store.rows(indices)) for value, indices in groups.items()),
+        key=lambda item: str(item[0]),
+    )
+
+
+def remove_files(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+async def render_parallel(data: List[Dict], filters: Dict, engine: str, path: str, progress: Dict = None,
+                          wait: bool = False, admitted: bool = False):
+    """Render fragments concurrently in the pool, then merge them into path (also in the pool).
+
+    The export takes one pool slot however many fragments it has (none if
+    the caller already holds one: admitted=True), and keeps at most
+    PDF_PARALLEL_MAX_FRAGMENTS of them in the pool at a time.
+    """
+    admission = None if admitted else await render_pool.admit(wait)
+    try:
+        fragments = await asyncio.to_thread(plan_fragments, data)
+        generated_at = datetime.now()
+        if progress is not None:
+            progress.update(fragments_total=len(fragments), fragments_done=0, pages=0)
+        paths = [await asyncio.to_thread(new_spool_path) for _ in fragments]
+        in_flight = asyncio.Semaphore(max(PDF_PARALLEL_MAX_FRAGMENTS, 1))
+
+        async def render(i, rows, continued):
+            async with in_flight:
+                pages = await render_pool.execute(
+                    render_fragment_file, rows, filters if i == 0 else {}, engine, continued, generated_at, paths[i]
+                )
+            if progress is not None:
+                progress['fragments_done'] += 1
+                progress['pages'] += pages
+
+        try:
+            await asyncio.gather(*(render(i, rows, continued) for i, (rows, continued) in enumerate(fragments)))
+            await render_pool.execute(merge_pdf_fragments, paths, path)
+        finally:
+            await asyncio.to_thread(remove_files, paths)
+    finally:
+        if admission is not None:
+            admission.release()
+
+
+async def render_export(data: List[Dict], filters: Dict, engine: str, parallel: bool = False,
+                        progress: Dict = None, wait: bool = False, admitted: bool = False) -> str:
+    """Render into a new spool file and return its path.
+
+    admitted=True: the caller holds a pool slot that covers this render.
+    """
+    path = await asyncio.to_thread(new_spool_path)
+    try:
+        if parallel:
+            await render_parallel(data, filters, engine, path, progress, wait, admitted)
+        elif admitted:
+            await render_pool.execute(render_pdf_file, data, filters, path, progress, engine)
+        else:
+            await render_pool.run(render_pdf_file, data, filters, path, progress, engine, wait=wait)
+    except BaseException:
+        await asyncio.to_thread(remove_files, [path])
+        raise
+    return path
+
+
+async def render_cached(key: str, render) -> BinaryIO:
+    """Render once per content key and return the document as an open file.
+
+    Repeat exports are served from the render cache; concurrent identical
+    exports share one in-flight render. render is called (no arguments) to
+    start a render when neither applies and returns the path it wrote.
+    """
+    cached = await asyncio.to_thread(pdf_cache.open, key)
+    if cached is not None:
+        return cached
+
+    task = _inflight_exports.get(key)
+    if task is None:
+        async def run():
+            path = await render()
+            await asyncio.to_thread(pdf_cache.put_file, key, path)
+
+        task = asyncio.ensure_future(run())
+        task.waiters = 0
+        _inflight_exports[key] = task
+        task.add_done_callback(lambda _: _inflight_exports.pop(key, None))
+    # shield: one client disconnecting mustn't cancel the others' render,
+    # but once nobody is waiting for it the render is stopped
+    task.waiters += 1
+    try:
+        await asyncio.shield(task)
+    finally:
+        task.waiters -= 1
+        if task.waiters == 0 and not task.done():
+            task.cancel()
+    # Each caller gets its own handle on the cached file
+    handle = await asyncio.to_thread(pdf_cache.open, key, False)
+    if handle is None:
+        raise RuntimeError("Rendered PDF was evicted from the cache before it could be sent")
+    return handle
+
+
+async def iter_file(handle: BinaryIO, chunk_size: int = None):
+    """Yield an open file in chunks, closing it at the end."""
+    chunk_size = chunk_size or PDF_STREAM_CHUNK_BYTES
+    in_memory = isinstance(handle, BytesIO)
     try:
+        while True:
+            chunk = handle.read(chunk_size) if in_memory else await asyncio.to_thread(handle.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        handle.close()
+
+
+def file_size(handle: BinaryIO) -> int:
+    position = handle.tell()
+    size = handle.seek(0, os.SEEK_END)
+    handle.seek(position)
+    return size
+
+
+def export_engine(request_data: Dict[str, Any]):
+    """(engine, parallel) requested, and the label that goes into the render cache key."""
+    engine = request_data.get('engine') or PDF_ENGINE
+    if engine not in PDF_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown engine '{engine}'; expected one of {sorted(PDF_ENGINES)}")
+    parallel = bool(request_data.get('parallel', False))
+    # Parallel output differs (fragments start on new pages), so it's cached separately
+    return engine, parallel, f"{engine}:parallel" if parallel else engine
+
+
+async def export_rows(request_data: Dict[str, Any]):
+    """The rows and filters an export request asks for."""
+    filters = request_data.get('filters', {}) or {}
+    if 'data' in request_data:
         data = request_data.get('data', [])
-        filters = request_data.get('filters', {})
-        
         if not data:
             raise HTTPException(status_code=400, detail="No data provided")
-        
-        pdf_buffer = create_skills_matrix_pdf(data, filters)
+        return data, filters
+    try:
+        normalized = normalize_filters(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    snapshot = await asyncio.to_thread(resolve_snapshot, request_data.get('snapshot_version'))
+    data = await asyncio.to_thread(select_rows, snapshot, normalized)
+    if not data:
+        raise HTTPException(status_code=400, detail="No rows match the given filters")
+    return data, filters
+
+
+@router.on_event("shutdown")
+def shutdown_render_pool():
+    export_jobs.shutdown()
+    render_pool.shutdown()
+
+
+@router.get("/export-pdf/stats")
+def export_pdf_stats():
+    stats = render_pool.stats()
+    stats["cache"] = pdf_cache.stats()
+    stats["jobs"] = export_jobs.stats()
+    return stats
+
+
+@router.post("/export-pdf")
+async def export_skills_matrix_pdf(request_data: Dict[str, Any]):
+    """Export the skills matrix as PDF.
+
+    Either send the rows ({"data": [...], "filters": {...}}), or send only
+    the filters ({"filters": {...}, "snapshot_version": 123}) and let the
+    server select the rows from its cached snapshot. "engine" is "platypus"
+    or "canvas" (the faster direct-canvas renderer); the default is
+    PDF_ENGINE, platypus unless configured. "parallel": true renders bands
+    in several workers and merges the pages.
+    """
+    try:
+        try:
+            engine, parallel, label = export_engine(request_data)
+            data, filters = await export_rows(request_data)
+            key = await asyncio.to_thread(make_key, data, filters, label)
+            pdf_file = await render_cached(key, lambda: render_export(data, filters, engine, parallel))
+        except RenderPoolSaturated:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many PDF exports in progress. Please try again shortly.",
+                headers={"Retry-After": str(PDF_RETRY_AFTER_SECONDS)},
+            )
         filename = f"skills_matrix_full_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
         return StreamingResponse(
-            pdf_buffer,
+            iter_file(pdf_file),
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}"
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Length": str(file_size(pdf_file)),
             }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"PDF generation failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
+
+
+# --- Background export jobs ---
+
+def job_status(job) -> Dict[str, Any]:
+    status = job.to_dict()
+    status["status_url"] = f"/api/export-jobs/{job.id}"
+    if job.status == DONE:
+        status["download_url"] = f"/api/export-jobs/{job.id}/download"
+    return status
+
+
+@router.post("/export-jobs", status_code=202)
+async def create_export_job(request_data: Dict[str, Any]):
+    """Start a PDF export in the background and return its job id at once.
+
+    Takes the same body as POST /export-pdf. Poll GET /export-jobs/{id} for
+    progress; once done it includes a download_url. Submitting an export
+    identical to a queued, running or unexpired finished job returns that job.
+    """
+    engine, parallel, label = export_engine(request_data)
+    data, filters = await export_rows(request_data)
+    key = await asyncio.to_thread(make_key, data, filters, label)
+
+    cached = await asyncio.to_thread(pdf_cache.open, key)
+    if cached is not None:
+        return job_status(export_jobs.complete(key, cached))
+
+    async def runner(job):
+        # Parallel renders are tracked here as fragments finish; single renders report from the worker
+        job.progress = {} if parallel else render_pool.progress_dict()
+        job.mark_running()
+        path = await render_export(data, filters, engine, parallel, job.progress, wait=True)
+        await asyncio.to_thread(pdf_cache.put_file, key, path)
+        handle = await asyncio.to_thread(pdf_cache.open, key, False)
+        if handle is None:
+            raise RuntimeError("Rendered PDF was evicted from the cache before it could be saved")
+        return handle
+
+    job, _ = export_jobs.submit(key, runner)
+    return job_status(job)
+
+
+@router.get("/export-jobs/{job_id}")
+def get_export_job(job_id: str):
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found or expired")
+    return job_status(job)
+
+
+@router.get("/export-jobs/{job_id}/download")
+def download_export_job(job_id: str):
+    job = export_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found or expired")
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+    filename = f"skills_matrix_full_{datetime.fromtimestamp(job.finished_at).strftime('%Y%m%d_%H%M%S')}.pdf"
+    return FileResponse(job.path, media_type="application/pdf", filename=filename)
+
+
+# --- Batch export (one PDF per slice, as a ZIP) ---
+
+class ZipChunkSink:
+    """Write-only, non-seekable file for ZipFile: collects bytes until drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def slice_filename(partition: str, value: Any) -> str:
+    safe = re.sub(r'[^A-Za-z0-9._-]+', '_', str(value)).strip('_') or 'blank'
+    return f"skills_matrix_{partition}_{safe}.pdf"
+
+
+async def stream_batch_zip(slices: List[tuple], partition: str, filters: Dict, engine: str, label: str,
+                           admission: RenderAdmission):
+    """Render slices a few at a time and yield the ZIP as each one finishes.
+
+    The whole batch runs on admission (one pool slot, released when the
+    stream ends or the client goes away) with at most PDF_BATCH_CONCURRENCY
+    slices rendering at once; finished slices are copied from the render
+    cache into the archive chunk by chunk.
+    """
+    sink = ZipChunkSink()
+    archive = zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED)
+    remaining = iter(slices)
+    pending = set()
+
+    async def render(value, rows):
+        slice_filters = {**filters, partition: [value]}
+        key = await asyncio.to_thread(make_key, rows, slice_filters, label)
+        pdf_file = await render_cached(key, lambda: render_export(rows, slice_filters, engine, admitted=True))
+        return value, pdf_file
+
+    def start_next():
+        for value, rows in remaining:
+            task = asyncio.ensure_future(render(value, rows))
+            task.slice_value = value
+            pending.add(task)
+            return
+
+    try:
+        for _ in range(max(PDF_BATCH_CONCURRENCY, 1)):
+            start_next()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                start_next()
+                try:
+                    value, pdf_file = task.result()
+                except Exception as e:
+                    # The response is already streaming; record the failure in the archive
+                    logger.error(f"Batch export slice {task.slice_value} failed: {e}", exc_info=True)
+                    archive.writestr(slice_filename(partition, task.slice_value) + ".error.txt", str(e))
+                    yield sink.drain()
+                    continue
+                # Copy the slice into the archive a chunk at a time
+                try:
+                    with archive.open(slice_filename(partition, value), mode='w') as entry:
+                        while True:
+                            chunk = await asyncio.to_thread(pdf_file.read, PDF_STREAM_CHUNK_BYTES)
+                            if not chunk:
+                                break
+                            entry.write(chunk)
+                            yield sink.drain()
+                finally:
+                    pdf_file.close()
+                yield sink.drain()
+        archive.close()
+        yield sink.drain()
+    finally:
+        # Client gone (or a failure): stop the renders still running and
+        # close the handles of any that finished but weren't copied yet
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            try:
+                _, pdf_file = await task
+            except BaseException:
+                continue
+            pdf_file.close()
+        admission.release()
+
+
+@router.post("/export-pdf/batch")
+async def export_batch_zip(request_data: Dict[str, Any]):
+    """One PDF per BU / Function / SBU / Group, streamed back as a ZIP.
+
+    Body: {"partition": "BU", "filters": {...}, "snapshot_version": 123,
+    "engine": "canvas"}. Rows come from the server's snapshot; slices go
+    through the render cache, so unchanged slices aren't rendered again.
+    """
+    partition = request_data.get('partition')
+    if partition not in BATCH_PARTITIONS:
+        raise HTTPException(status_code=400, detail=f"partition must be one of {list(BATCH_PARTITIONS)}")
+    engine, _, label = export_engine(request_data)
+    filters = request_data.get('filters', {}) or {}
+    try:
+        normalized = normalize_filters(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    snapshot = await asyncio.to_thread(resolve_snapshot, request_data.get('snapshot_version'))
+    slices = await asyncio.to_thread(partition_rows, snapshot, normalized, partition)
+    if not slices:
+        raise HTTPException(status_code=400, detail="No rows match the given filters")
+    try:
+        # Reserved now so an over-full pool is a 429, not a broken stream
+        admission = await render_pool.admit()
+    except RenderPoolSaturated:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many PDF exports in progress. Please try again shortly.",
+            headers={"Retry-After": str(PDF_RETRY_AFTER_SECONDS)},
+        )
+
+    filename = f"skills_matrix_by_{partition}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_batch_zip(slices, partition, filters, engine, label, admission),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Snapshot-Version": str(snapshot.version),
+        },
+    )
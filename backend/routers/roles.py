@@ -0,0 +1,67 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from typing import Optional
+import logging
+import os
+from urllib.parse import quote
+from matrix_store import FACET_COLUMNS
+from snapshot import snapshot_cache, etag_matches
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Upper bound for one page of /api/roles?limit=
+ROLES_MAX_PAGE_SIZE = int(os.getenv("ROLES_MAX_PAGE_SIZE", "500"))
+
+
+def current_snapshot():
+    try:
+        return snapshot_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+
+
+@router.get("/roles")
+def list_roles(
+    request: Request,
+    limit: int = Query(50, ge=1, le=ROLES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+):
+    """Role summaries in UJR order, one page at a time.
+
+    Filter with the same multi-value parameters as /api/manpower
+    (?Band=Band 2A&Function=HR); a role is listed if any of its rows match.
+    """
+    filters = {col: request.query_params.getlist(col) for col in FACET_COLUMNS if request.query_params.getlist(col)}
+    snapshot = current_snapshot()
+    headers = {"ETag": snapshot.etag, "X-Snapshot-Version": str(snapshot.version), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    summaries, total, next_cursor = snapshot.role_index.page(cursor=cursor, limit=limit, filters=filters)
+    for summary in summaries:
+        summary["url"] = f"/api/roles/{quote(str(summary['ujr']), safe='')}"
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    content = {"version": snapshot.version, "total": total, "roles": summaries, "next_cursor": next_cursor}
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
+
+
+@router.get("/roles/{ujr:path}")
+def get_role(ujr: str, request: Request):
+    """One role's profile: functional and leadership skills with target proficiency.
+
+    The ETag belongs to the role, so it only changes when one of the role's
+    own rows is edited.
+    """
+    snapshot = current_snapshot()
+    found = snapshot.role_index.get(ujr)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"Role {ujr} not found")
+    etag, profile = found
+    headers = {"ETag": etag, "X-Snapshot-Version": str(snapshot.version), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(profile), headers=headers)
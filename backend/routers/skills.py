@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from typing import List, Optional
+import logging
+import os
+from snapshot import snapshot_cache, etag_matches
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Upper bound for ?limit= on skill search
+SKILL_SEARCH_MAX_LIMIT = int(os.getenv("SKILL_SEARCH_MAX_LIMIT", "100"))
+
+
+@router.get("/skills/search")
+def search_skills(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Words to match in skill names, definitions and role names"),
+    Band: Optional[List[str]] = Query(None),
+    Function: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=SKILL_SEARCH_MAX_LIMIT),
+    max_roles: int = Query(10, ge=0, le=1000, description="Roles listed per skill (role_count has the total)"),
+    prefix: bool = Query(True, description="Treat the last word as a prefix (typeahead)"),
+):
+    """Find skills (and the roles, bands and functions using them) matching a phrase."""
+    try:
+        snapshot = snapshot_cache.get()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch data from BigQuery: {str(e)}")
+    headers = {"ETag": snapshot.etag, "X-Snapshot-Version": str(snapshot.version), "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    result = snapshot.skill_index.search(q, bands=Band, functions=Function, limit=limit, prefix=prefix, max_roles=max_roles)
+    result.update({"query": q, "version": snapshot.version})
+    return JSONResponse(content=jsonable_encoder(result), headers=headers)
@@ -0,0 +1,295 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+from matrix_store import MatrixStore
+
+# Skill catalogue search. Each distinct Skill_Name is one document; its terms
+# come from the name itself, every definition it appears with and every role
+# that uses it. Postings and aggregates are keyed by the matrix store's
+# dictionary codes, which stay stable across MatrixStore.with_changes, so
+# edits only touch the skills they affect.
+NAME, DEFINITION, ROLE = 1, 2, 4
+FIELD_WEIGHTS = {NAME: 3.0, ROLE: 2.0, DEFINITION: 1.0}
+# A prefix match (typeahead on the last word) scores less than a whole word
+PREFIX_FACTOR = 0.8
+STOPWORDS = frozenset({"a", "an", "and", "as", "at", "by", "for", "in", "of", "on", "or", "the", "to", "with"})
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Any) -> List[str]:
+    if text is None:
+        return []
+    return [t for t in _TOKEN.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+# Score of a term match by the fields it occurs in (index = field bits)
+_FIELD_SCORES = [max([w for f, w in FIELD_WEIGHTS.items() if bits & f] or [0.0]) for bits in range(8)]
+
+
+class SkillIndex:
+    """Inverted index over Skill_Name, Skill_Definition and
+    Job_Role_Name_without_concat, with per-skill role / band / function
+    aggregates for filtering and result details.
+
+    The index is never changed once built: with_changes() derives a new one
+    for the next snapshot, copying only the containers an edit touches, so
+    readers still on the previous snapshot keep a consistent index.
+    """
+
+    def __init__(self, store: MatrixStore):
+        self._lock = threading.Lock()
+        self.store = store
+        self._tokens: Dict[Tuple[str, int], List[str]] = {}  # (column, code) -> terms
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> skill code -> field bits
+        self._terms: List[str] = []  # sorted, for prefix lookups
+        self._skill_terms: Dict[int, Dict[str, int]] = {}
+        self._names: Dict[int, str] = {}  # skill -> its name's terms, space-joined
+        self._defs: Dict[int, Counter] = {}  # skill -> definition code -> rows
+        self._usage: Dict[int, Dict[Tuple[int, int], Counter]] = {}  # skill -> (band, function) -> role -> rows
+        self._scope: Dict[Tuple[int, int], Counter] = {}  # (band, function) -> skill -> rows
+        self._summaries: Dict[int, Dict[str, Any]] = {}  # unfiltered result details, per skill
+        # Nested containers this index may change (by id); None = all of them.
+        # Indexes from with_changes() share the rest with the one they came from.
+        self._owned: Optional[set] = None
+        self._build()
+
+    # --- Building and maintenance ---
+
+    def _codes(self, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        columns = ("Skill_Name", "Skill_Definition", "Job_Role_Name_without_concat", "Band", "Function")
+        codes = [self.store.columns[c].codes for c in columns]
+        if slots is not None:
+            codes = [c[slots] for c in codes]
+        return np.stack(codes, axis=1) if len(codes[0]) else np.empty((0, len(columns)), dtype=np.int32)
+
+    def _build(self):
+        combos, counts = np.unique(self._codes(), axis=0, return_counts=True)
+        for (skill, definition, role, band, function), n in zip(combos.tolist(), counts.tolist()):
+            self._count(skill, definition, role, band, function, n)
+        for skill in self._usage:
+            self._reindex(skill)
+        self._terms = sorted(self._postings)
+
+    def _own(self, table: Dict, key: Any, factory):
+        """table[key] (created with factory() if missing), copied first if it
+        is still shared with the index this one was derived from."""
+        value = table.get(key)
+        if value is None:
+            value = table[key] = factory()
+        elif self._owned is not None and id(value) not in self._owned:
+            value = table[key] = factory(value)
+        else:
+            return value
+        if self._owned is not None:
+            self._owned.add(id(value))
+        return value
+
+    def _count(self, skill: int, definition: int, role: int, band: int, function: int, n: int):
+        usage = self._own(self._usage, skill, dict)
+        roles = self._own(usage, (band, function), Counter)
+        roles[role] += n
+        self._own(self._defs, skill, Counter)[definition] += n
+        self._own(self._scope, (band, function), Counter)[skill] += n
+        if n < 0:
+            if roles[role] <= 0:
+                del roles[role]
+                if not roles:
+                    del usage[(band, function)]
+            if self._defs[skill][definition] <= 0:
+                del self._defs[skill][definition]
+            if self._scope[(band, function)][skill] <= 0:
+                del self._scope[(band, function)][skill]
+            if not usage:
+                del self._usage[skill]
+                del self._defs[skill]
+
+    def _value_tokens(self, column: str, code: int) -> List[str]:
+        key = (column, code)
+        tokens = self._tokens.get(key)
+        if tokens is None:
+            tokens = self._tokens[key] = tokenize(self.store.columns[column].values[code])
+        return tokens
+
+    def _reindex(self, skill: int) -> List[str]:
+        """Recompute a skill's terms and update the postings; returns new terms."""
+        terms: Dict[str, int] = {}
+        if skill in self._usage:
+            for term in self._value_tokens("Skill_Name", skill):
+                terms[term] = terms.get(term, 0) | NAME
+            for definition in self._defs[skill]:
+                for term in self._value_tokens("Skill_Definition", definition):
+                    terms[term] = terms.get(term, 0) | DEFINITION
+            for role in {role for roles in self._usage[skill].values() for role in roles}:
+                for term in self._value_tokens("Job_Role_Name_without_concat", role):
+                    terms[term] = terms.get(term, 0) | ROLE
+        previous = self._skill_terms.pop(skill, {})
+        for term in previous.keys() - terms.keys():
+            postings = self._own(self._postings, term, dict)
+            del postings[skill]
+            if not postings:
+                del self._postings[term]
+        added = []
+        for term, fields in terms.items():
+            if term not in self._postings:
+                added.append(term)
+            self._own(self._postings, term, dict)[skill] = fields
+        if terms:
+            self._skill_terms[skill] = terms
+            self._names[skill] = " ".join(self._value_tokens("Skill_Name", skill))
+        else:
+            self._names.pop(skill, None)
+        self._summaries.pop(skill, None)
+        return added
+
+    def with_changes(self, changes: Dict[int, Optional[Dict[str, Any]]], store: MatrixStore) -> "SkillIndex":
+        """A new index with edits applied (id -> record, None = deleted),
+        given the store after them; this one is left as it was.
+
+        store must come from self.store.with_changes(changes), so codes of
+        unchanged values are the same in both.
+        """
+        with self._lock:
+            index = SkillIndex.__new__(SkillIndex)
+            index._lock = threading.Lock()
+            index.store = store
+            index._tokens = dict(self._tokens)
+            index._postings = dict(self._postings)
+            index._terms = self._terms
+            index._skill_terms = dict(self._skill_terms)
+            index._names = dict(self._names)
+            index._defs = dict(self._defs)
+            index._usage = dict(self._usage)
+            index._scope = dict(self._scope)
+            index._summaries = dict(self._summaries)
+            index._owned = set()
+            removed = self._codes(self.store.slots(changes))
+        added = index._codes(store.slots(changes))
+        touched = set()
+        for codes, sign in ((removed, -1), (added, 1)):
+            for skill, definition, role, band, function in codes.tolist():
+                index._count(skill, definition, role, band, function, sign)
+                touched.add(skill)
+        new_terms = []
+        for skill in touched:
+            new_terms.extend(index._reindex(skill))
+        if new_terms or len(index._terms) != len(index._postings):
+            index._terms = sorted(index._postings)
+        return index
+
+    # --- Queries ---
+
+    def _match(self, token: str, prefix: bool) -> Dict[int, float]:
+        """Best score per skill for one query token."""
+        scores: Dict[int, float] = {}
+        exact = self._postings.get(token)
+        if exact:
+            for skill, fields in exact.items():
+                scores[skill] = _FIELD_SCORES[fields]
+        if prefix:
+            start = bisect.bisect_left(self._terms, token)
+            for term in self._terms[start:]:
+                if not term.startswith(token):
+                    break
+                if term == token:
+                    continue
+                for skill, fields in self._postings.get(term, {}).items():
+                    score = _FIELD_SCORES[fields] * PREFIX_FACTOR
+                    if score > scores.get(skill, 0.0):
+                        scores[skill] = score
+        return scores
+
+    def _codes_for(self, column: str, values: Optional[Iterable[Any]]) -> Optional[set]:
+        if not values:
+            return None
+        return set(self.store.columns[column].codes_for(values))
+
+    def _scopes(self, band_codes: Optional[set], function_codes: Optional[set]) -> List[Tuple[int, int]]:
+        return [(band, function) for band, function in self._scope
+                if (band_codes is None or band in band_codes) and (function_codes is None or function in function_codes)]
+
+    def search(self, query: str, bands: Optional[List[str]] = None, functions: Optional[List[str]] = None,
+               limit: int = 20, prefix: bool = True, max_roles: int = 10) -> Dict[str, Any]:
+        """Skills matching every word of query (the last one as a prefix when
+        prefix is set), best first, optionally limited to rows in the given
+        bands / functions. Each result lists up to max_roles roles using it."""
+        tokens = tokenize(query)
+        with self._lock:
+            scores: Optional[Dict[int, float]] = None
+            for i, token in enumerate(tokens):
+                matched = self._match(token, prefix and i == len(tokens) - 1)
+                if scores is None:
+                    scores = matched
+                else:
+                    scores = {skill: score + matched[skill] for skill, score in scores.items() if skill in matched}
+                if not scores:
+                    break
+            scores = scores or {}
+
+            scopes = None
+            if bands or functions:
+                scopes = self._scopes(self._codes_for("Band", bands), self._codes_for("Function", functions))
+                rows: Dict[int, int] = {}
+                for scope in scopes:
+                    skills = self._scope[scope]
+                    for skill in (scores.keys() & skills.keys() if len(skills) < len(scores) else
+                                  [skill for skill in scores if skill in skills]):
+                        rows[skill] = rows.get(skill, 0) + skills[skill]
+            else:
+                rows = {skill: sum(self._defs[skill].values()) for skill in scores}
+
+            names = self.store.columns["Skill_Name"].values
+            phrase = " ".join(tokens)
+            ranked = []
+            for skill, n in rows.items():
+                score = scores[skill]
+                # Whole-name and leading-phrase matches float to the top
+                name = self._names[skill]
+                if name == phrase:
+                    score += 2.0
+                elif name.startswith(phrase):
+                    score += 1.0
+                ranked.append((-score, -n, str(names[skill]), skill))
+            top = heapq.nsmallest(limit, ranked)
+            results = [self._describe(skill, -neg_score, scopes, max_roles) for neg_score, _, _, skill in top]
+        return {"total": len(ranked), "results": results}
+
+    def _describe(self, skill: int, score: float, scopes: Optional[List[Tuple[int, int]]], max_roles: int) -> Dict[str, Any]:
+        if scopes is None:
+            summary = self._summaries.get(skill)
+            if summary is None:
+                summary = self._summaries[skill] = self._summarize(skill, list(self._usage[skill]))
+        else:
+            usage = self._usage[skill]
+            summary = self._summarize(skill, [scope for scope in scopes if scope in usage])
+        result = dict(summary, score=round(score, 3))
+        result["roles"] = summary["roles"][:max_roles]
+        return result
+
+    def _summarize(self, skill: int, scopes: List[Tuple[int, int]]) -> Dict[str, Any]:
+        columns = self.store.columns
+        role_names = columns["Job_Role_Name_without_concat"].values
+        usage = self._usage[skill]
+        roles = Counter()
+        for scope in scopes:
+            roles.update(usage[scope])
+        return {
+            "skill": columns["Skill_Name"].values[skill],
+            "rows": sum(roles.values()),
+            "definitions": sorted(str(columns["Skill_Definition"].values[d]) for d in self._defs[skill]),
+            "role_count": len(roles),
+            "roles": [{"role": role_names[role], "rows": n}
+                      for role, n in sorted(roles.items(), key=lambda item: (-item[1], str(role_names[item[0]])))],
+            "bands": sorted({str(columns["Band"].values[band]) for band, _ in scopes}),
+            "functions": sorted({str(columns["Function"].values[function]) for _, function in scopes}),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"skills": len(self._usage), "terms": len(self._postings)}
@@ -0,0 +1,583 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Callable, Optional, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+
+from db import bq_client
+from local_store import local_store
+from matrix_store import MatrixStore
+from role_index import RoleIndex
+from skill_index import SkillIndex
+from models import EMPLOYEE_FIELDS, validate_records, validate_table
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Snapshot cache configuration
+# A snapshot younger than the TTL is served as-is. Past the TTL it is still
+# served (stale-while-revalidate) for up to MAX_STALE more seconds while a
+# background refresh runs; after that readers block on a fresh load.
+CACHE_TTL_SECONDS = float(os.getenv("MANPOWER_CACHE_TTL", "300"))
+CACHE_MAX_STALE_SECONDS = float(os.getenv("MANPOWER_CACHE_MAX_STALE", "3600"))
+# How many recent versions stay addressable by number (e.g. exports pinned to
+# the version the client was looking at)
+SNAPSHOT_HISTORY = int(os.getenv("MANPOWER_SNAPSHOT_HISTORY", "3"))
+# Bounded log of row changes between consecutive versions, for delta sync
+# (GET /api/manpower?since=<version>). Older entries are compacted away;
+# clients asking for a version before that get the full snapshot instead.
+CHANGE_LOG_ENTRIES = int(os.getenv("MANPOWER_CHANGE_LOG_ENTRIES", "1000"))
+CHANGE_LOG_ROWS = int(os.getenv("MANPOWER_CHANGE_LOG_ROWS", "20000"))
+# Secondary indexes built from a snapshot's matrix store. Each takes the store
+# in its constructor and has with_changes(changes, store), which edits use to
+# derive the next version's index (copy-on-write) instead of rebuilding.
+INDEX_TYPES = {"skills": SkillIndex, "roles": RoleIndex}
+# Columns sent as lookup tables + integer references in the normalized wire
+# format (?format=normalized); id and Proficiency_Level stay literal.
+NORMALIZED_LOOKUPS = (
+    "Group", "SBU", "BU", "Function", "UJR_in_UJR_Master",
+    "Job_Role_Name_without_concat", "L1_UJR", "Competency_Type",
+    "Skill_Name", "Skill_Definition", "Band",
+)
+# Compression of the pre-encoded JSON body (built once per version)
+GZIP_LEVEL = int(os.getenv("MANPOWER_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("MANPOWER_BROTLI_QUALITY", "5"))
+
+
+def _digest(records: List[Dict[str, Any]]) -> str:
+    payload = json.dumps(records, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _arrow_stream_bytes(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def apply_overlay(records: List[Dict[str, Any]], changes: Dict[int, Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Return records with changes applied (id -> replacement record, None = deleted)."""
+    if not changes:
+        return records
+    result = []
+    for record in records:
+        record_id = record.get("id")
+        if record_id in changes:
+            if changes[record_id] is not None:
+                result.append(changes[record_id])
+        else:
+            result.append(record)
+    return result
+
+
+def available_encodings() -> List[str]:
+    """Content-Encodings a snapshot body can be served in, most preferred first."""
+    return (["br"] if brotli is not None else []) + ["gzip", "identity"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: List[str]) -> str:
+    """Pick the Content-Encoding for an Accept-Encoding header.
+
+    Highest q-value wins; ties go to the earlier entry in available. Falls
+    back to identity when nothing else is acceptable.
+    """
+    if not accept_encoding:
+        return "identity"
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            weights[coding] = q
+    best, best_q = "identity", 0.0
+    for coding in available:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class Snapshot:
+    """An immutable, versioned copy of the manpower table.
+
+    Holds either row dicts or a columnar pyarrow.Table (whichever the loader
+    produced), or for versions made by SnapshotCache.apply_changes only the
+    matrix store, and derives the other forms lazily, at most once per
+    version. The same goes for the JSON response body and its compressed
+    variants.
+
+    validated means every row already matches EmployeeRecord, so the JSON
+    body can be written straight from the rows.
+    """
+
+    def __init__(self, version: int, digest: str, records: Optional[List[Dict[str, Any]]] = None,
+                 table: Optional[pa.Table] = None, arrow_bytes: Optional[bytes] = None,
+                 validated: bool = False, store: Optional[MatrixStore] = None,
+                 indexes: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.digest = digest
+        self.loaded_at = time.time()
+        self.validated = validated
+        self._records = records
+        self._table = table
+        self._arrow_bytes = arrow_bytes
+        self._store = store
+        self._indexes: Dict[str, Any] = dict(indexes or {})  # INDEX_TYPES name -> built index
+        self._bodies: Dict[tuple, bytes] = {}  # (format, Content-Encoding) -> response body
+        self._lock = threading.Lock()
+
+    @property
+    def etag(self) -> str:
+        return f'"v{self.version}"'
+
+    @property
+    def num_rows(self) -> int:
+        if self._table is not None:
+            return self._table.num_rows
+        if self._records is not None:
+            return len(self._records)
+        return len(self._store)
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        if self._records is None:
+            with self._lock:
+                if self._records is None:
+                    if self._table is not None:
+                        self._records = self._table.to_pylist()
+                    else:
+                        self._records = self._store.rows(np.arange(len(self._store)))
+        return self._records
+
+    @property
+    def table(self) -> pa.Table:
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    records = self._records
+                    if records is None:
+                        records = self._store.rows(np.arange(len(self._store)))
+                    self._table = pa.Table.from_pylist(records)
+        return self._table
+
+    @property
+    def arrow_bytes(self) -> bytes:
+        """The table as an Arrow IPC stream (application/vnd.apache.arrow.stream)."""
+        if self._arrow_bytes is None:
+            table = self.table
+            with self._lock:
+                if self._arrow_bytes is None:
+                    self._arrow_bytes = _arrow_stream_bytes(table)
+        return self._arrow_bytes
+
+    @property
+    def json_bytes(self) -> bytes:
+        """The rows as a UTF-8 JSON array, as GET /api/manpower sends them."""
+        return self.body("identity")
+
+    def body(self, encoding: str = "identity", format: str = "json") -> bytes:
+        """The response body in the given Content-Encoding ("identity", "gzip"
+        or "br") and format ("json": array of row objects, "normalized": see
+        normalized_payload).
+
+        Raises pydantic.ValidationError if the snapshot wasn't validated on
+        load and a row doesn't match EmployeeRecord.
+        """
+        data = self._bodies.get((format, encoding))
+        if data is not None:
+            return data
+        if encoding != "identity":
+            raw = self.body("identity", format)
+        elif format == "normalized":
+            payload = self.normalized_payload()
+        else:
+            payload = self.records if self.validated else validate_records(self.records)
+        with self._lock:
+            data = self._bodies.get((format, encoding))
+            if data is None:
+                if encoding == "identity":
+                    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+                elif encoding == "gzip":
+                    data = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+                elif encoding == "br" and brotli is not None:
+                    data = brotli.compress(raw, quality=BROTLI_QUALITY)
+                else:
+                    raise ValueError(f"Unsupported encoding: {encoding}")
+                self._bodies[(format, encoding)] = data
+        return data
+
+    def normalized_payload(self) -> Dict[str, Any]:
+        """The rows with repeated strings replaced by integer references.
+
+        "lookups" holds each distinct value of the NORMALIZED_LOOKUPS columns
+        once; each entry of "rows" is a list in "fields" order where those
+        columns are indexes into their lookup and the rest are plain values.
+        """
+        store = self.store if self.validated else MatrixStore.from_records(validate_records(self.records))
+        columns = []
+        for name in EMPLOYEE_FIELDS:
+            if name == "id":
+                columns.append(store.ids)
+            elif name in NORMALIZED_LOOKUPS:
+                columns.append(store.columns[name].codes)
+            else:
+                col = store.columns[name]
+                table = np.empty(len(col.values), dtype=object)
+                table[:] = col.values
+                columns.append(table[col.codes])
+        rows = [list(row) for row in zip(*(c.tolist() for c in columns))]
+        return {
+            "version": self.version,
+            "fields": list(EMPLOYEE_FIELDS),
+            "lookups": {name: store.columns[name].values for name in NORMALIZED_LOOKUPS},
+            "rows": rows,
+        }
+
+    @property
+    def store(self) -> MatrixStore:
+        """Dictionary-encoded, bitmap-indexed copy used for filtering and grouping."""
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    if self._table is not None:
+                        self._store = MatrixStore.from_table(self._table)
+                    else:
+                        self._store = MatrixStore.from_records(self._records)
+        return self._store
+
+    def index(self, name: str):
+        """The INDEX_TYPES index of that name, built on first use."""
+        index = self._indexes.get(name)
+        if index is None:
+            store = self.store
+            with self._lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    index = self._indexes[name] = INDEX_TYPES[name](store)
+        return index
+
+    def build_indexes(self):
+        for name in INDEX_TYPES:
+            self.index(name)
+
+    @property
+    def skill_index(self) -> SkillIndex:
+        """Inverted index for skill search (/api/skills/search)."""
+        return self.index("skills")
+
+    @property
+    def role_index(self) -> RoleIndex:
+        """Role profiles by UJR (/api/roles)."""
+        return self.index("roles")
+
+    def find(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Look up records by id through the store's id column (no full dict scan).
+
+        Rows not decoded yet are decoded from the store, just those slots.
+        """
+        slots = self.store.slots(ids)
+        records = self._records
+        rows = [records[i] for i in slots] if records is not None else self.store.rows(slots)
+        return {row["id"]: row for row in rows}
+
+    def age(self) -> float:
+        return time.time() - self.loaded_at
+
+
+class SnapshotCache:
+    def __init__(self, loader: Callable[[], Union[List[Dict[str, Any]], pa.Table]],
+                 ttl: float = CACHE_TTL_SECONDS, max_stale: float = CACHE_MAX_STALE_SECONDS):
+        self._loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._snapshot: Optional[Snapshot] = None
+        self._history: "OrderedDict[int, Snapshot]" = OrderedDict()
+        self._listeners: List[Callable[[Snapshot], None]] = []
+        # (from_version, to_version, changes) for consecutive published versions
+        self._changes: "deque[Tuple[int, int, Dict[int, Optional[Dict[str, Any]]]]]" = deque()
+        self._change_rows = 0
+        self._lock = threading.Lock()          # guards the counters, _refreshing and the change log
+        self._load_lock = threading.Lock()     # only one load at a time
+        self._refreshing = False
+        self._last_version = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+
+    def _next_version(self) -> int:
+        # Seeded from the wall clock so versions keep increasing across restarts
+        self._last_version = max(self._last_version + 1, int(time.time() * 1000))
+        return self._last_version
+
+    def get(self) -> Snapshot:
+        """Return the current snapshot, loading or revalidating it as needed."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            age = snapshot.age()
+            if age < self.ttl:
+                with self._lock:
+                    self.hits += 1
+                return snapshot
+            if age < self.ttl + self.max_stale:
+                with self._lock:
+                    self.stale_hits += 1
+                self._refresh_in_background()
+                return snapshot
+
+        with self._lock:
+            self.misses += 1
+        return self._load(force=False)
+
+    def peek(self) -> Optional[Snapshot]:
+        """Return the current snapshot if it is still servable, without ever
+        blocking on a load (a background refresh is started if it is stale)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        age = snapshot.age()
+        if age >= self.ttl + self.max_stale:
+            return None
+        if age >= self.ttl:
+            self._refresh_in_background()
+        return snapshot
+
+    def refresh(self) -> Snapshot:
+        """Reload from the source right now, regardless of the TTL."""
+        return self._load(force=True)
+
+    def apply_changes(self, changes: Dict[int, Optional[Dict[str, Any]]]) -> Optional[Snapshot]:
+        """Publish a new snapshot version with edits applied (id -> record, None = deleted).
+
+        Used for read-your-writes: edits show up immediately without a reload.
+        If nothing is cached yet, the next load picks the edits up from the source.
+        """
+        with self._load_lock:
+            current = self._snapshot
+            if current is None:
+                return None
+            # No digest: the next full load always gets a fresh version.
+            # Edited rows come from EmployeeRecord, so validation carries over.
+            # Only the matrix store is patched (codes and bits of the changed
+            # rows); row dicts, the Arrow table and bodies are derived from it
+            # on demand, so an edit doesn't decode or copy the whole table
+            store = current.store.with_changes(changes)
+            # Indexes are derived copy-on-write: readers still holding the
+            # previous version keep using its indexes unchanged
+            indexes = {name: index.with_changes(changes, store) for name, index in list(current._indexes.items())}
+            snapshot = Snapshot(self._next_version(), None, validated=current.validated, store=store, indexes=indexes)
+            snapshot.loaded_at = current.loaded_at
+            self._publish(snapshot, changes)
+            return snapshot
+
+    def get_version(self, version: int) -> Optional[Snapshot]:
+        """A specific recent version, or None once it has aged out of the history."""
+        current = self._snapshot
+        if current is not None and current.version == version:
+            return current
+        return self._history.get(version)
+
+    def changes_since(self, version: int) -> Optional[Tuple[int, Dict[int, Optional[Dict[str, Any]]]]]:
+        """Row changes from version up to the current one, as (current version,
+        id -> record / None for deleted), or None if the log no longer reaches
+        back to version (the caller should send the full snapshot)."""
+        with self._lock:
+            current = self._snapshot
+            entries = list(self._changes)
+        if current is None:
+            return None
+        if version == current.version:
+            return current.version, {}
+        start = next((i for i, (from_version, _, _) in enumerate(entries) if from_version == version), None)
+        if start is None:
+            return None
+        merged: Dict[int, Optional[Dict[str, Any]]] = {}
+        for _, _, changes in entries[start:]:
+            merged.update(changes)
+        return current.version, merged
+
+    def add_listener(self, listener: Callable[[Snapshot], None]):
+        """Call listener(snapshot) whenever a new version is published."""
+        self._listeners.append(listener)
+
+    def _publish(self, snapshot: Snapshot, changes: Optional[Dict[int, Optional[Dict[str, Any]]]] = None):
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = snapshot
+            self._log_changes(previous, snapshot, changes)
+        self._history[snapshot.version] = snapshot
+        while len(self._history) > SNAPSHOT_HISTORY:
+            self._history.popitem(last=False)
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Snapshot listener failed: {e}")
+
+    def _log_changes(self, previous: Optional[Snapshot], snapshot: Snapshot,
+                     changes: Optional[Dict[int, Optional[Dict[str, Any]]]]):
+        # Caller holds self._lock. Unknown changes break the chain, so start over.
+        if previous is None or changes is None or len(changes) > CHANGE_LOG_ROWS:
+            self._changes.clear()
+            self._change_rows = 0
+            return
+        self._changes.append((previous.version, snapshot.version, changes))
+        self._change_rows += len(changes)
+        while len(self._changes) > CHANGE_LOG_ENTRIES or self._change_rows > CHANGE_LOG_ROWS:
+            _, _, dropped = self._changes.popleft()
+            self._change_rows -= len(dropped)
+
+    def invalidate(self):
+        """Drop the current snapshot so the next reader loads a fresh one."""
+        self._snapshot = None
+
+    def _load(self, force: bool) -> Snapshot:
+        with self._load_lock:
+            current = self._snapshot
+            # Another thread may have finished a load while we were waiting
+            if not force and current is not None and current.age() < self.ttl:
+                return current
+
+            try:
+                result = self._loader()
+            except Exception as e:
+                with self._lock:
+                    self.load_errors += 1
+                if current is not None:
+                    logger.error(f"Snapshot refresh failed, serving version {current.version}: {e}")
+                    return current
+                raise
+
+            result, validated = self._validate(result)
+            if isinstance(result, pa.Table):
+                arrow_bytes = _arrow_stream_bytes(result)
+                digest = hashlib.sha1(arrow_bytes).hexdigest()
+            else:
+                arrow_bytes = None
+                digest = _digest(result)
+
+            if current is not None and current.digest == digest:
+                # Same data: keep the version (and ETag) so clients still get 304s
+                current.loaded_at = time.time()
+                snapshot = current
+            else:
+                if arrow_bytes is not None:
+                    snapshot = Snapshot(self._next_version(), digest, table=result, arrow_bytes=arrow_bytes,
+                                        validated=validated)
+                else:
+                    snapshot = Snapshot(self._next_version(), digest, records=result, validated=validated)
+                # Reloads (bulk loads, edits made elsewhere) feed the change log too.
+                # Diffed on the matrix stores (needed for queries anyway) so an
+                # Arrow load is never turned into row dicts here.
+                changes = current.store.diff(snapshot.store) if current is not None else None
+                self._publish(snapshot, changes)
+
+            with self._lock:
+                self.loads += 1
+            logger.info(f"Snapshot version {snapshot.version} loaded with {snapshot.num_rows} records")
+            return snapshot
+
+    @staticmethod
+    def _validate(result):
+        """Check a freshly loaded result against EmployeeRecord once, so
+        requests don't have to. Returns (result, validated); on failure the
+        raw result is kept and rows are validated when the JSON is built."""
+        try:
+            if isinstance(result, pa.Table):
+                return validate_table(result), True
+            return validate_records(result), True
+        except Exception as e:
+            logger.warning(f"Snapshot rows failed validation: {e}")
+            return result, False
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._load(force=True)
+            except Exception as e:
+                logger.error(f"Background snapshot refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="snapshot-refresh", daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        with self._lock:
+            stats = {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "load_errors": self.load_errors,
+                "refreshing": self._refreshing,
+                "change_log_entries": len(self._changes),
+                "change_log_rows": self._change_rows,
+            }
+        stats["ttl_seconds"] = self.ttl
+        stats["max_stale_seconds"] = self.max_stale
+        stats["version"] = snapshot.version if snapshot else None
+        stats["records"] = snapshot.num_rows if snapshot else 0
+        stats["age_seconds"] = round(snapshot.age(), 3) if snapshot else None
+        return stats
+
+
+def load_manpower_snapshot():
+    # Without BigQuery credentials the app runs entirely off the local store,
+    # so reads see the same rows the PUT/DELETE fallbacks edit.
+    if bq_client.client is None:
+        return local_store.all()
+    # Edits still waiting in the write buffer aren't in BigQuery yet: those
+    # pending when the fetch started, plus any buffered while it ran
+    result, overlay = bq_client.fetch_manpower_snapshot()
+    overlay = {**overlay, **bq_client.write_buffer.overlay()}
+    if overlay:
+        records = result.to_pylist() if isinstance(result, pa.Table) else result
+        return apply_overlay(records, overlay)
+    return result
+
+
+# Global instance
+snapshot_cache = SnapshotCache(loader=load_manpower_snapshot)
@@ -0,0 +1,134 @@
+import os
+import random
+import tempfile
+
+import pyarrow as pa
+import pytest
+
+# Module-level settings are read at import time, so point the local store,
+# PDF cache and export jobs at a scratch directory before anything imports them
+_scratch = tempfile.mkdtemp(prefix="skills_matrix_tests_")
+os.environ.setdefault("LOCAL_DB_FILE", os.path.join(_scratch, "manpower.sqlite3"))
+os.environ.setdefault("LEGACY_JSON_FILE", os.path.join(_scratch, "mock_db.json"))
+os.environ.setdefault("PDF_CACHE_DIR", os.path.join(_scratch, "pdf_cache"))
+os.environ.setdefault("EXPORT_JOB_DIR", os.path.join(_scratch, "export_jobs"))
+os.environ.setdefault("PDF_WORKERS", "0")
+
+BANDS = ("Band 1A", "Band 1B", "Band 2A", "Band 2B", "Band 3", "Band 4", "Band 5")
+FUNCTIONS = ("HR", "Sales", "Finance", "Engineering")
+COMPETENCY_TYPES = ("Functional", "Technical", "Behavioral", "Raymond Leadership Competency")
+
+
+def build_rows(n, seed=1):
+    """n manpower rows (ids 1..n) spread over a handful of values per column."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(1, n + 1):
+        function = rng.choice(FUNCTIONS)
+        ujr = rng.randint(1, max(2, n // 20))
+        rows.append({
+            "id": i, "Group": rng.choice(["Raymond", "Lifestyle"]), "SBU": rng.choice(["Textile", "Apparel"]),
+            "BU": rng.choice(["BU1", "BU2", "BU3"]), "Function": function,
+            "UJR_in_UJR_Master": f"UJR{ujr:05d}", "Job_Role_Name_without_concat": f"{function} Role {ujr}",
+            "L1_UJR": rng.choice(["Managerial", "Operational"]), "Competency_Type": rng.choice(COMPETENCY_TYPES),
+            "Skill_Name": f"Skill {rng.randint(1, 40)}", "Skill_Definition": f"Ability in skill {rng.randint(1, 40)}",
+            "Proficiency_Level": rng.randint(1, 5), "Band": rng.choice(BANDS),
+        })
+    return rows
+
+
+@pytest.fixture
+def make_rows():
+    return build_rows
+
+
+@pytest.fixture
+def local_rows(monkeypatch):
+    """The app running off the local store (no BigQuery), loaded with 200 rows."""
+    from db import bq_client
+    from local_store import local_store
+    from snapshot import snapshot_cache
+
+    monkeypatch.setattr(bq_client, "client", None)
+    rows = build_rows(200)
+    local_store.replace_all(rows)
+    snapshot_cache.invalidate()
+    yield rows
+    snapshot_cache.invalidate()
+
+
+@pytest.fixture
+def client(local_rows):
+    from fastapi.testclient import TestClient
+    import main
+
+    return TestClient(main.app)
+
+
+class FakeBigQuery:
+    """Stands in for bigquery.Client: answers the queries BigQueryClient
+    builds (projection, IN UNNEST filters, cursor, exclusions, ORDER BY id,
+    LIMIT) from a list of rows, and records each (sql, params)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def query(self, sql, job_config=None):
+        from db import FILTER_COLUMNS, MANPOWER_COLUMNS
+
+        params = {p.name: getattr(p, "values", getattr(p, "value", None))
+                  for p in (job_config.query_parameters if job_config else [])}
+        self.queries.append((sql, params))
+        rows = self.rows
+        for name, values in params.items():
+            if name.startswith("f"):
+                column = FILTER_COLUMNS[int(name[1:])]
+                rows = [r for r in rows if r[column] in values]
+        if "after_id" in params:
+            rows = [r for r in rows if r["id"] > params["after_id"]]
+        if "exclude_ids" in params:
+            rows = [r for r in rows if r["id"] not in params["exclude_ids"]]
+        if "ORDER BY id" in sql:
+            rows = sorted(rows, key=lambda r: r["id"])
+        if "limit" in params:
+            rows = rows[:params["limit"]]
+        select = sql[len("SELECT "):sql.index(" FROM ")]
+        columns = list(MANPOWER_COLUMNS) if select == "*" else [c.strip(" `") for c in select.split(",")]
+        return FakeQueryJob([{c: r[c] for c in columns} for r in rows])
+
+
+class FakeQueryJob:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def result(self, page_size=None):
+        return FakeRowIterator(self.rows, page_size or len(self.rows) or 1)
+
+    def to_arrow(self, create_bqstorage_client=False):
+        return pa.Table.from_pylist(self.rows)
+
+
+class FakeRowIterator:
+    def __init__(self, rows, page_size):
+        self.rows = rows
+        self.pages = (rows[i:i + page_size] for i in range(0, len(rows), page_size))
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+@pytest.fixture
+def fake_bq(monkeypatch):
+    """bq_client talking to a FakeBigQuery over 200 rows, with an empty write
+    buffer and nothing cached yet."""
+    from db import WriteBuffer, bq_client
+    from snapshot import snapshot_cache
+
+    fake = FakeBigQuery(build_rows(200))
+    monkeypatch.setattr(bq_client, "client", fake)
+    monkeypatch.setattr(bq_client, "table_ref", "project.dataset.manpower", raising=False)
+    monkeypatch.setattr(bq_client, "write_buffer", WriteBuffer(bq_client, interval=3600))
+    snapshot_cache.invalidate()
+    yield fake
+    snapshot_cache.invalidate()
@@ -0,0 +1,107 @@
+from collections import Counter, defaultdict
+
+import pytest
+
+from analytics import HIGH_PROFICIENCY_LEVEL, band_rank
+
+
+def get(client, path, **params):
+    response = client.get(f"/api/analytics/{path}", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def group_key(group, by):
+    return tuple(group[column] for column in by)
+
+
+@pytest.mark.parametrize("by, filters", [
+    ("Band", {}),
+    ("Function", {"Band": ["Band 3", "Band 4"]}),
+    ("Band,Function", {}),
+    ("BU,Competency_Type", {"Function": ["HR"]}),
+])
+def test_proficiency_matches_a_row_scan(client, local_rows, by, filters):
+    columns = by.split(",")
+    rows = [r for r in local_rows if all(r[c] in v for c, v in filters.items())]
+    expected = defaultdict(Counter)
+    for row in rows:
+        expected[tuple(row[c] for c in columns)][row["Proficiency_Level"]] += 1
+
+    body = get(client, "proficiency", by=by, **filters)
+    assert body["by"] == columns
+    assert body["levels"] == sorted({r["Proficiency_Level"] for r in rows})
+    assert [group_key(g, columns) for g in body["groups"]] == sorted(
+        expected, key=lambda key: tuple((band_rank(v), v) if c == "Band" else (0, v) for c, v in zip(columns, key)))
+    for group in body["groups"]:
+        counts = expected[group_key(group, columns)]
+        assert {int(level): n for level, n in group["counts"].items() if n} == counts
+        assert group["total"] == sum(counts.values())
+        assert group["mean"] == round(sum(level * n for level, n in counts.items()) / group["total"], 2)
+
+
+@pytest.mark.parametrize("by, same_as", [
+    ("Band,Band", "Band"),
+    ("Band, Function ,Band", "Band,Function"),
+    ("Function,,Function", "Function"),
+])
+def test_repeated_group_columns_count_once(client, local_rows, by, same_as):
+    repeated, plain = get(client, "proficiency", by=by), get(client, "proficiency", by=same_as)
+    assert repeated == plain
+
+
+@pytest.mark.parametrize("by", ["", ",", "Skill_Name", "Band,Nope"])
+def test_bad_group_columns_are_rejected(client, by):
+    assert client.get("/api/analytics/proficiency", params={"by": by}).status_code == 400
+
+
+def test_competency_coverage_matches_a_row_scan(client, local_rows):
+    roles, covered, skills = defaultdict(set), defaultdict(set), defaultdict(set)
+    for row in local_rows:
+        roles[row["Function"]].add(row["UJR_in_UJR_Master"])
+        covered[row["Function"], row["Competency_Type"]].add(row["UJR_in_UJR_Master"])
+        skills[row["Function"], row["Competency_Type"]].add(row["Skill_Name"])
+
+    body = get(client, "competency-coverage", by="Function")
+    assert [g["Function"] for g in body["groups"]] == sorted(roles)
+    for group in body["groups"]:
+        function = group["Function"]
+        assert group["roles"] == len(roles[function])
+        for competency_type, coverage in group["coverage"].items():
+            assert coverage["roles"] == len(covered[function, competency_type])
+            assert coverage["skills"] == len(skills[function, competency_type])
+
+
+def test_top_skills_by_frequency(client, local_rows):
+    rows = [r for r in local_rows if band_rank(r["Band"]) >= band_rank("Band 2A")]
+    roles = defaultdict(set)
+    for row in rows:
+        roles[row["Skill_Name"]].add(row["UJR_in_UJR_Master"])
+
+    body = get(client, "top-skills", n=5, min_band="Band 2A")
+    assert body["total_skills"] == len(roles)
+    assert body["total_roles"] == len({r["UJR_in_UJR_Master"] for r in rows})
+    counts = [skill["roles"] for skill in body["skills"]]
+    assert counts == sorted((len(ujrs) for ujrs in roles.values()), reverse=True)[:5]
+    for skill in body["skills"]:
+        levels = [r["Proficiency_Level"] for r in rows if r["Skill_Name"] == skill["skill"]]
+        assert skill["rows"] == len(levels)
+        assert skill["high_proficiency_share"] == round(
+            sum(level >= HIGH_PROFICIENCY_LEVEL for level in levels) / len(levels), 4)
+
+
+def test_results_follow_edits_and_revalidate(client, local_rows):
+    first = client.get("/api/analytics/proficiency", params={"by": "Band"})
+    assert client.get("/api/analytics/proficiency", params={"by": "Band"},
+                      headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    row = local_rows[0]
+    level = 1 if row["Proficiency_Level"] != 1 else 2
+    assert client.patch("/api/manpower", json={"updates": [{"id": row["id"], "Proficiency_Level": level}],
+                                               "deletes": []}).status_code == 200
+    after = get(client, "proficiency", by="Band")
+    before = {g["Band"]: g["counts"] for g in first.json()["groups"]}
+    changed = {g["Band"]: g["counts"] for g in after["groups"]}
+    band = row["Band"]
+    assert changed[band][str(level)] == before[band][str(level)] + 1
+    assert changed[band][str(row["Proficiency_Level"])] == before[band][str(row["Proficiency_Level"])] - 1
@@ -0,0 +1,59 @@
+import pyarrow as pa
+import pytest
+
+import db
+from db import bq_client
+from snapshot import snapshot_cache, load_manpower_snapshot
+
+ARROW = "application/vnd.apache.arrow.stream"
+
+
+@pytest.fixture
+def arrow_mode(fake_bq, monkeypatch):
+    monkeypatch.setattr(db, "FETCH_MODE", "arrow")
+    return fake_bq
+
+
+@pytest.fixture
+def api(arrow_mode):
+    from fastapi.testclient import TestClient
+    import main
+
+    return TestClient(main.app)
+
+
+def read_stream(content):
+    return pa.ipc.open_stream(content).read_all()
+
+
+def test_snapshot_loads_as_a_table_without_row_dicts(arrow_mode):
+    assert isinstance(load_manpower_snapshot(), pa.Table)
+    snapshot = snapshot_cache.get()
+    assert snapshot.num_rows == 200
+    assert snapshot.validated
+    assert snapshot._records is None
+    assert snapshot.store.count(snapshot.store.mask({"Function": ["HR"]})) == sum(
+        r["Function"] == "HR" for r in arrow_mode.rows)
+    assert snapshot._records is None
+
+
+@pytest.mark.parametrize("request_kwargs", [{"params": {"format": "arrow"}}, {"headers": {"Accept": ARROW}}])
+def test_arrow_response_round_trips(api, arrow_mode, request_kwargs):
+    response = api.get("/api/manpower", **request_kwargs)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW
+    assert read_stream(response.content).to_pylist() == arrow_mode.rows
+    # Same version and ETag as the JSON representation
+    json_response = api.get("/api/manpower")
+    assert json_response.json() == arrow_mode.rows
+    assert json_response.headers["ETag"] == response.headers["ETag"]
+
+
+def test_buffered_edits_apply_to_an_arrow_fetch(api, arrow_mode):
+    rows = arrow_mode.rows
+    bq_client.write_buffer.add_many({1: dict(rows[0], Band="Band 5"), 2: None})
+
+    table = read_stream(api.get("/api/manpower", params={"format": "arrow"}).content)
+    assert table.num_rows == 199
+    assert table.to_pylist()[0] == dict(rows[0], Band="Band 5")
+    assert 2 not in table.column("id").to_pylist()
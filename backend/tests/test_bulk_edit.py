@@ -0,0 +1,48 @@
+from local_store import local_store
+
+
+def current_version(client):
+    return int(client.get("/api/manpower").headers["X-Snapshot-Version"])
+
+
+def test_bulk_edit_applies_updates_and_deletes(client, local_rows):
+    version = current_version(client)
+    response = client.patch("/api/manpower", json={
+        "updates": [{"id": 1, "Band": "Band 5"}, {"id": 2, "Proficiency_Level": 4}],
+        "deletes": [3],
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["version"] > version
+    assert [r["status"] for r in body["results"]] == ["ok", "ok", "ok"]
+    assert local_store.get(1) == dict(local_rows[0], Band="Band 5")
+    assert local_store.get(2)["Proficiency_Level"] == 4
+    assert local_store.get(3) is None
+    assert client.get(f"/api/manpower?since={version}").json()["deletes"] == [3]
+
+
+def test_bulk_edit_is_all_or_nothing(client, local_rows):
+    version = current_version(client)
+    response = client.patch("/api/manpower", json={
+        "updates": [{"id": 1, "Band": "Band 5"}, {"id": 99999, "Band": "Band 5"}, {"id": 2, "Band": None}],
+        "deletes": [3, 88888],
+    })
+
+    assert response.status_code == 422
+    body = response.json()
+    assert body["version"] == version
+    assert {(r["id"], r["status"]) for r in body["results"]} == {
+        (1, "ok"), (99999, "not_found"), (2, "invalid"), (3, "ok"), (88888, "not_found"),
+    }
+    assert [r for r in body["results"] if r["status"] == "invalid"][0]["detail"]
+    # Nothing was written, and the snapshot didn't move
+    assert local_store.get(1) == local_rows[0]
+    assert local_store.get(3) == local_rows[2]
+    assert current_version(client) == version
+
+
+def test_bulk_edit_rejects_duplicate_ids(client, local_rows):
+    response = client.patch("/api/manpower", json={"updates": [{"id": 1, "Band": "Band 5"}], "deletes": [1]})
+    assert response.status_code == 400
+    assert local_store.get(1) == local_rows[0]
@@ -0,0 +1,66 @@
+import gzip
+import json
+
+import pytest
+
+from snapshot import available_encodings, negotiate_encoding, snapshot_cache
+
+ALL = ["br", "gzip", "identity"]
+
+
+@pytest.mark.parametrize("header, available, expected", [
+    (None, ALL, "identity"),
+    ("", ALL, "identity"),
+    ("gzip", ALL, "gzip"),
+    ("gzip, deflate, br", ALL, "br"),
+    ("gzip, deflate, br", ["gzip", "identity"], "gzip"),
+    ("br;q=0.5, gzip;q=0.8", ALL, "gzip"),
+    ("BR;q=1.0, GZIP;q=1.0", ALL, "br"),
+    ("gzip;q=0, identity", ALL, "identity"),
+    ("*", ALL, "br"),
+    ("*;q=0.1, gzip;q=0.5", ALL, "gzip"),
+    ("deflate", ALL, "identity"),
+    ("gzip;q=bogus", ALL, "identity"),
+])
+def test_negotiate_encoding(header, available, expected):
+    assert negotiate_encoding(header, available) == expected
+
+
+def test_available_encodings_follow_installed_codecs():
+    from snapshot import brotli
+
+    assert available_encodings()[-2:] == ["gzip", "identity"]
+    assert ("br" in available_encodings()) == (brotli is not None)
+
+
+def test_gzip_body_decompresses_to_the_plain_body(local_rows):
+    snapshot = snapshot_cache.get()
+    plain = snapshot.body("identity")
+    assert gzip.decompress(snapshot.body("gzip")) == plain
+    assert len(snapshot.body("gzip")) < len(plain)
+    # Built once per version
+    assert snapshot.body("gzip") is snapshot.body("gzip")
+    assert {row["id"] for row in json.loads(plain)} == {row["id"] for row in local_rows}
+
+
+def test_brotli_body_decompresses_to_the_plain_body(local_rows):
+    brotli = pytest.importorskip("brotli")
+    snapshot = snapshot_cache.get()
+    assert brotli.decompress(snapshot.body("br")) == snapshot.body("identity")
+
+
+def test_unsupported_encoding_is_refused(local_rows):
+    with pytest.raises(ValueError):
+        snapshot_cache.get().body("deflate")
+
+
+@pytest.mark.parametrize("accept", ["gzip", "gzip, deflate, br", "identity", "deflate"])
+def test_manpower_honours_accept_encoding(client, local_rows, accept):
+    expected = negotiate_encoding(accept, available_encodings())
+    response = client.get("/api/manpower", headers={"Accept-Encoding": accept})
+
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding", "identity") == expected
+    assert "Accept-Encoding" in response.headers["Vary"]
+    # The client undoes the encoding; the rows come out the same either way
+    assert response.json() == json.loads(snapshot_cache.get().body("identity"))
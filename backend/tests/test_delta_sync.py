@@ -0,0 +1,111 @@
+import copy
+
+import pyarrow as pa
+import pytest
+
+import snapshot as snapshot_module
+from local_store import local_store
+from snapshot import SnapshotCache
+
+
+@pytest.fixture
+def source(make_rows):
+    """Rows the cache loads from; tests edit them to simulate external changes."""
+    return {"rows": make_rows(100)}
+
+
+@pytest.fixture
+def cache(source):
+    cache = SnapshotCache(lambda: copy.deepcopy(source["rows"]))
+    cache.get()
+    return cache
+
+
+def test_changes_since_merges_edits(cache, source):
+    start = cache.get().version
+    first = dict(source["rows"][0], Band="Band 5")
+    cache.apply_changes({1: first, 2: None})
+    middle = cache.get().version
+    second = dict(first, Function="HR")
+    cache.apply_changes({1: second, 3: None})
+
+    version, changes = cache.changes_since(start)
+    assert version == cache.get().version
+    assert changes == {1: second, 2: None, 3: None}
+    assert cache.changes_since(middle)[1] == {1: second, 3: None}
+    assert cache.changes_since(version) == (version, {})
+
+
+def test_unknown_version_needs_a_full_sync(cache):
+    assert cache.changes_since(1) is None
+
+
+def test_change_log_compaction(cache, source, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "CHANGE_LOG_ENTRIES", 2)
+    versions = [cache.get().version]
+    for record_id in (1, 2, 3):
+        cache.apply_changes({record_id: None})
+        versions.append(cache.get().version)
+
+    # Only the last two steps are kept
+    assert cache.changes_since(versions[0]) is None
+    assert cache.changes_since(versions[1]) == (versions[3], {2: None, 3: None})
+
+
+def test_oversized_change_clears_the_log(cache, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "CHANGE_LOG_ROWS", 2)
+    start = cache.get().version
+    cache.apply_changes({1: None, 2: None, 3: None})
+    assert cache.changes_since(start) is None
+
+
+@pytest.mark.parametrize("arrow", [False, True])
+def test_reload_is_diffed_into_the_log(source, arrow):
+    def load():
+        rows = copy.deepcopy(source["rows"])
+        return pa.Table.from_pylist(rows) if arrow else rows
+
+    cache = SnapshotCache(load)
+    start = cache.get().version
+    changed = dict(source["rows"][4], Skill_Name="Brand new skill")
+    added = dict(source["rows"][0], id=1000)
+    source["rows"] = [changed if r["id"] == 5 else r for r in source["rows"] if r["id"] != 9] + [added]
+
+    snapshot = cache.refresh()
+    assert snapshot.version != start
+    assert cache.changes_since(start)[1] == {5: changed, 9: None, 1000: added}
+    if arrow:
+        # The diff runs on the matrix stores, not on row dicts
+        assert snapshot._records is None
+
+
+def test_get_since_returns_delta(client, local_rows):
+    response = client.get("/api/manpower")
+    version = int(response.headers["X-Snapshot-Version"])
+    client.delete("/api/manpower/7")
+    updated = dict(local_rows[1], Band="Band 5")
+    assert client.put("/api/manpower/2", json=updated).status_code == 200
+
+    response = client.get(f"/api/manpower?since={version}")
+    assert response.headers["X-Sync"] == "delta"
+    body = response.json()
+    assert body["since"] == version
+    assert body["version"] == int(response.headers["X-Snapshot-Version"])
+    assert body["upserts"] == [updated]
+    assert body["deletes"] == [7]
+
+
+def test_get_since_falls_back_to_full_sync(client, local_rows):
+    response = client.get("/api/manpower?since=1")
+    assert response.headers["X-Sync"] == "full"
+    assert len(response.json()) == len(local_rows)
+
+
+def test_get_since_after_external_reload(client, local_rows):
+    version = int(client.get("/api/manpower").headers["X-Snapshot-Version"])
+    local_store.delete(11)
+    client.post("/api/admin/refresh-cache")
+
+    response = client.get(f"/api/manpower?since={version}")
+    assert response.headers["X-Sync"] == "delta"
+    assert response.json()["deletes"] == [11]
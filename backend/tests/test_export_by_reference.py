@@ -0,0 +1,70 @@
+import io
+
+import pytest
+
+import routers.pdf_export as pdf_export
+import snapshot
+from pdf_cache import PdfRenderCache
+from tests.test_pdf_engines import page_text
+
+
+@pytest.fixture(autouse=True)
+def scratch_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_export, "pdf_cache", PdfRenderCache(directory=str(tmp_path / "cache")))
+
+
+def current_version(client):
+    return int(client.get("/api/manpower").headers["X-Snapshot-Version"])
+
+
+def rename(client, row_id, skill):
+    response = client.patch("/api/manpower", json={"updates": [{"id": row_id, "Skill_Name": skill}], "deletes": []})
+    assert response.status_code == 200
+    return response.json()["version"]
+
+
+def export_text(client, body):
+    response = client.post("/api/export-pdf", json=dict(body, engine="canvas"))
+    assert response.status_code == 200, response.text
+    return page_text(io.BytesIO(response.content))
+
+
+def test_export_selects_rows_from_the_pinned_version(client, local_rows):
+    pinned = current_version(client)
+    row = local_rows[0]
+    filters = {"Band": [row["Band"]], "Function": [row["Function"]]}
+    rename(client, row["id"], "Renamed Skill")
+
+    assert "Renamed Skill" not in export_text(client, {"filters": filters, "snapshot_version": pinned})
+    assert "Renamed Skill" in export_text(client, {"filters": filters})
+
+
+def test_export_matches_the_rows_sent_by_the_client(client, local_rows):
+    filters = {"Band": ["Band 3"], "BU": ["BU1"]}
+    rows = [r for r in local_rows if r["Band"] == "Band 3" and r["BU"] == "BU1"]
+
+    by_reference = export_text(client, {"filters": filters, "snapshot_version": current_version(client)})
+    by_value = export_text(client, {"filters": filters, "data": rows})
+
+    # Only the generation timestamp may differ
+    strip = lambda text: text.split("Generated")[0]
+    assert strip(by_reference) == strip(by_value)
+
+
+def test_evicted_version_answers_409_with_the_current_version(client, local_rows):
+    pinned = current_version(client)
+    for i in range(snapshot.SNAPSHOT_HISTORY + 1):
+        latest = rename(client, local_rows[0]["id"], f"Skill edit {i}")
+
+    response = client.post("/api/export-pdf", json={"filters": {}, "snapshot_version": pinned})
+    assert response.status_code == 409
+    assert response.headers["X-Snapshot-Version"] == str(latest)
+
+
+@pytest.mark.parametrize("body, status", [
+    ({"filters": {}, "snapshot_version": "latest"}, 400),
+    ({"filters": {"Band": ["No such band"]}}, 400),
+    ({"filters": {"Nope": ["x"]}}, 400),
+])
+def test_bad_references_are_rejected(client, body, status):
+    assert client.post("/api/export-pdf", json=body).status_code == status
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import export_jobs as export_jobs_module
+import routers.pdf_export as pdf_export
+from export_jobs import ExportJobManager, DONE, FAILED
+from pdf_cache import PdfRenderCache
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs_module, "EXPORT_JOB_DIR", str(tmp_path / "jobs"))
+    manager = ExportJobManager(ttl_seconds=60, sweep_seconds=3600)
+    monkeypatch.setattr(pdf_export, "export_jobs", manager)
+    monkeypatch.setattr(pdf_export, "pdf_cache", PdfRenderCache(directory=str(tmp_path / "cache")))
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture
+def live_client(local_rows, jobs):
+    """A client whose event loop outlives each request, so background jobs keep running."""
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+def wait_for(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f"/api/export-jobs/{job_id}").json()
+        if status["status"] in (DONE, FAILED):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"export job {job_id} did not finish")
+
+
+def test_job_runs_in_the_background_and_reports_progress(live_client):
+    body = {"filters": {"Band": ["Band 3", "Band 4"]}, "engine": "canvas"}
+    response = live_client.post("/api/export-jobs", json=body)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.json()["status_url"] == f"/api/export-jobs/{job_id}"
+
+    status = wait_for(live_client, job_id)
+    assert status["status"] == DONE, status["error"]
+    assert status["progress"]["bands_total"] == status["progress"]["bands_done"] == 2
+    assert status["progress"]["pages"] >= 1
+
+    download = live_client.get(status["download_url"])
+    assert download.status_code == 200
+    assert download.content.startswith(b"%PDF")
+    assert len(download.content) == status["size"]
+
+
+def test_identical_submissions_share_a_job(live_client):
+    body = {"filters": {"Band": ["Band 5"]}, "engine": "canvas"}
+    first = live_client.post("/api/export-jobs", json=body).json()["job_id"]
+    second = live_client.post("/api/export-jobs", json=body).json()["job_id"]
+    assert first == second
+    wait_for(live_client, first)
+    # Still the same job once it is done (and the render is cached)
+    assert live_client.post("/api/export-jobs", json=body).json()["job_id"] == first
+
+    other = live_client.post("/api/export-jobs", json=dict(body, filters={"Band": ["Band 4"]})).json()["job_id"]
+    assert other != first
+
+
+def test_unknown_and_unfinished_jobs(live_client, jobs):
+    assert live_client.get("/api/export-jobs/nope").status_code == 404
+    assert live_client.get("/api/export-jobs/nope/download").status_code == 404
+
+    async def never_done(job):
+        await asyncio.sleep(60)
+
+    async def submit():
+        return jobs.submit("stuck", never_done)[0]
+
+    job = live_client.portal.call(submit)
+    assert live_client.get(f"/api/export-jobs/{job.id}/download").status_code == 409
+
+
+def test_failed_job_is_retried_on_resubmit(jobs):
+    async def fail(job):
+        raise RuntimeError("render blew up")
+
+    async def succeed(job):
+        return b"%PDF-1.4 ok"
+
+    async def run():
+        failed, _ = jobs.submit("key", fail)
+        await asyncio.sleep(0.05)
+        retried, created = jobs.submit("key", succeed)
+        await asyncio.sleep(0.05)
+        return failed, retried, created
+
+    failed, retried, created = asyncio.run(run())
+    assert (failed.status, failed.error) == (FAILED, "render blew up")
+    assert created and retried.id != failed.id
+    assert retried.status == DONE
+    with open(retried.path, "rb") as f:
+        assert f.read() == b"%PDF-1.4 ok"
+
+
+def test_sweep_forgets_expired_jobs_and_their_files(jobs):
+    async def run():
+        job = jobs.complete("key", b"%PDF-1.4 done")
+        await asyncio.sleep(0.05)
+        return job
+
+    job = asyncio.run(run())
+    assert os.path.exists(job.path)
+    assert jobs.sweep() == 0
+
+    job.expires_at = time.time() - 1
+    assert jobs.get(job.id) is None
+    assert jobs.sweep() == 1
+    assert not os.path.exists(job.path)
+    assert jobs.stats()["expired"] == 1
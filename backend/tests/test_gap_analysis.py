@@ -0,0 +1,123 @@
+import io
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import SnapshotAnalytics
+from gap_analysis import compute_gaps, load_assessments
+from matrix_store import MatrixStore
+
+
+def reference_gaps(matrix, assessments, by_band):
+    """Row-by-row version of compute_gaps: (report rows, summary counts)."""
+    def role_of(row):
+        return (row["UJR_in_UJR_Master"], row["Band"]) if by_band else row["UJR_in_UJR_Master"]
+
+    required = {}
+    for row in matrix:
+        skills = required.setdefault(role_of(row), {})
+        skills[row["Skill_Name"]] = max(skills.get(row["Skill_Name"], 0), row["Proficiency_Level"])
+
+    roles, ratings = {}, {}
+    for row in assessments.to_dict("records"):
+        roles.setdefault(row["Employee_ID"], role_of(row))
+        level = row["Current_Proficiency"]
+        if level == level:  # not NaN
+            key = (row["Employee_ID"], row["Skill_Name"])
+            ratings[key] = max(ratings.get(key, level), level)
+
+    rows, unknown = [], 0
+    for employee, role in roles.items():
+        if role not in required:
+            unknown += 1
+            continue
+        report = []
+        for skill, level in required[role].items():
+            assessed = (employee, skill) in ratings
+            current = int(ratings[(employee, skill)]) if assessed else 0
+            report.append((employee, skill, level, current, assessed, level - current))
+        rows += sorted(report, key=lambda r: (-r[5], r[1]))
+    summary = {
+        "employees": len(roles),
+        "matched_employees": len(roles) - unknown,
+        "unknown_role_employees": unknown,
+        "required_skills": len(rows),
+        "assessed": sum(r[4] for r in rows),
+        "gaps": sum(r[5] > 0 for r in rows),
+        "total_gap": sum(max(r[5], 0) for r in rows),
+    }
+    return rows, summary
+
+
+def make_assessments(matrix, employees, by_band, seed=5):
+    rng = random.Random(seed)
+    roles = sorted({(r["UJR_in_UJR_Master"], r["Band"]) for r in matrix})
+    skills = sorted({r["Skill_Name"] for r in matrix})
+    rows = []
+    for i in range(employees):
+        employee = f"E{i:04d}"
+        ujr, band = rng.choice(roles) if i % 10 else ("UJR99999", "Band 1A")  # every 10th has an unknown role
+        for skill in rng.sample(skills, 8):
+            level = rng.choice([0, 1, 2, 3, 4, 5, np.nan])
+            rows.append({"Employee_ID": employee, "UJR_in_UJR_Master": ujr, "Band": band,
+                         "Skill_Name": skill, "Current_Proficiency": level})
+        # Rated twice (the higher rating counts), and a later row naming another role (ignored)
+        rows.append(dict(rows[-1], Current_Proficiency=5))
+        rows.append(dict(rows[-1], UJR_in_UJR_Master=roles[0][0]))
+    frame = pd.DataFrame(rows).sample(frac=1, random_state=seed).reset_index(drop=True)
+    # Employees in order of first appearance, as compute_gaps reports them
+    frame = frame.iloc[np.argsort(pd.factorize(frame["Employee_ID"])[0], kind="stable")].reset_index(drop=True)
+    return frame if by_band else frame.drop(columns="Band")
+
+
+@pytest.mark.parametrize("by_band", [False, True])
+def test_compute_gaps_matches_reference(make_rows, by_band):
+    matrix = make_rows(400)
+    requirements = SnapshotAnalytics(1, MatrixStore.from_records(matrix)).role_requirements(by_band=by_band)
+    assessments = make_assessments(matrix, 120, by_band)
+
+    gaps, summary = compute_gaps(assessments, requirements)
+    expected_rows, expected_summary = reference_gaps(matrix, assessments, by_band)
+
+    columns = ["Employee_ID", "Skill_Name", "Required_Proficiency", "Current_Proficiency", "Assessed", "Gap"]
+    actual = [(e, s, int(r), int(c), bool(a), int(g)) for e, s, r, c, a, g in gaps[columns].itertuples(index=False)]
+    assert actual == expected_rows
+    assert {k: summary[k] for k in expected_summary} == expected_summary
+    assert summary["joined_on"] == (["UJR_in_UJR_Master", "Band", "Skill_Name"] if by_band
+                                    else ["UJR_in_UJR_Master", "Skill_Name"])
+
+
+def test_compute_gaps_with_no_known_roles(make_rows):
+    requirements = SnapshotAnalytics(1, MatrixStore.from_records(make_rows(50))).role_requirements()
+    assessments = pd.DataFrame({"Employee_ID": ["E1"], "UJR_in_UJR_Master": ["nope"], "Skill_Name": ["Skill 1"],
+                                "Current_Proficiency": [3.0]})
+    gaps, summary = compute_gaps(assessments, requirements)
+    assert len(gaps) == 0
+    assert summary["unknown_role_employees"] == 1 and summary["unknown_role_sample"] == ["E1"]
+
+
+def test_load_assessments_csv_keeps_ids_and_flags_bad_ratings():
+    upload = io.BytesIO("employee id,UJR,Skill,Rating\n00123,UJR00001,Skill 1,3\n00123,UJR00001,Skill 2,high\n"
+                        "00124,UJR00001,Skill 1,\n".encode("utf-8-sig"))
+    frame = load_assessments(upload, "upload.csv")
+    assert frame["Employee_ID"].tolist() == ["00123", "00123", "00124"]
+    assert frame["Current_Proficiency"].tolist()[0] == 3
+    assert frame["Current_Proficiency"].isna().tolist() == [False, True, True]
+    assert frame.attrs["invalid_ratings"] == 1
+
+
+def test_gap_analysis_endpoint_streams_reports(client, local_rows):
+    ujr = local_rows[0]["UJR_in_UJR_Master"]
+    upload = f"Employee_ID,UJR_in_UJR_Master,Skill_Name,Current_Proficiency\nE1,{ujr},{local_rows[0]['Skill_Name']},1\n"
+    response = client.post("/api/gap-analysis?only_gaps=false",
+                           files={"file": ("upload.csv", upload.encode("utf-8"), "text/csv")})
+
+    assert response.status_code == 200
+    assert response.headers["X-Gap-Employees"] == "1"
+    summary, *reports = [json.loads(line) for line in response.text.splitlines()]
+    assert summary["type"] == "summary" and summary["matched_employees"] == 1
+    assert summary["version"] == int(response.headers["X-Snapshot-Version"])
+    assert len(reports) == 1
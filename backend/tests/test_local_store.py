@@ -0,0 +1,25 @@
+import json
+
+from local_store import LocalStore
+
+
+def test_legacy_json_is_imported_once(tmp_path, make_rows):
+    rows = make_rows(20)
+    legacy = tmp_path / "mock_db.json"
+    legacy.write_text(json.dumps(rows), encoding="utf-8")
+    path = str(tmp_path / "store.sqlite3")
+
+    store = LocalStore(path, legacy_json=str(legacy))
+    assert store.all() == rows
+    store.delete(1)
+
+    # A restart doesn't import the file again over the edits
+    assert LocalStore(path, legacy_json=str(legacy)).all() == rows[1:]
+
+
+def test_replace_all_swaps_the_table(tmp_path, make_rows):
+    store = LocalStore(str(tmp_path / "store.sqlite3"), legacy_json=str(tmp_path / "missing.json"))
+    store.replace_all(make_rows(10))
+    replacement = make_rows(5, seed=2)
+    store.replace_all(replacement)
+    assert store.all() == replacement
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+from matrix_store import MatrixStore, INDEXED_COLUMNS
+from snapshot import apply_overlay
+
+
+def assert_same_store(store, expected):
+    """Same rows in the same order, and every bitmap selects the same rows."""
+    assert store.ids.tolist() == expected.ids.tolist()
+    assert store.rows(np.arange(store.size)) == expected.rows(np.arange(expected.size))
+    for column in INDEXED_COLUMNS:
+        for value in set(store.columns[column].values) | set(expected.columns[column].values):
+            assert np.array_equal(store.value_mask(column, [value]), expected.value_mask(column, [value])), (column, value)
+
+
+@pytest.fixture
+def rows(make_rows):
+    return make_rows(300)
+
+
+def test_with_changes_updates_slots_and_bitmaps(rows):
+    store = MatrixStore.from_records(rows)
+    changes = {
+        5: dict(rows[4], Band="Band 5", Function="HR"),
+        40: dict(rows[39], Proficiency_Level=1 if rows[39]["Proficiency_Level"] != 1 else 2),
+        41: dict(rows[40], Band="Band 9"),  # value not in the dictionary yet
+    }
+    patched = store.with_changes(changes)
+
+    assert_same_store(patched, MatrixStore.from_records(apply_overlay(rows, changes)))
+    assert patched.count(patched.value_mask("Band", ["Band 9"])) == 1
+    assert patched.indices(patched.mask({"Band": ["Band 9"]})).tolist() == [40]
+
+
+def test_with_changes_leaves_the_original_store_alone(rows):
+    store = MatrixStore.from_records(rows)
+    before = store.rows(np.arange(store.size))
+    masks = {band: store.value_mask("Band", [band]).copy() for band in store.columns["Band"].values}
+
+    store.with_changes({1: dict(rows[0], Band="Band 9"), 2: None})
+
+    assert store.rows(np.arange(store.size)) == before
+    for band, mask in masks.items():
+        assert np.array_equal(store.value_mask("Band", [band]), mask)
+
+
+def test_with_changes_deletes_rows(rows):
+    store = MatrixStore.from_records(rows)
+    changes = {3: None, 150: None, 7: dict(rows[6], Function="Finance")}
+    patched = store.with_changes(changes)
+
+    assert len(patched) == len(rows) - 2
+    assert 3 not in patched.ids and 150 not in patched.ids
+    assert_same_store(patched, MatrixStore.from_records(apply_overlay(rows, changes)))
+    assert patched.slots([3, 150]).tolist() == []
+    assert patched.ids[patched.slots([7])].tolist() == [7]
+
+
+def test_with_changes_ignores_unknown_ids(rows):
+    store = MatrixStore.from_records(rows)
+    assert store.with_changes({10_000: None, 10_001: dict(rows[0], id=10_001)}) is store
+
+
+def test_diff_matches_a_row_by_row_comparison(rows):
+    new = [dict(r) for r in rows[10:]]  # ids 1..10 deleted
+    new[0]["Band"] = "Band 9"
+    new[5]["Proficiency_Level"] = new[5]["Proficiency_Level"] % 5 + 1
+    new.append(dict(rows[0], id=5000))
+    new.reverse()
+
+    before = {r["id"]: r for r in rows}
+    expected = {r["id"]: r for r in new if before.pop(r["id"], None) != r}
+    expected.update({record_id: None for record_id in before})
+
+    assert MatrixStore.from_records(rows).diff(MatrixStore.from_records(new)) == expected
+    assert MatrixStore.from_records(rows).diff(MatrixStore.from_records(rows)) == {}
+
+
+def scan(rows, filters):
+    return [r for r in rows if all(r[c] in values for c, values in filters.items() if values)]
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"Band": ["Band 3"]},
+    {"Band": ["Band 3", "Band 4"], "Function": ["HR", "Sales"]},
+    {"Skill_Name": ["Skill 7", "Skill 8"], "Band": ["Band 1A"]},  # Skill_Name has no bitmaps
+    {"Proficiency_Level": [5], "Group": ["Raymond"], "Function": []},
+    {"Band": ["No such band"]},
+])
+def test_mask_matches_a_row_scan(rows, filters):
+    store = MatrixStore.from_records(rows)
+    mask = store.mask(filters)
+    assert store.rows(store.indices(mask)) == scan(rows, filters)
+    assert store.count(mask) == len(scan(rows, filters))
+
+
+def test_facet_counts_ignore_the_facets_own_selection(rows):
+    store = MatrixStore.from_records(rows)
+    selection = {"Band": ["Band 3"], "Function": ["HR", "Finance"]}
+    counts = store.facet_counts(selection, ["Band", "Function", "BU"])
+
+    def expected(facet):
+        others = {c: v for c, v in selection.items() if c != facet}
+        tally = {}
+        for r in scan(rows, others):
+            tally[r[facet]] = tally.get(r[facet], 0) + 1
+        return tally
+
+    assert counts == {facet: expected(facet) for facet in ("Band", "Function", "BU")}
+
+
+def test_group_by_keeps_slot_order(rows):
+    store = MatrixStore.from_records(rows)
+    indices = store.indices(store.mask({"Function": ["HR"]}))
+    groups = store.group_by("Band", indices)
+    assert sorted(groups, key=str) == sorted({r["Band"] for r in scan(rows, {"Function": ["HR"]})}, key=str)
+    for band, slots in groups.items():
+        assert [r["id"] for r in store.rows(slots)] == [r["id"] for r in scan(rows, {"Function": ["HR"], "Band": [band]})]
+
+
+def test_arrow_and_row_stores_agree(rows):
+    import pyarrow as pa
+
+    from_table = MatrixStore.from_table(pa.Table.from_pylist(rows))
+    assert_same_store(from_table, MatrixStore.from_records(rows))
+    assert from_table.rows(np.array([0, 5]), ["Band"]) == [{"id": r["id"], "Band": r["Band"]} for r in (rows[0], rows[5])]
+    assert from_table.slots([6, 1, 99_999]).tolist() == [0, 5]
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from db import bq_client
+
+
+def ndjson(response):
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize("request_kwargs", [
+    {"params": {"stream": "true"}},
+    {"headers": {"Accept": "application/x-ndjson"}},
+])
+def test_snapshot_streams_every_row(client, local_rows, request_kwargs):
+    response = client.get("/api/manpower", **request_kwargs)
+    assert ndjson(response) == local_rows
+    assert "X-Snapshot-Version" in response.headers
+
+
+def test_stream_applies_filters_projection_and_limit(client, local_rows):
+    response = client.get("/api/manpower", params={
+        "stream": "true", "Function": ["HR", "Sales"], "fields": "Function", "cursor": 20, "limit": 15,
+    })
+    expected = [{"id": r["id"], "Function": r["Function"]} for r in local_rows
+                if r["Function"] in ("HR", "Sales") and r["id"] > 20][:15]
+    assert ndjson(response) == expected
+
+
+def test_bigquery_pages_merge_buffered_edits_in_id_order(fake_bq):
+    rows = fake_bq.rows
+    bq_client.write_buffer.add_many({5: dict(rows[4], Band="Band 5"), 6: None, 41: dict(rows[40], Band="Band 5")})
+
+    pages = list(bq_client.stream_manpower_pages(fields=["Band"], limit=50, page_size=10))
+
+    assert all(len(page) <= 11 for page in pages)
+    streamed = [row for page in pages for row in page]
+    expected = [{"id": r["id"], "Band": "Band 5" if r["id"] in (5, 41) else r["Band"]}
+                for r in rows if r["id"] != 6][:50]
+    assert streamed == expected
+
+
+def test_cold_stream_is_answered_by_one_query(fake_bq):
+    from fastapi.testclient import TestClient
+    import main
+
+    response = TestClient(main.app).get("/api/manpower", params={"stream": "true", "Band": "Band 3"})
+    assert ndjson(response) == [r for r in fake_bq.rows if r["Band"] == "Band 3"]
+    assert len(fake_bq.queries) == 1
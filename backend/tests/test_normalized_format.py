@@ -0,0 +1,47 @@
+import json
+
+from snapshot import NORMALIZED_LOOKUPS, snapshot_cache
+
+
+def expand(payload):
+    """Rebuild row objects from the normalized wire format."""
+    fields, lookups = payload["fields"], payload["lookups"]
+    return [
+        {name: lookups[name][value] if name in NORMALIZED_LOOKUPS else value for name, value in zip(fields, row)}
+        for row in payload["rows"]
+    ]
+
+
+def by_id(rows):
+    return sorted(rows, key=lambda row: row["id"])
+
+
+def test_normalized_rows_expand_to_the_json_rows(client):
+    plain = client.get("/api/manpower").json()
+    response = client.get("/api/manpower?format=normalized")
+    payload = response.json()
+
+    assert response.status_code == 200
+    assert payload["version"] == int(response.headers["X-Snapshot-Version"])
+    assert set(payload["lookups"]) == set(NORMALIZED_LOOKUPS)
+    assert all(len(set(values)) == len(values) for values in payload["lookups"].values())
+    assert by_id(expand(payload)) == by_id(plain)
+
+
+def test_normalized_body_is_smaller(local_rows):
+    snapshot = snapshot_cache.get()
+    assert len(snapshot.body("identity", "normalized")) < len(snapshot.body("identity")) / 2
+    assert json.loads(snapshot.body("identity", "normalized")) == snapshot.normalized_payload()
+
+
+def test_normalized_rows_follow_edits(client, local_rows):
+    response = client.patch("/api/manpower", json={
+        "updates": [{"id": 1, "Skill_Name": "Brand new skill"}], "deletes": [2],
+    })
+    assert response.status_code == 200
+
+    payload = client.get("/api/manpower?format=normalized").json()
+    assert payload["version"] == response.json()["version"]
+    assert "Brand new skill" in payload["lookups"]["Skill_Name"]
+    assert by_id(expand(payload)) == by_id(client.get("/api/manpower").json())
+    assert 2 not in {row["id"] for row in expand(payload)}
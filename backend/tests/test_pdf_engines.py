@@ -0,0 +1,30 @@
+import re
+from datetime import datetime
+
+import pytest
+from pypdf import PdfReader
+
+import routers.pdf_export as pdf_export
+
+
+def page_text(pdf):
+    """All page text with whitespace collapsed (line breaks differ between extractions)."""
+    pdf.seek(0)
+    text = " ".join(page.extract_text() for page in PdfReader(pdf).pages)
+    return re.sub(r"\s+", " ", text)
+
+
+@pytest.mark.parametrize("value", ["R&D <b>bold</b> & stuff", "a < b > c &amp; d", "Tom's \"quoted\" skill"])
+def test_engines_print_skill_text_the_same(make_rows, value):
+    rows = make_rows(6)
+    rows[0].update(Skill_Name=value, Competency_Type="Functional")
+    rows[1].update(Skill_Definition=value, Competency_Type="Raymond Leadership Competency")
+    filters = {"Function": [value]}
+
+    generated_at = datetime(2024, 1, 1, 9, 30)
+    texts = {engine: page_text(render(rows, filters, generated_at))
+             for engine, render in pdf_export.PDF_ENGINES.items()}
+
+    for engine, text in texts.items():
+        assert text.count(value) == 3, engine
+    assert texts["canvas"] == texts["platypus"]
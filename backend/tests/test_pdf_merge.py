@@ -0,0 +1,59 @@
+import io
+import re
+from datetime import datetime
+
+import pytest
+from pypdf import PdfReader
+
+import routers.pdf_export as pdf_export
+
+
+def footers(reader):
+    """The "Page n" footer printed on each page, in page order."""
+    return [re.findall(r"Page (\d+)", page.extract_text()) for page in reader.pages]
+
+
+@pytest.mark.parametrize("engine", sorted(pdf_export.PDF_ENGINES))
+def test_merged_fragments_form_one_numbered_document(make_rows, tmp_path, engine):
+    rows = make_rows(120)
+    generated_at = datetime(2024, 1, 1, 9, 30)
+    paths, pages = [], 0
+    for i, (fragment, continued) in enumerate(pdf_export.plan_fragments(rows, 25)):
+        path = str(tmp_path / f"fragment{i}.pdf")
+        pages += pdf_export.render_fragment_file(fragment, {}, engine, continued, generated_at, path)
+        assert footers(PdfReader(path)) == [[] for _ in PdfReader(path).pages]
+        paths.append(path)
+    assert len(paths) > 2
+
+    output = io.BytesIO()
+    pdf_export.merge_pdf_fragments([open(p, "rb") for p in paths[:1]] + paths[1:], output)
+    output.seek(0)
+    reader = PdfReader(output, strict=True)
+
+    assert len(reader.pages) == pages
+    assert footers(reader) == [[str(n)] for n in range(1, pages + 1)]
+    # Every row made it through the merge
+    text = " ".join(page.extract_text() for page in reader.pages)
+    assert text.count("Ability in skill") == len(rows)
+
+
+def test_batched_render_matches_the_unbatched_one(make_rows, tmp_path, monkeypatch):
+    rows = make_rows(150)
+    whole = str(tmp_path / "whole.pdf")
+    pdf_export.render_pdf_file(rows, {}, whole, engine="canvas")
+
+    monkeypatch.setattr(pdf_export, "PDF_BATCH_ROWS", 20)
+    batched = str(tmp_path / "batched.pdf")
+    progress = {}
+    size = pdf_export.render_pdf_file(rows, {}, batched, progress, engine="canvas")
+
+    reader = PdfReader(batched, strict=True)
+    pages = len(reader.pages)
+    assert size == (tmp_path / "batched.pdf").stat().st_size
+    assert footers(reader) == [[str(n)] for n in range(1, pages + 1)]
+    assert progress["pages"] == pages
+    assert progress["bands_done"] == progress["bands_total"] == len({row["Band"] for row in rows})
+    # Batches start on new pages, so there can only be more pages, never fewer rows
+    assert pages >= len(PdfReader(whole).pages)
+    text = " ".join(page.extract_text() for page in reader.pages)
+    assert text.count("Ability in skill") == len(rows)
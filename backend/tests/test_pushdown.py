@@ -0,0 +1,77 @@
+import pytest
+
+from db import bq_client
+
+
+def params_of(params):
+    return {p.name: getattr(p, "values", getattr(p, "value", None)) for p in params}
+
+
+def test_query_binds_every_value_as_a_parameter(monkeypatch):
+    monkeypatch.setattr(bq_client, "table_ref", "project.dataset.manpower", raising=False)
+    sql, params = bq_client.build_manpower_query(
+        filters={"Band": ["Band 3", "x' OR '1'='1"], "Function": ["HR"]},
+        fields=["Skill_Name", "Band"], limit=25, after_id=100, exclude_ids=[7, 3],
+    )
+
+    assert sql == (
+        "SELECT `id`, `Skill_Name`, `Band` FROM `project.dataset.manpower` "
+        "WHERE `Function` IN UNNEST(@f3) AND `Band` IN UNNEST(@f4) AND id > @after_id "
+        "AND id NOT IN UNNEST(@exclude_ids) ORDER BY id LIMIT @limit"
+    )
+    assert params_of(params) == {
+        "f3": ["HR"], "f4": ["Band 3", "x' OR '1'='1"], "after_id": 100, "exclude_ids": [3, 7], "limit": 25,
+    }
+
+
+def test_unfiltered_query_selects_everything(monkeypatch):
+    monkeypatch.setattr(bq_client, "table_ref", "project.dataset.manpower", raising=False)
+    assert bq_client.build_manpower_query() == ("SELECT * FROM `project.dataset.manpower`", [])
+
+
+@pytest.mark.parametrize("kwargs", [{"filters": {"Skill_Name; --": ["x"]}}, {"fields": ["Band", "password"]}])
+def test_unknown_columns_are_rejected(monkeypatch, kwargs):
+    monkeypatch.setattr(bq_client, "table_ref", "project.dataset.manpower", raising=False)
+    with pytest.raises(ValueError):
+        bq_client.build_manpower_query(**kwargs)
+
+
+def test_pushed_down_slice_includes_buffered_edits(fake_bq):
+    rows = fake_bq.rows
+    hr = [r for r in rows if r["Function"] == "HR"]
+    moved_in = next(r for r in rows if r["Function"] != "HR")
+    bq_client.write_buffer.add_many({hr[0]["id"]: None, moved_in["id"]: dict(moved_in, Function="HR")})
+
+    data = bq_client.query_manpower_data({"Function": ["HR"]}, ["Function"], limit=1000)
+
+    expected = sorted([r["id"] for r in hr[1:]] + [moved_in["id"]])
+    assert [r["id"] for r in data] == expected
+    assert all(r == {"id": r["id"], "Function": "HR"} for r in data)
+    sql, params = fake_bq.queries[-1]
+    assert sorted(params["exclude_ids"]) == sorted([hr[0]["id"], moved_in["id"]])
+
+
+def test_cold_filtered_request_is_pushed_down(fake_bq):
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    pages, cursor = [], None
+    while True:
+        params = {"Band": "Band 3", "fields": "Band,Skill_Name", "limit": 10}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = client.get("/api/manpower", params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    rows = [row for page in pages for row in page]
+    assert [r["id"] for r in rows] == [r["id"] for r in fake_bq.rows if r["Band"] == "Band 3"]
+    assert all(set(r) == {"id", "Band", "Skill_Name"} for r in rows)
+    # Every page was its own query; nothing loaded the whole table
+    assert len(fake_bq.queries) == len(pages)
+    assert all("WHERE" in sql for sql, _ in fake_bq.queries)
+    assert client.get("/api/manpower", params={"fields": "nope"}).status_code == 400
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+import routers.pdf_export as pdf_export
+from pdf_cache import PdfRenderCache, make_key, new_spool_path
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PdfRenderCache(memory_bytes=1024 * 1024, disk_bytes=10 * 1024 * 1024, directory=str(tmp_path / "cache"))
+    monkeypatch.setattr(pdf_export, "pdf_cache", cache)
+    return cache
+
+
+def fake_render(calls, content=b"%PDF-1.4 fake"):
+    async def render():
+        calls.append(1)
+        await asyncio.sleep(0.05)  # long enough for concurrent callers to pile up
+        path = new_spool_path()
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+    return render
+
+
+def read_all(handles):
+    try:
+        return [handle.read() for handle in handles]
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def test_concurrent_identical_exports_render_once(cache):
+    calls = []
+    render = fake_render(calls)
+
+    async def run():
+        return await asyncio.gather(*(pdf_export.render_cached("key", render) for _ in range(5)))
+
+    assert read_all(asyncio.run(run())) == [b"%PDF-1.4 fake"] * 5
+    assert len(calls) == 1
+    assert pdf_export._inflight_exports == {}
+
+
+def test_repeat_export_is_a_cache_hit(cache):
+    calls = []
+    render = fake_render(calls)
+
+    first = asyncio.run(pdf_export.render_cached("key", render))
+    second = asyncio.run(pdf_export.render_cached("key", render))
+
+    assert read_all([first, second]) == [b"%PDF-1.4 fake"] * 2
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["memory_hits"] + stats["disk_hits"]) == (1, 1)
+
+
+def test_different_content_renders_separately(cache, make_rows):
+    rows = make_rows(10)
+    keys = {make_key(rows, {}), make_key(rows, {"Band": ["Band 3"]}), make_key(rows[:5], {}),
+            make_key(rows, {}, "canvas")}
+    assert len(keys) == 4
+    assert make_key(rows, {}) == make_key([dict(r) for r in rows], {})
+
+    calls = []
+    for key in keys:
+        read_all([asyncio.run(pdf_export.render_cached(key, fake_render(calls)))])
+    assert len(calls) == 4
+
+
+def test_failed_render_is_not_cached(cache):
+    async def fail():
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(pdf_export.render_cached("key", fail))
+    assert pdf_export._inflight_exports == {}
+
+    calls = []
+    read_all([asyncio.run(pdf_export.render_cached("key", fake_render(calls)))])
+    assert len(calls) == 1
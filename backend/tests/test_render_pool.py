@@ -0,0 +1,227 @@
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+
+import routers.pdf_export as pdf_export
+from routers.pdf_export import RenderPool, RenderPoolSaturated
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A thread-backed pool with room for two exports."""
+    pool = RenderPool(workers=0, max_queue=1)
+    monkeypatch.setattr(pdf_export, "render_pool", pool)
+    return pool
+
+
+def test_full_pool_turns_exports_away(pool):
+    async def run():
+        held = [await pool.admit(), await pool.admit()]
+        with pytest.raises(RenderPoolSaturated):
+            await pool.admit()
+        for admission in held:
+            admission.release()
+        (await pool.admit()).release()
+
+    asyncio.run(run())
+    assert pool.stats()["rejected"] == 1
+    assert pool.active == 0
+
+
+def test_waiting_exports_get_slots_in_order(pool):
+    async def run():
+        held = [await pool.admit(), await pool.admit()]
+        order = []
+
+        async def waiter(name):
+            admission = await pool.admit(wait=True)
+            order.append(name)
+            admission.release()
+
+        waiters = [asyncio.ensure_future(waiter(name)) for name in "abc"]
+        await asyncio.sleep(0)
+        assert pool.stats()["waiting"] == 3
+        held[0].release()
+        await asyncio.wait_for(asyncio.gather(*waiters), 1)
+        held[1].release()
+        return order
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+    assert pool.active == 0
+
+
+def test_cancelled_waiter_passes_its_slot_on(pool):
+    async def run():
+        held = [await pool.admit(), await pool.admit()]
+        first = asyncio.ensure_future(pool.admit(wait=True))
+        second = asyncio.ensure_future(pool.admit(wait=True))
+        await asyncio.sleep(0)
+        first.cancel()
+        held[0].release()
+        admission = await asyncio.wait_for(second, 1)
+        admission.release()
+        held[1].release()
+
+    asyncio.run(run())
+    assert pool.active == 0
+    assert pool.stats()["waiting"] == 0
+
+
+def test_parallel_export_takes_one_slot(pool, monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_export, "PDF_PARALLEL_MAX_FRAGMENTS", 2)
+    monkeypatch.setattr(pdf_export, "plan_fragments", lambda data: [([row], i > 0) for i, row in enumerate(data)])
+    lock = threading.Lock()
+    seen = {"running": 0, "max_running": 0, "max_active": 0}
+
+    def fake_fragment(rows, filters, engine, continued, generated_at, path):
+        with lock:
+            seen["running"] += 1
+            seen["max_running"] = max(seen["max_running"], seen["running"])
+            seen["max_active"] = max(seen["max_active"], pool.active)
+        time.sleep(0.02)
+        with open(path, "wb") as f:
+            f.write(b"fragment")
+        with lock:
+            seen["running"] -= 1
+        return 1
+
+    def fake_merge(paths, path):
+        with open(path, "wb") as f:
+            f.write(b"".join(open(p, "rb").read() for p in paths))
+
+    monkeypatch.setattr(pdf_export, "render_fragment_file", fake_fragment)
+    monkeypatch.setattr(pdf_export, "merge_pdf_fragments", fake_merge)
+
+    async def run():
+        progress = {}
+        await pdf_export.render_parallel([{"id": i} for i in range(8)], {}, "canvas", str(tmp_path / "out.pdf"),
+                                         progress)
+        # The other slot stayed free throughout
+        (await pool.admit()).release()
+        return progress
+
+    progress = asyncio.run(run())
+    assert progress == {"fragments_total": 8, "fragments_done": 8, "pages": 8}
+    assert (tmp_path / "out.pdf").read_bytes() == b"fragment" * 8
+    assert seen["max_active"] == 1
+    assert seen["max_running"] <= 2
+    assert pool.active == 0
+
+
+def test_batch_zip_cleans_up_when_the_client_goes_away(pool, monkeypatch):
+    monkeypatch.setattr(pdf_export, "PDF_BATCH_CONCURRENCY", 3)
+    handles, cancelled = [], []
+
+    async def fake_render_cached(key, render):
+        if "slow" in key:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(key)
+                raise
+        handle = io.BytesIO(b"%PDF-1.4 " + key.encode())
+        handles.append(handle)
+        return handle
+
+    monkeypatch.setattr(pdf_export, "render_cached", fake_render_cached)
+    monkeypatch.setattr(pdf_export, "make_key", lambda rows, filters, label: rows[0]["key"])
+    slices = [(name, [{"key": name}]) for name in ("a", "b", "slow")]
+
+    async def run():
+        admission = await pool.admit()
+        stream = pdf_export.stream_batch_zip(slices, "BU", {}, "canvas", "canvas", admission)
+        chunk = b""
+        while not chunk:
+            chunk = await stream.__anext__()
+        await asyncio.sleep(0.01)  # let the other fast slice finish too
+        await stream.aclose()
+
+    asyncio.run(run())
+    assert cancelled == ["slow"]
+    assert len(handles) == 2 and all(handle.closed for handle in handles)
+    assert pool.active == 0
+
+
+def test_render_stops_when_its_last_waiter_leaves(monkeypatch):
+    cancelled = []
+
+    async def render():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def run():
+        waiters = [asyncio.ensure_future(pdf_export.render_cached("never-cached", render)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled
+        waiters[1].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert cancelled == [1]
+    assert pdf_export._inflight_exports == {}
+
+
+def test_concurrent_admissions_never_overbook(pool):
+    admitted, rejected = [], []
+    start = threading.Barrier(8)
+
+    def admit():
+        start.wait()
+        try:
+            admitted.append(asyncio.run(pool.admit()))
+        except RenderPoolSaturated:
+            rejected.append(1)
+
+    threads = [threading.Thread(target=admit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (len(admitted), len(rejected)) == (pool.capacity, 8 - pool.capacity)
+    for admission in admitted:
+        admission.release()
+    assert pool.active == 0
+
+
+@pytest.fixture
+def saturated(pool, tmp_path, monkeypatch):
+    """Every slot of the pool taken by exports that are still running."""
+    from pdf_cache import PdfRenderCache
+
+    monkeypatch.setattr(pdf_export, "pdf_cache", PdfRenderCache(directory=str(tmp_path / "cache")))
+    held = [asyncio.run(pool.admit()) for _ in range(pool.capacity)]
+    yield pool
+    for admission in held:
+        admission.release()
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/export-pdf", {"filters": {}}),
+    ("/api/export-pdf", {"filters": {}, "parallel": True}),
+    ("/api/export-pdf/batch", {"partition": "BU", "filters": {}}),
+])
+def test_saturated_pool_answers_429_with_retry_after(client, saturated, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(pdf_export.PDF_RETRY_AFTER_SECONDS)
+    assert saturated.active == saturated.capacity
+
+
+def test_export_releases_its_slot(client, pool, tmp_path, monkeypatch):
+    from pdf_cache import PdfRenderCache
+
+    monkeypatch.setattr(pdf_export, "pdf_cache", PdfRenderCache(directory=str(tmp_path / "cache")))
+    response = client.post("/api/export-pdf", json={"filters": {"Band": ["Band 3"]}, "engine": "canvas"})
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    assert pool.active == 0
+    assert pool.stats()["completed"] == 1
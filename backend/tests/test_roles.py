@@ -0,0 +1,19 @@
+import pytest
+
+from local_store import local_store
+from snapshot import snapshot_cache
+
+
+@pytest.mark.parametrize("ujr", ["UJR 00001/A", "R&D?#1", "50%"])
+def test_role_urls_are_escaped(client, local_rows, ujr):
+    local_store.replace_all([dict(row, UJR_in_UJR_Master=ujr) if row["id"] <= 3 else row for row in local_rows])
+    snapshot_cache.invalidate()
+
+    roles = client.get("/api/roles", params={"limit": 200}).json()["roles"]
+    url = next(role["url"] for role in roles if role["ujr"] == ujr)
+    assert "/" not in url[len("/api/roles/"):]
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.json()["ujr"] == ujr
+    assert {skill["id"] for skill in response.json()["functional"] + response.json()["leadership"]} == {1, 2, 3}
@@ -0,0 +1,70 @@
+import threading
+
+from db import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["rows"]
+
+    def caller():
+        results.append(flight.do("manpower:all", fetch))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    while flight.stats()["in_flight"] == 0:
+        pass
+    followers = [threading.Thread(target=caller) for _ in range(7)]
+    for thread in followers:
+        thread.start()
+    while flight.stats()["coalesced"] < 7:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    stats = flight.stats()
+    assert (stats["executions"], stats["coalesced"], stats["in_flight"]) == (1, 7, 0)
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fail():
+        release.wait(5)
+        raise RuntimeError("query failed")
+
+    def caller():
+        try:
+            flight.do("key", fail)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["executions"] + flight.stats()["coalesced"] < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 4
+
+    # The next call runs again instead of replaying the failure
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert [flight.do(key, lambda key=key: key) for key in ("a", "b", "a")] == ["a", "b", "a"]
+    assert flight.stats()["executions"] == 3
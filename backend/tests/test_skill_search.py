@@ -0,0 +1,98 @@
+from collections import Counter
+
+import pytest
+
+from skill_index import tokenize
+
+FIELDS = ("Skill_Name", "Skill_Definition", "Job_Role_Name_without_concat")
+
+
+def scan(rows, query, bands=None, functions=None, prefix=True):
+    """Skill name -> matching rows (in scope), by brute force over the rows."""
+    terms = {}
+    for row in rows:
+        terms.setdefault(row["Skill_Name"], set()).update(t for f in FIELDS for t in tokenize(row[f]))
+    tokens = tokenize(query)
+
+    def matches(skill_terms):
+        for i, token in enumerate(tokens):
+            if prefix and i == len(tokens) - 1:
+                if not any(term.startswith(token) for term in skill_terms):
+                    return False
+            elif token not in skill_terms:
+                return False
+        return bool(tokens)
+
+    hits = {}
+    for row in rows:
+        if not matches(terms[row["Skill_Name"]]):
+            continue
+        if (bands and row["Band"] not in bands) or (functions and row["Function"] not in functions):
+            continue
+        hits.setdefault(row["Skill_Name"], []).append(row)
+    return hits
+
+
+def search(client, **params):
+    response = client.get("/api/skills/search", params=dict(params, limit=100, max_roles=1000))
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("params", [
+    {"q": "skill 1"},
+    {"q": "ability skill 2", "prefix": False},
+    {"q": "hr role"},
+    {"q": "skill", "Band": ["Band 3", "Band 4"]},
+    {"q": "skill 3", "Function": ["Sales"], "Band": ["Band 1A"]},
+    {"q": "nothing like this"},
+])
+def test_search_matches_a_row_scan(client, local_rows, params):
+    body = search(client, **params)
+    expected = scan(local_rows, params["q"], params.get("Band"), params.get("Function"), params.get("prefix", True))
+
+    assert body["total"] == len(expected)
+    assert {r["skill"] for r in body["results"]} == set(expected)
+    for result in body["results"]:
+        rows = expected[result["skill"]]
+        roles = Counter(row["Job_Role_Name_without_concat"] for row in rows)
+        assert result["rows"] == len(rows)
+        assert {r["role"]: r["rows"] for r in result["roles"]} == roles
+        assert result["role_count"] == len(roles)
+        assert result["bands"] == sorted({row["Band"] for row in rows})
+        assert result["functions"] == sorted({row["Function"] for row in rows})
+
+
+def test_whole_name_matches_rank_first(client, local_rows):
+    results = search(client, q="Skill 12")["results"]
+    assert results[0]["skill"] == "Skill 12"
+    scores = [r["score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_limit_and_max_roles(client, local_rows):
+    body = client.get("/api/skills/search", params={"q": "skill", "limit": 3, "max_roles": 1}).json()
+    assert len(body["results"]) == 3
+    assert body["total"] == len(scan(local_rows, "skill"))
+    assert all(len(r["roles"]) == 1 and r["role_count"] >= 1 for r in body["results"])
+
+
+def test_search_follows_edits(client, local_rows):
+    row = local_rows[0]
+    response = client.patch("/api/manpower", json={"updates": [{"id": row["id"], "Skill_Name": "Quantum Basket Weaving"}],
+                                                   "deletes": []})
+    assert response.status_code == 200
+    rows = [dict(r, Skill_Name="Quantum Basket Weaving") if r["id"] == row["id"] else r for r in local_rows]
+
+    body = search(client, q="quantum bask")
+    assert [(r["skill"], r["rows"]) for r in body["results"]] == [("Quantum Basket Weaving", 1)]
+    old = search(client, q=row["Skill_Name"], prefix=False)
+    assert {r["skill"]: r["rows"] for r in old["results"]} == {
+        skill: len(hits) for skill, hits in scan(rows, row["Skill_Name"], prefix=False).items()
+    }
+
+
+def test_unchanged_results_revalidate_with_304(client, local_rows):
+    first = client.get("/api/skills/search", params={"q": "skill"})
+    again = client.get("/api/skills/search", params={"q": "skill"}, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,106 @@
+import copy
+import threading
+
+import pytest
+
+from snapshot import SnapshotCache, SNAPSHOT_HISTORY
+
+
+@pytest.fixture
+def source(make_rows):
+    return {"rows": make_rows(50), "loads": 0}
+
+
+def make_cache(source, **kwargs):
+    def load():
+        source["loads"] += 1
+        return copy.deepcopy(source["rows"])
+    return SnapshotCache(load, **kwargs)
+
+
+def test_fresh_snapshot_is_served_from_memory(source):
+    cache = make_cache(source, ttl=60, max_stale=60)
+    first = cache.get()
+    assert cache.get() is first
+    assert source["loads"] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_stale_snapshot_is_served_while_it_refreshes(source):
+    cache = make_cache(source, ttl=60, max_stale=60)
+    first = cache.get()
+    first.loaded_at -= 90  # past the TTL, within the stale window
+    source["rows"][0]["Band"] = "Band 5"
+
+    assert cache.get() is first
+    for thread in threading.enumerate():
+        if thread.name == "snapshot-refresh":
+            thread.join(5)
+    assert cache.get().version > first.version
+    assert cache.get().find([1])[1]["Band"] == "Band 5"
+
+
+def test_expired_snapshot_blocks_on_a_reload(source):
+    cache = make_cache(source, ttl=60, max_stale=60)
+    first = cache.get()
+    first.loaded_at -= 500
+    source["rows"][0]["Band"] = "Band 5"
+    assert cache.get().version > first.version
+    assert source["loads"] == 2
+
+
+def test_unchanged_reload_keeps_the_version(source):
+    cache = make_cache(source)
+    first = cache.get()
+    assert cache.refresh() is first
+    assert cache.refresh().etag == first.etag == f'"v{first.version}"'
+
+
+def test_failed_reload_keeps_serving_the_last_snapshot(make_rows):
+    rows = make_rows(10)
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("BigQuery is down")
+        return rows
+
+    cache = SnapshotCache(load)
+    first = cache.get()
+    assert cache.refresh() is first
+    assert cache.load_errors == 1
+
+
+def test_recent_versions_stay_addressable(source):
+    cache = make_cache(source)
+    versions = [cache.get().version]
+    for n in range(SNAPSHOT_HISTORY + 1):
+        versions.append(cache.apply_changes({n + 1: None}).version)
+
+    assert cache.get_version(versions[-1]) is cache.get()
+    for version in versions[-SNAPSHOT_HISTORY:]:
+        assert cache.get_version(version).version == version
+    for version in versions[:-SNAPSHOT_HISTORY]:
+        assert cache.get_version(version) is None
+    assert cache.get_version(versions[-2]).num_rows == cache.get().num_rows + 1
+
+
+def test_etag_revalidation(client):
+    first = client.get("/api/manpower")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["X-Snapshot-Version"] == etag.strip('"v')
+
+    cached = client.get("/api/manpower", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert client.get("/api/manpower", headers={"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+
+    row = dict(first.json()[0], Band="Band 5")
+    assert client.put(f"/api/manpower/{row['id']}", json=row).status_code == 200
+    changed = client.get("/api/manpower", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()[0] == row
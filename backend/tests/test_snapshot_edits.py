@@ -0,0 +1,46 @@
+import pyarrow as pa
+
+from role_index import RoleIndex
+from skill_index import SkillIndex
+from snapshot import SnapshotCache, apply_overlay
+
+
+def test_edits_to_an_arrow_snapshot_are_not_decoded(make_rows):
+    rows = make_rows(100)
+    cache = SnapshotCache(lambda: pa.Table.from_pylist(rows))
+    before = cache.get()
+    edited = dict(rows[4], Band="Band 5", Skill_Name="Negotiation")
+    after = cache.apply_changes({5: edited, 6: None})
+
+    assert before._records is None and after._records is None
+    assert after.num_rows == 99
+    assert after.find([5, 6]) == {5: edited}
+    assert after.records == apply_overlay(rows, {5: edited, 6: None})
+
+
+def test_edits_leave_the_previous_versions_indexes_alone(make_rows):
+    rows = make_rows(200)
+    cache = SnapshotCache(lambda: [dict(row) for row in rows])
+    before = cache.get()
+    # Held the way a request that started before the edit holds them
+    skills, roles = before.skill_index, before.role_index
+    skills_before = skills.search("skill")
+    ujr = rows[0]["UJR_in_UJR_Master"]
+    profile_before = roles.get(ujr)
+    roles_before = roles.page(limit=1000)
+
+    renamed = dict(rows[0], Skill_Name="Quantum Negotiation", UJR_in_UJR_Master="UJR99999")
+    after = cache.apply_changes({1: renamed, 2: None})
+
+    assert after.skill_index is not skills and after.role_index is not roles
+    # Readers still on the old version see it exactly as it was
+    assert skills.search("skill") == skills_before
+    assert skills.search("quantum")["total"] == 0
+    assert roles.get(ujr) == profile_before
+    assert roles.page(limit=1000) == roles_before
+    # The new version matches indexes built from scratch
+    fresh_skills, fresh_roles = SkillIndex(after.store), RoleIndex(after.store)
+    for query in ("skill", "quantum", "negotiation"):
+        assert after.skill_index.search(query) == fresh_skills.search(query)
+    assert after.role_index.page(limit=1000) == fresh_roles.page(limit=1000)
+    assert after.role_index.get("UJR99999") == fresh_roles.get("UJR99999")
@@ -0,0 +1,116 @@
+import pytest
+
+from db import BigQueryClient, WriteBuffer, bq_client
+from local_store import local_store
+
+
+@pytest.fixture
+def buffer():
+    # Long interval: the background timer never fires during a test
+    return WriteBuffer(bq_client, interval=3600, batch_size=1000)
+
+
+def test_overlay_shows_pending_edits(buffer):
+    buffer.upsert(1, {"id": 1, "Band": "Band 3"})
+    buffer.delete(2)
+    buffer.add_many({1: {"id": 1, "Band": "Band 4"}, 3: None})
+
+    assert buffer.overlay() == {1: {"id": 1, "Band": "Band 4"}, 2: None, 3: None}
+    assert buffer.pending_count() == 3
+
+
+def test_flush_merges_once_and_clears_the_overlay(buffer, monkeypatch):
+    merged = []
+
+    def merge(batch):
+        # Rows being merged still count as pending for readers
+        assert buffer.overlay() == batch
+        merged.append(dict(batch))
+
+    monkeypatch.setattr(buffer, "_merge", merge)
+    buffer.add_many({1: {"id": 1}, 2: None})
+
+    assert buffer.flush() == 2
+    assert merged == [{1: {"id": 1}, 2: None}]
+    assert buffer.overlay() == {}
+    assert buffer.flush() == 0
+    assert buffer.flushes == 1
+
+
+def test_failed_flush_requeues_the_batch(buffer, monkeypatch):
+    def merge(batch):
+        # An edit arriving mid-flush must win over the batch being retried
+        buffer.upsert(1, {"id": 1, "Band": "newer"})
+        buffer.upsert(4, {"id": 4})
+        raise RuntimeError("MERGE failed")
+
+    monkeypatch.setattr(buffer, "_merge", merge)
+    buffer.add_many({1: {"id": 1, "Band": "older"}, 2: None, 3: {"id": 3}})
+
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+
+    assert buffer.flush_errors == 1
+    assert buffer.overlay() == {1: {"id": 1, "Band": "newer"}, 2: None, 3: {"id": 3}, 4: {"id": 4}}
+
+    retried = []
+    monkeypatch.setattr(buffer, "_merge", lambda batch: retried.append(dict(batch)))
+    assert buffer.flush() == 4
+    assert retried == [{1: {"id": 1, "Band": "newer"}, 2: None, 3: {"id": 3}, 4: {"id": 4}}]
+    assert buffer.overlay() == {}
+
+
+def test_pending_slice_applies_filters_cursor_and_projection(make_rows, monkeypatch):
+    client = BigQueryClient.__new__(BigQueryClient)
+    client.write_buffer = WriteBuffer(client, interval=3600)
+    rows = make_rows(20)
+    client.write_buffer.add_many({
+        4: dict(rows[3], Function="HR"), 9: dict(rows[8], Function="HR"),
+        12: dict(rows[11], Function="Sales"), 15: None,
+    })
+
+    ids, pending = client.pending_slice({"Function": ["HR"]}, ["Band"], after_id=5)
+    assert sorted(ids) == [4, 9, 12, 15]
+    assert pending == [{"id": 9, "Band": rows[8]["Band"]}]
+
+
+def test_put_and_delete_of_missing_id_are_404_with_bigquery(client, monkeypatch):
+    client.get("/api/manpower")  # snapshot loaded from the local store
+    # A configured client buffers edits, whose MERGE only touches existing rows
+    monkeypatch.setattr(bq_client, "client", object())
+    monkeypatch.setattr(bq_client, "write_buffer", WriteBuffer(bq_client, interval=3600))
+    record = local_store.get(1)
+
+    assert client.put("/api/manpower/99999", json=dict(record, id=99999)).status_code == 404
+    assert client.delete("/api/manpower/99999").status_code == 404
+    assert bq_client.write_buffer.overlay() == {}
+
+    assert client.put("/api/manpower/1", json=dict(record, Band="Band 5")).status_code == 200
+    assert bq_client.write_buffer.overlay() == {1: dict(record, Band="Band 5")}
+
+
+def test_snapshot_load_keeps_edits_flushed_during_the_fetch(make_rows, monkeypatch):
+    import copy
+    import db
+    from snapshot import load_manpower_snapshot
+
+    table = {r["id"]: r for r in make_rows(20)}
+    buffer = WriteBuffer(bq_client, interval=3600)
+    monkeypatch.setattr(bq_client, "client", object())
+    monkeypatch.setattr(bq_client, "write_buffer", buffer)
+    monkeypatch.setattr(db, "FETCH_MODE", "rows")
+    monkeypatch.setattr(buffer, "_merge", lambda batch: table.update(
+        {k: v for k, v in batch.items() if v is not None}))
+
+    def fetch():
+        rows = copy.deepcopy(list(table.values()))
+        buffer.flush()  # the MERGE commits after the query read the table
+        return rows
+
+    monkeypatch.setattr(bq_client, "_fetch_manpower_data", fetch)
+    edited = dict(table[3], Band="Band 5")
+    buffer.upsert(3, edited)
+
+    records = load_manpower_snapshot()
+    assert buffer.overlay() == {}
+    assert [r for r in records if r["id"] == 3] == [edited]
@@ -1,21 +1,14 @@
-import json
-import os
 from google.cloud import bigquery
 from db import bq_client, TABLE_ID, DATASET_ID, PROJECT_ID
-
-DATA_FILE = "mock_db.json"
+from local_store import local_store
 
 def upload_data():
-    if not os.path.exists(DATA_FILE):
-        print(f"Error: {DATA_FILE} not found!")
-        return
-
-    print(f"Reading data from {DATA_FILE}...")
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # The local store imports mock_db.json on first use if it exists
+    print(f"Reading data from {local_store.path}...")
+    data = local_store.all()
 
     if not data:
-        print("No data found in mock_db.json")
+        print(f"No data found in {local_store.path}")
         return
 
     client = bq_client.client
@@ -7,9 +7,24 @@ import SkillsMatrix from './SkillsMatrix'; // Import new component
 import PdfExportButton from './PdfExportButton'; // Import PDF Export Button
 import { LogOut, User, Database, LayoutGrid, Table as TableIcon } from 'lucide-react';
 
+// Expand the normalized /api/manpower payload (lookup tables + integer
+// references) back into row objects. Rows that share a value share the
+// same string instance, so this is cheap next to parsing the full JSON.
+const expandNormalized = ({ fields, lookups, rows }) => {
+    const tables = fields.map(field => lookups[field]);
+    return rows.map(row => {
+        const record = {};
+        for (let i = 0; i < fields.length; i++) {
+            record[fields[i]] = tables[i] ? tables[i][row[i]] : row[i];
+        }
+        return record;
+    });
+};
+
 const Dashboard = () => {
     const { user, logout } = useAuth();
     const [data, setData] = useState([]);
+    const [snapshotVersion, setSnapshotVersion] = useState(null);
     const [loading, setLoading] = useState(true);
     const [isAdminView, setIsAdminView] = useState(false);
     const [isMatrixView, setIsMatrixView] = useState(true); // Default to Matrix View as requested
@@ -27,8 +42,9 @@ const Dashboard = () => {
     const fetchData = async () => {
         setLoading(true);
         try {
-            const response = await axios.get('/api/manpower');
-            setData(response.data);
+            const response = await axios.get('/api/manpower', { params: { format: 'normalized' } });
+            setData(expandNormalized(response.data));
+            setSnapshotVersion(response.headers['x-snapshot-version'] || null);
         } catch (error) {
             console.error("Error fetching data:", error);
         } finally {
@@ -36,6 +52,45 @@ const Dashboard = () => {
         }
     };
 
+    // After an edit, fetch only the rows that changed since our version.
+    // The server answers with the full table (X-Sync: full) if its change
+    // log no longer reaches back that far.
+    const syncData = async () => {
+        if (snapshotVersion === null) {
+            return fetchData();
+        }
+        try {
+            const response = await axios.get('/api/manpower', {
+                params: { since: snapshotVersion, format: 'normalized' }
+            });
+            if (response.headers['x-sync'] === 'delta') {
+                const { upserts, deletes } = response.data;
+                if (upserts.length || deletes.length) {
+                    setData(prev => {
+                        const changed = new Map(upserts.map(row => [row.id, row]));
+                        const deleted = new Set(deletes);
+                        const next = [];
+                        for (const row of prev) {
+                            if (deleted.has(row.id)) continue;
+                            if (changed.has(row.id)) {
+                                next.push(changed.get(row.id));
+                                changed.delete(row.id);
+                            } else {
+                                next.push(row);
+                            }
+                        }
+                        return next.concat([...changed.values()]);
+                    });
+                }
+            } else {
+                setData(expandNormalized(response.data));
+            }
+            setSnapshotVersion(response.headers['x-snapshot-version'] || null);
+        } catch (error) {
+            console.error("Error syncing data:", error);
+        }
+    };
+
     const handleReset = async () => {
         if (confirm('Are you sure you want to reset all data to default? This cannot be undone.')) {
             setLoading(true);
@@ -61,59 +116,47 @@ const Dashboard = () => {
         });
     }, [data, filters]);
 
-    // Extract unique values for filters
-    const filterOptions = useMemo(() => {
-        const options = { functions: [], bands: [], sbus: [], roles: [] };
-        if (data.length) {
-            options.functions = [...new Set(data.map(d => d.Function))].sort();
-            options.bands = [...new Set(data.map(d => d.Band))].sort();
-            options.sbus = [...new Set(data.map(d => d.SBU))].sort();
-            options.roles = [...new Set(data.map(d => d.Job_Role_Name_without_concat))].sort();
-        }
-        return options;
-    }, [data]);
-
-    // Calculate available options based on *other* active filters (Faceted search)
-    const availableOptions = useMemo(() => {
-        if (!data.length) return { functions: [], bands: [], sbus: [], roles: [] };
-
-        const getUnique = (dataset, key) => [...new Set(dataset.map(item => item[key]))];
-
-        // 1. Available Functions (start with all data, filter by Band, SBU, Role)
-        const functionsData = data.filter(item =>
-            (filters.Band.length === 0 || filters.Band.includes(item.Band)) &&
-            (filters.SBU.length === 0 || filters.SBU.includes(item.SBU)) &&
-            (filters.Role.length === 0 || filters.Role.includes(item.Job_Role_Name_without_concat))
-        );
-
-        // 2. Available Bands (filter by Function, SBU, Role)
-        const bandsData = data.filter(item =>
-            (filters.Function.length === 0 || filters.Function.includes(item.Function)) &&
-            (filters.SBU.length === 0 || filters.SBU.includes(item.SBU)) &&
-            (filters.Role.length === 0 || filters.Role.includes(item.Job_Role_Name_without_concat))
-        );
-
-        // 3. Available SBUs (filter by Function, Band, Role)
-        const sbusData = data.filter(item =>
-            (filters.Function.length === 0 || filters.Function.includes(item.Function)) &&
-            (filters.Band.length === 0 || filters.Band.includes(item.Band)) &&
-            (filters.Role.length === 0 || filters.Role.includes(item.Job_Role_Name_without_concat))
-        );
-
-        // 4. Available Roles (filter by Function, Band, SBU)
-        const rolesData = data.filter(item =>
-            (filters.Function.length === 0 || filters.Function.includes(item.Function)) &&
-            (filters.Band.length === 0 || filters.Band.includes(item.Band)) &&
-            (filters.SBU.length === 0 || filters.SBU.includes(item.SBU))
-        );
+    // Dropdown options come from /api/manpower/facets (bitmap counts on the
+    // server) instead of rescanning the table on every selection change.
+    const [filterOptions, setFilterOptions] = useState({ functions: [], bands: [], sbus: [], roles: [] });
+    const [availableOptions, setAvailableOptions] = useState({ functions: [], bands: [], sbus: [], roles: [] });
 
+    const fetchFacets = async (selection) => {
+        const response = await axios.get('/api/manpower/facets', {
+            params: {
+                facets: 'Function,Band,SBU,Job_Role_Name_without_concat',
+                Function: selection.Function,
+                Band: selection.Band,
+                SBU: selection.SBU,
+                Job_Role_Name_without_concat: selection.Role
+            },
+            // Repeat keys (?Band=a&Band=b) rather than Band[]=a
+            paramsSerializer: { indexes: null }
+        });
+        const values = (facet) => response.data.facets[facet].map(f => f.value);
         return {
-            functions: getUnique(functionsData, 'Function'),
-            bands: getUnique(bandsData, 'Band'),
-            sbus: getUnique(sbusData, 'SBU'),
-            roles: getUnique(rolesData, 'Job_Role_Name_without_concat')
+            functions: values('Function'),
+            bands: values('Band'),
+            sbus: values('SBU'),
+            roles: values('Job_Role_Name_without_concat')
         };
-    }, [data, filters]);
+    };
+
+    // All values for each filter
+    useEffect(() => {
+        if (snapshotVersion === null) return;
+        fetchFacets({ Function: [], Band: [], SBU: [], Role: [] })
+            .then(setFilterOptions)
+            .catch(error => console.error("Error fetching filter options:", error));
+    }, [snapshotVersion]);
+
+    // Values still available given the *other* active filters (faceted search)
+    useEffect(() => {
+        if (snapshotVersion === null) return;
+        fetchFacets(filters)
+            .then(setAvailableOptions)
+            .catch(error => console.error("Error fetching filter options:", error));
+    }, [snapshotVersion, filters]);
 
 
     return (
@@ -188,6 +231,7 @@ const Dashboard = () => {
                         <PdfExportButton
                             data={filteredData}
                             filters={filters}
+                            snapshotVersion={snapshotVersion}
                         />
                         {!isMatrixView && (
                             <button
@@ -223,7 +267,7 @@ const Dashboard = () => {
                                 <DataGrid
                                     data={filteredData}
                                     isAdmin={isAdminView}
-                                    onDataChange={fetchData} // Refresh after edit/delete
+                                    onDataChange={syncData} // Pull just the changes after edit/delete
                                 />
                             )}
                         </>
@@ -10,41 +10,71 @@ import { ArrowUpDown, Trash2, Edit2, Save, X } from 'lucide-react';
 import axios from 'axios';
 import clsx from 'clsx';
 
-const DataGrid = ({ data, setData, viewMode }) => {
+const DataGrid = ({ data, isAdmin, onDataChange }) => {
     const [editingCell, setEditingCell] = useState(null); // { rowId, columnId, value }
+    const [pendingEdits, setPendingEdits] = useState({}); // rowId -> { columnId: value }
     const [updateStatus, setUpdateStatus] = useState(null); // 'saving', 'success', 'error'
+    const [updateError, setUpdateError] = useState(null);
 
-    const handleCellUpdate = async (rowId, columnId, newValue) => {
-        // Optimistic update
-        const rowIndex = data.findIndex(row => row.id === rowId);
-        const oldRow = data[rowIndex];
-        const newRow = { ...oldRow, [columnId]: newValue };
+    const pendingCount = Object.keys(pendingEdits).length;
 
-        const newData = [...data];
-        newData[rowIndex] = newRow;
-        setData(newData);
+    // Edits are staged per row and sent together by saveEdits
+    const handleCellUpdate = (rowId, columnId, newValue) => {
+        const original = data.find(row => row.id === rowId);
+        setPendingEdits(prev => {
+            const fields = { ...prev[rowId], [columnId]: newValue };
+            if (original && String(original[columnId]) === String(newValue)) {
+                delete fields[columnId];
+            }
+            const next = { ...prev };
+            if (Object.keys(fields).length) {
+                next[rowId] = fields;
+            } else {
+                delete next[rowId];
+            }
+            return next;
+        });
+        setEditingCell(null);
+    };
 
+    // One PATCH /api/manpower for every edited row; the server applies all or none
+    const saveEdits = async () => {
+        const updates = Object.entries(pendingEdits).map(([rowId, fields]) => ({ id: Number(rowId), ...fields }));
+        if (!updates.length) return;
         setUpdateStatus('saving');
+        setUpdateError(null);
         try {
-            await axios.put(`/api/manpower/${rowId}`, newRow);
+            await axios.patch('/api/manpower', { updates, deletes: [] });
+            setPendingEdits({});
             setUpdateStatus('success');
             setTimeout(() => setUpdateStatus(null), 2000);
+            if (onDataChange) await onDataChange();
         } catch (error) {
-            console.error("Failed to update record", error);
-            // Revert on failure
-            const revertedData = [...data];
-            revertedData[rowIndex] = oldRow;
-            setData(revertedData);
+            console.error("Failed to save records", error);
+            const failed = (error.response?.data?.results || []).filter(r => r.status !== 'ok');
+            setUpdateError(failed.length
+                ? `Rows ${failed.map(r => `${r.id} (${r.status})`).join(', ')} were rejected; nothing was saved`
+                : null);
             setUpdateStatus('error');
         }
-        setEditingCell(null);
+    };
+
+    const discardEdits = () => {
+        setPendingEdits({});
+        setUpdateStatus(null);
+        setUpdateError(null);
     };
 
     const handleDelete = async (rowId) => {
         if (window.confirm("Delete this record?")) {
             try {
                 await axios.delete(`/api/manpower/${rowId}`);
-                setData(prev => prev.filter(row => row.id !== rowId));
+                setPendingEdits(prev => {
+                    const next = { ...prev };
+                    delete next[rowId];
+                    return next;
+                });
+                if (onDataChange) await onDataChange();
             } catch (error) {
                 console.error("Failed to delete record", error);
             }
@@ -72,7 +102,8 @@ const DataGrid = ({ data, setData, viewMode }) => {
             accessorKey: 'Proficiency_Level',
             header: 'Proficiency',
             cell: ({ getValue, row, column: { id }, table }) => {
-                const initialValue = getValue();
+                const staged = pendingEdits[row.original.id]?.[id];
+                const initialValue = staged ?? getValue();
                 const isEditing = editingCell?.rowId === row.original.id && editingCell?.columnId === id;
 
                 if (isEditing) {
@@ -81,7 +112,7 @@ const DataGrid = ({ data, setData, viewMode }) => {
                             autoFocus
                             className="border border-blue-500 rounded px-1 py-0.5 text-sm w-full bg-white shadow-sm"
                             value={editingCell.value}
-                            onChange={(e) => setEditingCell({ ...editingCell, value: e.target.value })}
+                            onChange={(e) => setEditingCell({ ...editingCell, value: Number(e.target.value) })}
                             onBlur={() => handleCellUpdate(row.original.id, id, editingCell.value)}
                             onKeyDown={(e) => {
                                 if (e.key === 'Enter') handleCellUpdate(row.original.id, id, editingCell.value);
@@ -102,6 +133,7 @@ const DataGrid = ({ data, setData, viewMode }) => {
                     >
                         <span className={clsx(
                             "inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium",
+                            staged !== undefined && "ring-2 ring-blue-400",
                             initialValue >= 4 ? "bg-green-100 text-green-800" :
                                 initialValue >= 3 ? "bg-yellow-100 text-yellow-800" :
                                     "bg-red-100 text-red-800"
@@ -137,7 +169,7 @@ const DataGrid = ({ data, setData, viewMode }) => {
             cell: info => <span className="text-gray-400 text-xs">{info.getValue()}</span>
         },
         // Admin Actions
-        ...(viewMode === 'admin' ? [{
+        ...(isAdmin ? [{
             id: 'actions',
             cell: ({ row }) => (
                 <button
@@ -149,7 +181,7 @@ const DataGrid = ({ data, setData, viewMode }) => {
                 </button>
             ),
         }] : [])
-    ], [viewMode, editingCell, data]);
+    ], [isAdmin, editingCell, pendingEdits, data]);
 
     const table = useReactTable({
         data,
@@ -202,9 +234,26 @@ const DataGrid = ({ data, setData, viewMode }) => {
             {/* Simple Pagination or Footer could go here */}
             <div className="px-6 py-3 border-t border-gray-200 bg-gray-50 text-sm text-gray-500 flex justify-between items-center">
                 <span>Showing {table.getRowModel().rows.length} records</span>
+                {pendingCount > 0 && updateStatus !== 'saving' && (
+                    <span className="flex items-center gap-2">
+                        <span className="text-blue-700">{pendingCount} unsaved {pendingCount === 1 ? 'row' : 'rows'}</span>
+                        <button
+                            onClick={saveEdits}
+                            className="flex items-center px-3 py-1 rounded bg-blue-600 text-white hover:bg-blue-700"
+                        >
+                            <Save className="w-4 h-4 mr-1" /> Save changes
+                        </button>
+                        <button
+                            onClick={discardEdits}
+                            className="px-3 py-1 rounded border border-gray-300 text-gray-600 hover:bg-gray-100"
+                        >
+                            Discard
+                        </button>
+                    </span>
+                )}
                 {updateStatus === 'saving' && <span className="text-yellow-600 flex items-center"><span className="animate-pulse mr-2">●</span> Saving...</span>}
                 {updateStatus === 'success' && <span className="text-green-600 flex items-center"><Save className="w-4 h-4 mr-1" /> Saved</span>}
-                {updateStatus === 'error' && <span className="text-red-600 flex items-center"><X className="w-4 h-4 mr-1" /> Update failed</span>}
+                {updateStatus === 'error' && <span className="text-red-600 flex items-center"><X className="w-4 h-4 mr-1" /> {updateError || 'Update failed'}</span>}
             </div>
         </div>
     );
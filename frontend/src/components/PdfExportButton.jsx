@@ -2,26 +2,54 @@ import React, { useState } from 'react';
 import { FileDown, Loader2 } from 'lucide-react';
 import axios from 'axios';
 
-const PdfExportButton = ({ data, filters }) => {
+const POLL_INTERVAL_MS = 1000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const PdfExportButton = ({ data, filters, snapshotVersion }) => {
     const [isExporting, setIsExporting] = useState(false);
+    const [progress, setProgress] = useState(null);
     const [error, setError] = useState(null);
 
+    const startExportJob = async () => {
+        const withRows = { data: data, filters: filters };
+        if (!snapshotVersion) {
+            return (await axios.post('/api/export-jobs', withRows)).data;
+        }
+        // The server already has the rows: send only the filters, pinned to
+        // the snapshot we're showing
+        try {
+            const payload = { filters: filters, snapshot_version: Number(snapshotVersion) };
+            return (await axios.post('/api/export-jobs', payload)).data;
+        } catch (err) {
+            if (err.response?.status !== 409) {
+                throw err;
+            }
+            // That version has aged out of the server's history (later edits):
+            // send the rows we're showing instead
+            return (await axios.post('/api/export-jobs', withRows)).data;
+        }
+    };
+
     const handleExport = async () => {
         setIsExporting(true);
+        setProgress(null);
         setError(null);
 
         try {
-            const response = await axios.post(
-                '/api/export-pdf',
-                {
-                    data: data,
-                    filters: filters
-                },
-                {
-                    responseType: 'blob', // Important for binary data
-                    timeout: 60000 // 60 second timeout for large datasets
-                }
-            );
+            // Run the export as a background job and poll it, so long exports
+            // don't sit on one request until a proxy times it out
+            let job = await startExportJob();
+            while (job.status === 'queued' || job.status === 'running') {
+                setProgress(job.progress);
+                await sleep(POLL_INTERVAL_MS);
+                ({ data: job } = await axios.get(job.status_url));
+            }
+            if (job.status !== 'done') {
+                throw new Error(job.error || 'Export failed');
+            }
+
+            const response = await axios.get(job.download_url, { responseType: 'blob' });
 
             // Create download link
             const blob = new Blob([response.data], { type: 'application/pdf' });
@@ -41,6 +69,7 @@ const PdfExportButton = ({ data, filters }) => {
             setError(err.response?.data?.detail || 'Failed to generate PDF. Please try again.');
         } finally {
             setIsExporting(false);
+            setProgress(null);
         }
     };
 
@@ -62,7 +91,11 @@ const PdfExportButton = ({ data, filters }) => {
                 {isExporting ? (
                     <>
                         <Loader2 className="w-4 h-4 animate-spin" />
-                        <span>Generating PDF...</span>
+                        <span>
+                            {progress?.bands_total
+                                ? `Generating PDF... ${progress.bands_done || 0}/${progress.bands_total} bands, ${progress.pages || 0} pages`
+                                : 'Generating PDF...'}
+                        </span>
                     </>
                 ) : (
                     <>